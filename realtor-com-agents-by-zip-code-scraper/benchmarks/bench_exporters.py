@@ -0,0 +1,54 @@
+"""
+Write time and file size of each export format.
+
+Usage: python benchmarks/bench_exporters.py [--agents 200000]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable
+
+from fixtures import build_agents
+
+from storage.csv_exporter import export_agents_to_csv
+from storage.json_exporter import export_agents_to_json, export_agents_to_jsonl
+from storage.parquet_exporter import export_agents_to_parquet
+from storage.sqlite_exporter import export_agents_to_sqlite
+
+EXPORTERS: Dict[str, Callable[[Iterable[Dict[str, Any]], Path], int]] = {
+    "json": export_agents_to_json,
+    "jsonl": export_agents_to_jsonl,
+    "csv": export_agents_to_csv,
+    "parquet": export_agents_to_parquet,
+    "sqlite": export_agents_to_sqlite,
+}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=200_000)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, exporter in EXPORTERS.items():
+            path = Path(tmp) / f"agents.{name}"
+            started = time.perf_counter()
+            try:
+                exporter(build_agents(args.agents), path)
+            except RuntimeError as exc:
+                print(f"{name:<8} skipped: {exc}")
+                continue
+            elapsed = time.perf_counter() - started
+            results.append((name, elapsed, path.stat().st_size))
+
+    json_size = results[0][2]
+    for name, elapsed, size in results:
+        print(
+            f"{name:<8} {elapsed:>7.2f}s  {args.agents / elapsed:>10.0f} rows/s  "
+            f"{size / 1024 / 1024:>8.1f} MiB  x{json_size / size:.1f} smaller than json"
+        )
+
+if __name__ == "__main__":
+    main()
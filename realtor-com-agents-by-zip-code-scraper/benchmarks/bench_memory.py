@@ -0,0 +1,62 @@
+"""
+Resident size of normalized agents held as dicts vs compact AgentRecords.
+
+Each mode normalizes ``--agents`` synthetic raw agents (offices, areas and
+zip lists repeat the way they do across a real crawl) and keeps them all,
+as a deduplicating or in-memory export would.
+
+Each mode runs in a fresh interpreter and reports its peak RSS growth.
+
+Usage: python benchmarks/bench_memory.py [--agents 1000000]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from typing import Dict
+
+from fixtures import build_raw_agents, peak_rss_mib
+
+from parsers.agent_normalizer import AgentNormalizer
+
+def measure(mode: str, count: int) -> Dict[str, float]:
+    normalizer = AgentNormalizer()
+    normalize = normalizer.normalize_record if mode == "record" else normalizer.normalize
+    before = peak_rss_mib()
+    started = time.perf_counter()
+    agents = [normalize(raw) for raw in build_raw_agents(count)]
+    elapsed = time.perf_counter() - started
+    return {"mib": peak_rss_mib() - before, "seconds": elapsed, "agents": len(agents)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=1_000_000)
+    parser.add_argument("--mode", choices=("dict", "record"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, args.agents)))
+        return
+
+    results = {}
+    for mode in ("dict", "record"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--agents", str(args.agents)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[mode] = json.loads(output)
+
+    baseline = results["dict"]["mib"]
+    for mode, row in results.items():
+        print(
+            f"{mode:<7} {args.agents} agents  {row['mib']:>8.1f} MiB  "
+            f"{row['mib'] * 1024 * 1024 / args.agents:>6.0f} B/agent  "
+            f"{row['seconds']:>6.2f}s  x{baseline / row['mib']:.2f} smaller"
+        )
+
+if __name__ == "__main__":
+    main()
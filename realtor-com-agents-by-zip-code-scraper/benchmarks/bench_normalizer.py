@@ -0,0 +1,54 @@
+"""
+Per-record AgentNormalizer.normalize_record vs column-wise normalize_batch.
+
+Usage: python benchmarks/bench_normalizer.py [--agents 100000] [--page-size 20]
+"""
+
+import argparse
+import time
+
+from fixtures import build_raw_agents
+
+from parsers.agent_normalizer import AgentNormalizer
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=100_000)
+    parser.add_argument(
+        "--page-size", type=int, default=0, help="Batch size (0 = one batch of all agents)."
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    raws = list(build_raw_agents(args.agents))
+    normalizer = AgentNormalizer()
+    size = args.page_size or len(raws)
+    batches = [raws[i : i + size] for i in range(0, len(raws), size)]
+
+    def scalar() -> list:
+        return [normalizer.normalize_record(raw) for raw in raws]
+
+    def batch() -> list:
+        out = []
+        for rows in batches:
+            out.extend(normalizer.normalize_batch(rows))
+        return out
+
+    assert scalar() == batch(), "normalize_batch diverged from normalize_record"
+    timings = {}
+    for name, fn in (("scalar", scalar), ("batch", batch)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        timings[name] = best
+
+    for name, seconds in timings.items():
+        print(
+            f"{name:<7} {args.agents} agents  {seconds:>6.3f}s  "
+            f"{args.agents / seconds:>10.0f} agents/s  x{timings['scalar'] / seconds:.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Pages/sec for sequential vs pipelined page fetching.
+
+Usage: python benchmarks/bench_pipeline.py [--zips 5] [--pages 6] [--latency 0.03]
+"""
+
+import argparse
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from fixtures import FixtureSession
+
+from realtor_client import RealtorClient
+
+def run_mode(
+    args: argparse.Namespace, pipelined: bool, parse_processes: int
+) -> Dict[str, Any]:
+    session = FixtureSession(pages_per_zip=args.pages, latency=args.latency)
+    executor: Optional[ProcessPoolExecutor] = None
+    if parse_processes:
+        executor = ProcessPoolExecutor(max_workers=parse_processes)
+        # Warm the pool so process start-up is not counted.
+        list(executor.map(abs, range(parse_processes)))
+    client = RealtorClient(
+        base_url="https://bench.local/agents",
+        session=session,
+        logger=logging.getLogger("bench"),
+        pipelined=pipelined,
+        parse_executor=executor,
+    )
+
+    started = time.perf_counter()
+    agents = 0
+    for i in range(args.zips):
+        agents += len(client.search_agents_by_zip(str(90000 + i)))
+    elapsed = time.perf_counter() - started
+    if executor is not None:
+        executor.shutdown()
+
+    return {
+        "mode": ("pipelined" if pipelined else "sequential")
+        + (f"+{parse_processes}proc" if parse_processes else ""),
+        "requests": session.requests,
+        "agents": agents,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(session.requests / elapsed, 2),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--zips", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.03)
+    args = parser.parse_args()
+
+    results = [
+        run_mode(args, pipelined=False, parse_processes=0),
+        run_mode(args, pipelined=True, parse_processes=0),
+        run_mode(args, pipelined=True, parse_processes=2),
+    ]
+    baseline = results[0]["pages_per_sec"]
+    for row in results:
+        print(
+            f"{row['mode']:<20} {row['requests']:>5} req  {row['seconds']:>7.3f}s  "
+            f"{row['pages_per_sec']:>8.2f} pages/s  x{row['pages_per_sec'] / baseline:.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Full-body vs streamed page reads over HTTP against recorded pages.
+
+Fixture pages (padded with ``--tail-kib`` of trailing scripts, as real
+results pages carry) are recorded into a ``ReplayStore`` and served by a
+local keep-alive HTTP server that gzips responses and paces them at
+``--bandwidth-mbps``. Each mode requests every page once:
+
+* ``full``: ``response.text`` then ``parse_agents_page(str)``, as before.
+* ``streamed``: ``read_page_body`` (stops after the results) then
+  ``parse_agents_page(bytes)``.
+
+Reported per mode: bytes on the wire, body bytes read, mean time to the
+first agent card arriving, mean time to a parsed page, and whether both
+modes parsed identical agents.
+
+Usage: python benchmarks/bench_streaming.py [--zips 5] [--pages 4]
+           [--tail-kib 96] [--bandwidth-mbps 50]
+"""
+
+import argparse
+import gzip
+import random
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from fixtures import build_page
+
+from parsers.html_parser import parse_agents_page
+from utils.page_stream import STREAM_ACCEPT_ENCODING, read_page_body
+from utils.replay_session import ReplayStore
+
+CARD_MARKER = b'class="agent-card"'
+
+def build_recording(path: Path, zips: int, pages: int, tail_kib: int) -> List[str]:
+    # Minified bundles barely compress; random tokens keep gzip honest.
+    rng = random.Random(0)
+    tail = "".join(
+        f"<script>window.__chunk_{i}=\"{rng.randbytes(700).hex()[:1000]}\";</script>"
+        for i in range(tail_kib)
+    )
+    store = ReplayStore(path)
+    paths = []
+    rows = []
+    for z in range(zips):
+        zip_code = str(90000 + z)
+        for page in range(1, pages + 1):
+            url = f"/agents/{zip_code}" + (f"/pg-{page}" if page > 1 else "")
+            html = build_page(zip_code, page).replace("</body>", tail + "</body>")
+            rows.append((url, 200, html.encode("utf-8")))
+            paths.append(url)
+    store.put_many(rows)
+    store.close()
+    return paths
+
+def serve_recording(path: Path, bandwidth_mbps: float) -> Tuple[ThreadingHTTPServer, Dict[str, int]]:
+    """Serve the recording gzipped, paced to ``bandwidth_mbps``."""
+    store = ReplayStore(path)
+    counters = {"wire_bytes": 0}
+    lock = threading.Lock()
+    chunk = 8 * 1024
+    seconds_per_chunk = chunk * 8 / (bandwidth_mbps * 1_000_000)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            recorded = store.get(self.path)
+            if recorded is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = recorded.content
+            gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+            if gzipped:
+                body = gzip.compress(body, 6)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            if gzipped:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                for start in range(0, len(body), chunk):
+                    self.wfile.write(body[start : start + chunk])
+                    self.wfile.flush()
+                    with lock:
+                        counters["wire_bytes"] += len(body[start : start + chunk])
+                    time.sleep(seconds_per_chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                # The streamed client hung up after the results.
+                pass
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counters
+
+class TimedResponse:
+    """Proxy noting when the first agent card arrives in a streamed body."""
+
+    def __init__(self, response: Any, started: float) -> None:
+        self._response = response
+        self._started = started
+        self.first_card: Optional[float] = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        tail = b""
+        for chunk in self._response.iter_content(chunk_size=chunk_size):
+            if self.first_card is None and CARD_MARKER in tail + chunk:
+                self.first_card = time.perf_counter() - self._started
+            tail = chunk[-len(CARD_MARKER) :]
+            yield chunk
+
+def run_mode(base: str, paths: List[str], counters: Dict[str, int], streamed: bool) -> Dict[str, Any]:
+    session = requests.Session()
+    wire_before = counters["wire_bytes"]
+    body_bytes = 0
+    first_cards: List[float] = []
+    parsed_at: List[float] = []
+    agents = []
+    started_all = time.perf_counter()
+    for path in paths:
+        started = time.perf_counter()
+        if streamed:
+            response = session.get(
+                base + path, headers={"Accept-Encoding": STREAM_ACCEPT_ENCODING}, stream=True
+            )
+            timed = TimedResponse(response, started)
+            page: Any = read_page_body(timed).body
+            body_bytes += len(page)
+            first_cards.append(timed.first_card or 0.0)
+        else:
+            response = session.get(base + path)
+            page = response.text
+            # The whole body has to arrive before a str exists to look at.
+            first_cards.append(time.perf_counter() - started)
+            body_bytes += len(response.content)
+        agents.extend(parse_agents_page(page, zip_code=path.split("/")[2]).agents)
+        parsed_at.append(time.perf_counter() - started)
+    elapsed = time.perf_counter() - started_all
+    # Give the server a moment to notice connections cut short.
+    time.sleep(0.2)
+    return {
+        "mode": "streamed" if streamed else "full",
+        "wire_kib": (counters["wire_bytes"] - wire_before) / 1024,
+        "body_kib": body_bytes / 1024,
+        "first_card_ms": statistics.mean(first_cards) * 1000,
+        "parsed_ms": statistics.mean(parsed_at) * 1000,
+        "pages_per_sec": len(paths) / elapsed,
+        "agents": agents,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--zips", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--tail-kib", type=int, default=96)
+    parser.add_argument("--bandwidth-mbps", type=float, default=50.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        recording = Path(tmp) / "pages.sqlite3"
+        paths = build_recording(recording, args.zips, args.pages, args.tail_kib)
+        server, counters = serve_recording(recording, args.bandwidth_mbps)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            results = [run_mode(base, paths, counters, streamed) for streamed in (False, True)]
+        finally:
+            server.shutdown()
+
+    print(f"{len(paths)} pages, {args.tail_kib} KiB tail, {args.bandwidth_mbps:g} Mbit/s")
+    for row in results:
+        print(
+            f"{row['mode']:<9} wire {row['wire_kib']:>8.1f} KiB  body {row['body_kib']:>8.1f} KiB  "
+            f"first card {row['first_card_ms']:>7.2f} ms  parsed {row['parsed_ms']:>7.2f} ms  "
+            f"{row['pages_per_sec']:>7.1f} pages/s"
+        )
+    full, streamed = results
+    print(f"identical agents: {full['agents'] == streamed['agents']}")
+    print(f"wire bytes saved: {1 - streamed['wire_kib'] / full['wire_kib']:.1%}")
+
+if __name__ == "__main__":
+    main()
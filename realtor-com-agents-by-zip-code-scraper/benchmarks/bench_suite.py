@@ -0,0 +1,197 @@
+"""
+End-to-end throughput suite over replayed pages, with JSON results.
+
+For every scale (``<zips>x<pages>``) a replay recording of fixture pages
+is generated, then the crawl -> parse -> normalize -> export pipeline that
+main.py wires together (``build_client``, ``AgentExtractor``, ``EXPORTERS``)
+runs in a fresh interpreter against it. Each run reports pages/s, agents/s,
+parse ms/page, export time and peak RSS. ``--baseline`` compares with an
+earlier results file and exits non-zero when throughput regressed by more
+than ``--max-regression``.
+
+Usage: python benchmarks/bench_suite.py [--scales 10x5,50x10,100x10]
+           [--latency 0.0] [--error-rate 0.0] [--workers 4] [--format jsonl]
+           [--output results.json] [--baseline previous.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from fixtures import build_page, peak_rss_mib
+
+BASE_URL = "https://bench.local/agents"
+
+def build_recording(path: Path, zips: int, pages: int) -> List[str]:
+    """Record ``pages`` pages per zip plus the empty page that ends each zip."""
+    from utils.replay_session import ReplayStore
+
+    zip_codes = [str(90000 + i) for i in range(zips)]
+    store = ReplayStore(path)
+    rows = []
+    for zip_code in zip_codes:
+        for page in range(1, pages + 2):
+            url = f"{BASE_URL}/{zip_code}" + (f"/pg-{page}" if page > 1 else "")
+            html = build_page(zip_code, page, cards=20 if page <= pages else 0)
+            rows.append((url, 200, html.encode("utf-8")))
+    store.put_many(rows)
+    store.close()
+    return zip_codes
+
+def run_scale(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Child process: one pipeline run against a prepared recording."""
+    logging.getLogger().setLevel(logging.WARNING)
+    from config import Settings
+    from agent_extractor import AgentExtractor
+    from main import EXPORTERS, build_client
+
+    settings = Settings(
+        base_url=BASE_URL,
+        rate_limit_rpm=10**9,
+        workers=config["workers"],
+        pipelined=config["pipelined"],
+        retry_base_delay=0.0,
+        replay_path=Path(config["recording"]),
+        replay_latency=config["latency"],
+        replay_error_rate=config["error_rate"],
+    )
+    client = build_client(settings, None, None)
+    parse_seconds = [0.0]
+    parse_page = client._parse_page
+
+    def timed_parse(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return parse_page(*args, **kwargs)
+        finally:
+            parse_seconds[0] += time.perf_counter() - started
+
+    client._parse_page = timed_parse
+    extractor = AgentExtractor(
+        client=client, logger=logging.getLogger("bench"), workers=settings.workers
+    )
+
+    started = time.perf_counter()
+    agents = list(extractor.iter_agents(config["zip_codes"]))
+    crawl_seconds = time.perf_counter() - started
+
+    output = Path(config["output"])
+    started = time.perf_counter()
+    EXPORTERS[config["format"]](agents, output)
+    export_seconds = time.perf_counter() - started
+
+    pages = client.session.requests
+    return {
+        "scale": config["scale"],
+        "zips": len(config["zip_codes"]),
+        "requests": pages,
+        "injected_errors": client.session.errors,
+        "agents": len(agents),
+        "crawl_seconds": round(crawl_seconds, 4),
+        "pages_per_sec": round(pages / crawl_seconds, 2),
+        "agents_per_sec": round(len(agents) / crawl_seconds, 2),
+        "parse_ms_per_page": round(parse_seconds[0] * 1000 / max(1, pages), 3),
+        "export_format": config["format"],
+        "export_seconds": round(export_seconds, 4),
+        "export_bytes": output.stat().st_size,
+        "peak_rss_mib": round(peak_rss_mib(), 1),
+    }
+
+def compare(results: List[Dict[str, Any]], baseline_path: Path, max_regression: float) -> bool:
+    """Print throughput deltas against a baseline; ``False`` on a regression."""
+    baseline = {row["scale"]: row for row in json.loads(baseline_path.read_text())["results"]}
+    ok = True
+    for row in results:
+        before = baseline.get(row["scale"])
+        if before is None:
+            continue
+        change = row["pages_per_sec"] / before["pages_per_sec"] - 1
+        flag = ""
+        if change < -max_regression:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{row['scale']:<10} pages/s {change:+.1%} vs baseline{flag}", file=sys.stderr)
+    return ok
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", default="10x5,50x10,100x10")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--pipelined", action="store_true")
+    parser.add_argument("--format", default="jsonl")
+    parser.add_argument("--output", type=Path, default=None, help="Write JSON here (default: stdout).")
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--max-regression", type=float, default=0.10)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scale(json.loads(args.child))))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales.split(","):
+            zips, pages = (int(part) for part in scale.split("x"))
+            recording = Path(tmp) / f"{scale}.sqlite3"
+            config = {
+                "scale": scale,
+                "recording": str(recording),
+                "zip_codes": build_recording(recording, zips, pages),
+                "latency": args.latency,
+                "error_rate": args.error_rate,
+                "workers": args.workers,
+                "pipelined": args.pipelined,
+                "format": args.format,
+                "output": str(Path(tmp) / f"{scale}.{args.format}"),
+            }
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", json.dumps(config)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            row = json.loads(output.strip().splitlines()[-1])
+            results.append(row)
+            print(
+                f"{scale:<10} {row['requests']:>6} req  {row['pages_per_sec']:>9.1f} pages/s  "
+                f"{row['agents_per_sec']:>10.1f} agents/s  parse {row['parse_ms_per_page']:.2f} ms/page  "
+                f"export {row['export_seconds']:.3f}s  rss {row['peak_rss_mib']:.0f} MiB",
+                file=sys.stderr,
+            )
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "workers": args.workers,
+            "pipelined": args.pipelined,
+            "format": args.format,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline and not compare(results, args.baseline, args.max_regression):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Deterministic page fixtures shared by the benchmark scripts.
+
+Pages mimic the markup ``parse_agents_html`` understands, padded with the
+kind of unrelated navigation/markup noise a real results page carries so
+parse cost is representative.
+"""
+
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+CARD_TEMPLATE = """
+<div class="agent-card" data-testid="agent-card-{zip}-{n}">
+  <div class="card-header"><span class="badge">Top agent</span></div>
+  <a class="agent-name" href="https://www.realtor.com/realestateagents/Agent-{n}_City_CA_{zip}_{n}">Agent {zip}-{n}, Agent</a>
+  <span class="listing-count">Listings: {listings}</span>
+  <span class="sold-count">Sold: {sold}</span>
+  <span class="office-phone">(310) 270-{n:04d}</span>
+  <span class="mobile-phone">(310) 279-{n:04d}, (310) 633-{n:04d}</span>
+  <span class="areas-serviced">
+    Los Angeles, Beverly Hills, Malibu, Santa Monica, West Hollywood,
+    Venice, Marina del Rey, Pacific Palisades, Brentwood, Bel Air,
+  </span>
+  <span class="zip-codes">{zip}, 90068, 90210, 90265, 90402</span>
+  <span class="office-name">Office {office}</span>
+  <a class="company-website" href="https://office{office}.example.com">Company</a>
+  <span class="review-count">{reviews} reviews</span>
+  <img class="agent-photo" src="https://ap.rdcpix.com/{n}/photo.jpg"/>
+  <a href="mailto:agent{n}@example.com">agent{n}@example.com</a>
+  <ul class="card-footer">{footer}</ul>
+</div>
+"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><title>Agents in {zip}</title>{styles}</head>
+<body><nav>{nav}</nav><main><div class="results">{cards}</div></main>
+<footer>{nav}</footer></body></html>
+"""
+
+def build_page(zip_code: str, page_number: int, cards: int = 20) -> str:
+    """Render one deterministic results page; ``cards=0`` renders an empty page."""
+    nav = "".join(f'<a href="/nav/{i}">Link {i}</a>' for i in range(40))
+    styles = "".join(f"<style>.c{i}{{color:#{i:06x}}}</style>" for i in range(20))
+    footer = "".join(f"<li>Tag {i}</li>" for i in range(5))
+    rendered = []
+    for i in range(cards):
+        n = page_number * 100 + i
+        rendered.append(
+            CARD_TEMPLATE.format(
+                zip=zip_code,
+                n=n,
+                listings=n % 17,
+                sold=n % 53,
+                office=n % 7,
+                reviews=n % 11,
+                footer=footer,
+            )
+        )
+    return PAGE_TEMPLATE.format(
+        zip=zip_code, styles=styles, nav=nav, cards="".join(rendered)
+    )
+
+def peak_rss_mib() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+def build_agents(count: int) -> Iterator[Dict[str, Any]]:
+    """Yield ``count`` deterministic normalized agents (export benchmarks)."""
+    for n in range(count):
+        zip_code = str(90000 + n % 500)
+        yield {
+            "Agent name": f"Agent {zip_code}-{n}, Agent",
+            "Website": f"https://www.realtor.com/realestateagents/Agent-{n}_City_CA_{zip_code}_{n}",
+            "Email": f"agent{n}@example.com",
+            "Listing count": n % 17,
+            "Sold count": n % 53,
+            "Office Phone": f"(310) 270-{n % 10000:04d}",
+            "Mobile Phones": f"(310) 279-{n % 10000:04d}, (310) 633-{n % 10000:04d}",
+            "Areas serviced": "Los Angeles, Beverly Hills, Malibu, Santa Monica, Brentwood",
+            "Zip codes serviced": f"{zip_code}, 90068, 90210, 90265, 90402",
+            "Office / Company name": f"Office {n % 7}",
+            "Company Website": f"https://office{n % 7}.example.com",
+            "Review count": n % 11,
+            "Agent Photo": f"https://ap.rdcpix.com/{n}/photo.jpg",
+        }
+
+def build_raw_agents(count: int) -> Iterator[Dict[str, Any]]:
+    """Yield raw parser-shaped agents whose offices, areas and zips repeat."""
+    for n in range(count):
+        zip_code = str(90000 + n % 500)
+        office = n % 2000
+        yield {
+            "name": f"Agent {n}",
+            "profile_url": f"https://www.realtor.com/realestateagents/Agent-{n}_City_CA_{office}_{n}",
+            "email": f"agent{n}@example.com",
+            "listing_count": n % 17,
+            "sold_count": n % 53,
+            "office_phone": f"(310) 270-{office:04d}",
+            "mobile_phones_raw": f"(310) 279-{n % 10000:04d}",
+            "areas_serviced_raw": f"Los Angeles, Area {n % 300}",
+            "zip_codes_serviced_raw": f"{zip_code}, 90068, 90210",
+            "office_name": f"Office {office}",
+            "company_website": f"https://office{office}.example.com",
+            "review_count": n % 11,
+            "photo_url": f"https://ap.rdcpix.com/{n}/photo.jpg",
+            "zip_code_context": zip_code,
+        }
+
+class FixtureResponse:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.status_code = 200
+        self.headers: Dict[str, str] = {"Content-Type": "text/html; charset=utf-8"}
+        self.encoding = "utf-8"
+
+    def raise_for_status(self) -> None:
+        pass
+
+class FixtureSession:
+    """
+    ``requests.Session`` stand-in serving :func:`build_page` output with a
+    fixed simulated network latency.
+    """
+
+    def __init__(self, pages_per_zip: int, latency: float = 0.0, cards: int = 20) -> None:
+        self.pages_per_zip = pages_per_zip
+        self.latency = latency
+        self.cards = cards
+        self.requests = 0
+        self._cache: Dict[Any, str] = {}
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any) -> FixtureResponse:
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        parts = url.rstrip("/").split("/")
+        if parts[-1].startswith("pg-"):
+            page_number = int(parts[-1][3:])
+            zip_code = parts[-2]
+        else:
+            page_number = 1
+            zip_code = parts[-1]
+        cards = self.cards if page_number <= self.pages_per_zip else 0
+        key = (zip_code, page_number, cards)
+        if key not in self._cache:
+            self._cache[key] = build_page(zip_code, page_number, cards)
+        return FixtureResponse(self._cache[key])
@@ -0,0 +1,120 @@
+import hashlib
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+# Realtor profile URLs end in "<Name>_<City>_<ST>_<office id>_<agent id>".
+_PROFILE_ID = re.compile(r"_(\d+)_(\d+)/?$")
+_NON_DIGITS = re.compile(r"\D+")
+
+UNION_FIELDS = ("Zip codes serviced", "Areas serviced", "Mobile Phones")
+MAX_FIELDS = ("Listing count", "Sold count", "Review count")
+
+def agent_identity(agent: Dict[str, Any]) -> str:
+    """
+    Stable identity of a normalized agent.
+
+    The profile URL id is preferred; agents without a profile link fall back
+    to their normalized name, office and phone.
+    """
+    website = (agent.get("Website") or "").strip()
+    if website:
+        parts = urlsplit(website)
+        path = parts.path.rstrip("/")
+        match = _PROFILE_ID.search(path)
+        if match:
+            return f"id:{match.group(1)}_{match.group(2)}"
+        return f"url:{parts.netloc.lower()}{path}"
+
+    name = " ".join((agent.get("Agent name") or "").lower().split())
+    office = " ".join((agent.get("Office / Company name") or "").lower().split())
+    phone = _NON_DIGITS.sub("", agent.get("Office Phone") or "")
+    return f"nop:{name}|{office}|{phone}"
+
+def _split(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+def _union(current: Optional[str], incoming: Optional[str]) -> Optional[str]:
+    """Comma-list union in first-seen order; ``current`` is kept verbatim if nothing is new."""
+    existing = _split(current)
+    seen = set(existing)
+    added = [part for part in _split(incoming) if part not in seen and not seen.add(part)]
+    if not added:
+        return current
+    return ", ".join(existing + added)
+
+class AgentDedupIndex:
+    """
+    Merges agents that appear under several zip codes into one record.
+
+    Each agent is keyed by an 8-byte digest of :func:`agent_identity`, so the
+    index costs one small bytes object and a list slot per unique agent on
+    top of the records themselves. Duplicates are merged in place as they
+    arrive: comma lists (zips, areas, phones) are unioned, counts keep the
+    maximum and empty fields are filled from later occurrences. Iterating
+    the index yields the merged agents in first-seen order.
+    """
+
+    def __init__(self) -> None:
+        self._positions: Dict[bytes, int] = {}
+        self._agents: List[Dict[str, Any]] = []
+        self.stats: Dict[str, int] = {"seen": 0, "unique": 0, "duplicates": 0, "merged": 0}
+
+    @staticmethod
+    def _key(agent: Dict[str, Any]) -> bytes:
+        return hashlib.blake2b(agent_identity(agent).encode("utf-8"), digest_size=8).digest()
+
+    def add(self, agent: Dict[str, Any]) -> bool:
+        """Index ``agent``; return ``True`` if it was not seen before."""
+        self.stats["seen"] += 1
+        key = self._key(agent)
+        position = self._positions.get(key)
+        if position is None:
+            self._positions[key] = len(self._agents)
+            self._agents.append(agent.copy())
+            self.stats["unique"] += 1
+            return True
+
+        self.stats["duplicates"] += 1
+        if self._merge(self._agents[position], agent):
+            self.stats["merged"] += 1
+        return False
+
+    def add_all(self, agents: Iterable[Dict[str, Any]]) -> None:
+        for agent in agents:
+            self.add(agent)
+
+    @staticmethod
+    def _merge(target: Dict[str, Any], incoming: Dict[str, Any]) -> bool:
+        changed = False
+        for field in UNION_FIELDS:
+            merged = _union(target.get(field), incoming.get(field))
+            if merged is not target.get(field):
+                target[field] = merged
+                changed = True
+        for field in MAX_FIELDS:
+            value = incoming.get(field) or 0
+            if value > (target.get(field) or 0):
+                target[field] = value
+                changed = True
+        for field, value in incoming.items():
+            if value not in (None, "") and target.get(field) in (None, ""):
+                target[field] = value
+                changed = True
+        return changed
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._agents)
+
+    def summary(self) -> str:
+        s = self.stats
+        ratio = s["duplicates"] / s["seen"] if s["seen"] else 0.0
+        return (
+            f"seen={s['seen']} unique={s['unique']} duplicates={s['duplicates']} "
+            f"({ratio:.0%}) merged={s['merged']}"
+        )
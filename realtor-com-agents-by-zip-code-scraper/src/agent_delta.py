@@ -0,0 +1,67 @@
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+from agent_dedup import agent_identity
+
+class ChangesetBuilder:
+    """
+    Diffs the agents of a run against the previous snapshot.
+
+    ``previous`` yields ``(zip, agent)`` pairs from the snapshot store;
+    :meth:`track` passes the current run's agents through unchanged while
+    recording additions and updates (keyed by :func:`agent_identity`, first
+    occurrence wins on both sides). An agent only counts as removed when
+    every zip it used to appear under was crawled to completion this run.
+    """
+
+    def __init__(self, previous: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        self._previous: Dict[str, Dict[str, Any]] = {}
+        self._previous_zips: Dict[str, Set[str]] = {}
+        for zip_code, agent in previous:
+            identity = agent_identity(agent)
+            self._previous.setdefault(identity, agent)
+            self._previous_zips.setdefault(identity, set()).add(zip_code)
+        self._seen: Set[str] = set()
+        self.added: List[Dict[str, Any]] = []
+        self.updated: List[Dict[str, Any]] = []
+
+    def observe(self, agent: Dict[str, Any]) -> None:
+        identity = agent_identity(agent)
+        if identity in self._seen:
+            return
+        self._seen.add(identity)
+        before = self._previous.get(identity)
+        if before is None:
+            self.added.append(agent)
+            return
+        changes = {
+            field: {"old": before.get(field), "new": value}
+            for field, value in agent.items()
+            if before.get(field) != value
+        }
+        if changes:
+            self.updated.append(
+                {"identity": identity, "Agent name": agent.get("Agent name"), "changes": changes}
+            )
+
+    def track(self, agents: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for agent in agents:
+            self.observe(agent)
+            yield agent
+
+    def build(self, refreshed_zips: Iterable[str]) -> Dict[str, Any]:
+        refreshed = set(refreshed_zips)
+        removed = [
+            agent
+            for identity, agent in self._previous.items()
+            if identity not in self._seen and self._previous_zips[identity] <= refreshed
+        ]
+        return {
+            "summary": {
+                "added": len(self.added),
+                "updated": len(self.updated),
+                "removed": len(removed),
+            },
+            "added": self.added,
+            "updated": self.updated,
+            "removed": removed,
+        }
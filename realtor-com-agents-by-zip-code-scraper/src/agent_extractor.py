@@ -1,46 +1,471 @@
-from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from parsers.agent_normalizer import AgentNormalizer
+from storage.snapshot_store import page_fingerprint
+from utils.metrics import NULL_METRICS
+from utils.retry import FailedUnit, FetchError, summarize_failures
 
 class AgentExtractor:
     """
     High-level orchestrator that calls the Realtor client and normalizes output
     into the final agent schema.
+
+    With ``workers > 1`` zip codes are fetched concurrently on a thread pool.
+    Results are still consumed in input order, so the output (and the effect
+    of ``trial_limit``) is identical to a sequential run.
+    :meth:`iter_agents` streams the same results without materializing them,
+    and :meth:`extract_for_zip_codes_async` offers the same contract for an
+    async client such as ``AsyncRealtorClient``.
+
+    When a ``journal`` (``CheckpointJournal``) is given, every normalized
+    page is persisted as soon as it is fetched; zips or pages already in the
+    journal are replayed from disk instead of being fetched again.
+
+    A zip whose page fetch raises :class:`FetchError` keeps the pages
+    fetched so far and is recorded in :attr:`failures` rather than being
+    treated as finished; the crawl moves on to the next zip.
+
+    With a ``snapshot`` (``SnapshotStore``) the crawl is incremental: page 1
+    of each zip is fetched first and, when its fingerprint matches the
+    previous run, the stored agents are replayed instead of fetching the
+    remaining pages. Zips crawled to the end are written back to the store.
+
+    With a ``scheduler`` (``ZipScheduler``) zips are not crawled in input
+    order: the scheduler picks each next zip from the agents seen so far and
+    may cap how many of its agents are fetched or stop before every zip has
+    been crawled. Pages are yielded as zips complete.
     """
 
-    def __init__(self, client: Any, logger: Any) -> None:
+    def __init__(
+        self,
+        client: Any,
+        logger: Any,
+        workers: int = 1,
+        journal: Optional[Any] = None,
+        snapshot: Optional[Any] = None,
+        metrics: Any = NULL_METRICS,
+        scheduler: Optional[Any] = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
         self.client = client
         self.logger = logger
+        self.workers = workers
+        self.journal = journal
+        self.snapshot = snapshot
+        self.metrics = metrics
+        self.scheduler = scheduler
+        self.normalizer = AgentNormalizer()
+        self.failures: List[FailedUnit] = []
+        self._stats_lock = threading.Lock()
+        # Zips whose agents are complete for this run (delta mode only).
+        self.refreshed_zips: Set[str] = set()
+        self.delta_stats: Dict[str, int] = {"unchanged": 0, "changed": 0}
+
+    def _iter_raw_pages(
+        self, zip_code: str, max_per_zip: Optional[int], start_page: int
+    ) -> Iterator[List[Dict[str, Any]]]:
+        iter_pages = getattr(self.client, "iter_agent_pages", None)
+        if iter_pages is None:
+            yield self.client.search_agents_by_zip(
+                zip_code=zip_code,
+                max_records=max_per_zip,
+            )
+            return
+        if start_page > 1:
+            yield from iter_pages(
+                zip_code=zip_code, max_records=max_per_zip, start_page=start_page
+            )
+        else:
+            yield from iter_pages(zip_code=zip_code, max_records=max_per_zip)
+
+    def _normalize_page(self, raw_agents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not self.metrics.enabled:
+            return self.normalizer.normalize_batch(raw_agents)
+        with self.metrics.timer("normalize_seconds"), self.metrics.stage("normalize"):
+            return self.normalizer.normalize_batch(raw_agents)
+
+    def _iter_zip_pages(
+        self, zip_code: str, max_per_zip: Optional[int]
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield normalized pages for one zip, resuming from the journal."""
+        journal = self.journal
+        start_page = 1
+        if journal is not None:
+            if journal.is_zip_complete(zip_code):
+                self.logger.info("Zip code %s already completed, replaying checkpoint", zip_code)
+                yield from journal.iter_pages(zip_code)
+                return
+            replayed = 0
+            for page_agents in journal.iter_pages(zip_code):
+                replayed += len(page_agents)
+                yield page_agents
+            start_page = journal.next_page(zip_code)
+            if max_per_zip is not None:
+                max_per_zip = max_per_zip - replayed
+                if max_per_zip <= 0:
+                    journal.record_zip_complete(zip_code)
+                    return
+
+        self.logger.info("Processing zip code %s", zip_code)
+        page_number = start_page
+        raw_pages = self._iter_raw_pages(zip_code, max_per_zip, start_page)
+        if self.snapshot is not None and start_page == 1 and max_per_zip is None:
+            pages = self._iter_delta_pages(zip_code, raw_pages)
+        else:
+            pages = (self._normalize_page(raw_agents) for raw_agents in raw_pages)
+        fetched = 0
+        try:
+            for page_agents in pages:
+                if journal is not None:
+                    journal.record_page(zip_code, page_number, page_agents)
+                fetched += len(page_agents)
+                yield page_agents
+                page_number += 1
+        except FetchError as exc:
+            # Keep what was fetched, but leave the zip incomplete in the
+            # journal so --resume retries it from the failed page.
+            self._record_failure(zip_code, page_number, exc)
+            return
+
+        # Only reached when the zip was walked to the end (not when the
+        # consumer stopped early, e.g. on the trial limit).
+        self.metrics.observe("agents_per_zip", fetched)
+        if journal is not None:
+            journal.record_zip_complete(zip_code)
+
+    def _iter_delta_pages(
+        self, zip_code: str, raw_pages: Iterator[List[Dict[str, Any]]]
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Normalize a zip's pages, short-circuiting when page 1 is unchanged."""
+        raw_first = next(raw_pages, None)
+        first = self._normalize_page(raw_first) if raw_first is not None else []
+        fingerprint = page_fingerprint(first)
+        if fingerprint == self.snapshot.fingerprint(zip_code):
+            # Stops (and for a pipelined client cancels) the remaining fetches.
+            raw_pages.close()
+            self.logger.info("Zip code %s unchanged since last run, reusing snapshot", zip_code)
+            with self._stats_lock:
+                self.delta_stats["unchanged"] += 1
+                self.refreshed_zips.add(zip_code)
+            yield self.snapshot.agents(zip_code)
+            return
+
+        collected = list(first)
+        if raw_first is not None:
+            yield first
+        for raw_agents in raw_pages:
+            page_agents = self._normalize_page(raw_agents)
+            collected.extend(page_agents)
+            yield page_agents
+        self.snapshot.replace_zip(zip_code, fingerprint, collected)
+        with self._stats_lock:
+            self.delta_stats["changed"] += 1
+            self.refreshed_zips.add(zip_code)
+
+    def _record_failure(self, zip_code: str, page_number: int, exc: FetchError) -> None:
+        unit = FailedUnit(
+            zip_code=zip_code,
+            page_number=exc.page_number if exc.page_number is not None else page_number,
+            error=exc.message,
+            status_code=exc.status_code,
+            retryable=exc.retryable,
+            attempts=exc.attempts,
+        )
+        with self._stats_lock:
+            self.failures.append(unit)
+        self.logger.warning(
+            "Zip code %s failed at page %s after %d attempt(s): %s",
+            zip_code,
+            unit.page_number,
+            unit.attempts,
+            unit.error,
+        )
+
+    def failure_summary(self) -> Dict[str, Any]:
+        """Structured report of the units that could not be fetched."""
+        with self._stats_lock:
+            failures = list(self.failures)
+        return summarize_failures(failures)
+
+    def _fetch_zip_pages(
+        self, zip_code: str, max_per_zip: Optional[int]
+    ) -> List[List[Dict[str, Any]]]:
+        return list(self._iter_zip_pages(zip_code, max_per_zip))
+
+    def _iter_zip_results(
+        self,
+        zip_codes: List[str],
+        max_per_zip: Optional[int],
+        workers: int,
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """Yield ``(zip_code, normalized_page_agents)`` pairs in input order."""
+        if workers <= 1:
+            # Sequential mode streams page by page straight from the client.
+            for zip_code in zip_codes:
+                for page_agents in self._iter_zip_pages(zip_code, max_per_zip):
+                    yield zip_code, page_agents
+            return
+
+        # Keep a bounded window of in-flight zips so a slow zip at the head of
+        # the queue does not idle the pool, while closing the generator early
+        # (e.g. trial limit reached) wastes at most one window of requests.
+        window = workers * 2
+        executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="zip-worker"
+        )
+        pending: Deque[Tuple[str, "Future[List[List[Dict[str, Any]]]]"]] = deque()
+        zip_iter = iter(zip_codes)
+        try:
+            for zip_code in zip_iter:
+                pending.append(
+                    (zip_code, executor.submit(self._fetch_zip_pages, zip_code, max_per_zip))
+                )
+                if len(pending) >= window:
+                    break
+
+            while pending:
+                zip_code, future = pending.popleft()
+                pages = future.result()
+                next_zip = next(zip_iter, None)
+                if next_zip is not None:
+                    pending.append(
+                        (next_zip, executor.submit(self._fetch_zip_pages, next_zip, max_per_zip))
+                    )
+                for page_agents in pages:
+                    yield zip_code, page_agents
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _iter_scheduled_results(
+        self,
+        zip_codes: List[str],
+        max_per_zip: Optional[int],
+        workers: int,
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Yield ``(zip_code, normalized_page_agents)`` pairs in scheduler order.
+
+        With several workers a zip's pages are yielded when it completes, so
+        the order of zips (and, in budget mode, which of them fit) depends on
+        response timing and may differ between runs.
+        """
+        scheduler = self.scheduler
+        scheduler.add(zip_codes)
+
+        def limit(assignment: Any) -> Optional[int]:
+            if assignment.max_records is None:
+                return max_per_zip
+            if max_per_zip is None:
+                return assignment.max_records
+            return min(max_per_zip, assignment.max_records)
+
+        def assigned_pages(assignment: Any) -> Iterator[List[Dict[str, Any]]]:
+            pages = self._iter_zip_pages(assignment.zip_code, limit(assignment))
+            try:
+                # The page cap also holds before the page size is known.
+                yield from itertools.islice(pages, assignment.max_pages)
+            finally:
+                pages.close()
+
+        if workers <= 1:
+            while True:
+                assignment = scheduler.next_zip()
+                if assignment is None:
+                    return
+                fetched = 0
+                for page_agents in assigned_pages(assignment):
+                    scheduler.record_page(page_agents)
+                    fetched += len(page_agents)
+                    yield assignment.zip_code, page_agents
+                scheduler.finish_zip(assignment, fetched)
+
+        # Only ``workers`` zips are in flight so every pick sees the agents
+        # of all zips completed before it.
+        executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="zip-worker"
+        )
+        in_flight: Dict["Future[List[List[Dict[str, Any]]]]", Any] = {}
+
+        def submit() -> bool:
+            assignment = scheduler.next_zip()
+            if assignment is None:
+                return False
+            future = executor.submit(list, assigned_pages(assignment))
+            in_flight[future] = assignment
+            return True
+
+        try:
+            while len(in_flight) < workers and submit():
+                pass
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in sorted(done, key=lambda f: in_flight[f].zip_code):
+                    assignment = in_flight.pop(future)
+                    pages = future.result()
+                    for page_agents in pages:
+                        scheduler.record_page(page_agents)
+                    scheduler.finish_zip(assignment, sum(len(page) for page in pages))
+                    while len(in_flight) < workers and submit():
+                        pass
+                    for page_agents in pages:
+                        yield assignment.zip_code, page_agents
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def iter_agents(
+        self,
+        zip_codes: Iterable[str],
+        max_per_zip: Optional[int] = None,
+        trial_limit: Optional[int] = None,
+        workers: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream normalized agents as pages arrive (fetch -> parse -> normalize).
+
+        In sequential mode at most one page of agents is held at a time; with
+        a worker pool the bound is the in-flight window of zips.
+        """
+        zip_list = list(zip_codes)
+        pool_size = workers if workers is not None else self.workers
+
+        remaining_trial = trial_limit
+        if remaining_trial is not None and remaining_trial <= 0:
+            if zip_list:
+                self.logger.info(
+                    "Trial limit reached, stopping before zip %s", zip_list[0]
+                )
+            return
+
+        emitted = 0
+        if self.scheduler is not None:
+            results = self._iter_scheduled_results(zip_list, max_per_zip, pool_size)
+        else:
+            results = self._iter_zip_results(zip_list, max_per_zip, pool_size)
+        try:
+            for zip_code, page_agents in results:
+                for agent in page_agents:
+                    yield agent
+                    emitted += 1
+                    if remaining_trial is not None:
+                        remaining_trial -= 1
+                        if remaining_trial <= 0:
+                            self.logger.info(
+                                "Trial limit reached after zip %s (%d agents total)",
+                                zip_code,
+                                emitted,
+                            )
+                            return
+        finally:
+            results.close()
 
     def extract_for_zip_codes(
         self,
         zip_codes: Iterable[str],
         max_per_zip: Optional[int] = None,
         trial_limit: Optional[int] = None,
+        workers: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        return list(
+            self.iter_agents(
+                zip_codes,
+                max_per_zip=max_per_zip,
+                trial_limit=trial_limit,
+                workers=workers,
+            )
+        )
+
+    async def _search_zip_async(
+        self,
+        zip_code: str,
+        max_per_zip: Optional[int],
+        semaphore: asyncio.Semaphore,
+    ) -> List[Dict[str, Any]]:
+        async with semaphore:
+            self.logger.info("Processing zip code %s", zip_code)
+            iter_pages = getattr(self.client, "iter_agent_pages", None)
+            if iter_pages is None:
+                try:
+                    return await self.client.search_agents_by_zip(
+                        zip_code=zip_code,
+                        max_records=max_per_zip,
+                    )
+                except FetchError as exc:
+                    self._record_failure(zip_code, 1, exc)
+                    return []
+            agents: List[Dict[str, Any]] = []
+            page_number = 1
+            try:
+                async for page_agents in iter_pages(zip_code=zip_code, max_records=max_per_zip):
+                    agents.extend(page_agents)
+                    page_number += 1
+            except FetchError as exc:
+                # Like the sync crawl: keep the pages fetched so far.
+                self._record_failure(zip_code, page_number, exc)
+            return agents
+
+    async def extract_for_zip_codes_async(
+        self,
+        zip_codes: Iterable[str],
+        max_per_zip: Optional[int] = None,
+        trial_limit: Optional[int] = None,
+        concurrency: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
+        """
+        Async variant of :meth:`extract_for_zip_codes` for clients whose
+        ``search_agents_by_zip`` is a coroutine (and ``iter_agent_pages`` an
+        async generator, if present). Up to ``concurrency`` zips are in
+        flight at once; output order matches the input order. Zips that fail
+        are recorded in :attr:`failures` like in the sync crawl.
+        """
         all_agents: List[Dict[str, Any]] = []
-        normalizer = AgentNormalizer()
+        zip_list = list(zip_codes)
+        limit = concurrency if concurrency is not None else self.workers
+        semaphore = asyncio.Semaphore(max(1, limit))
 
         remaining_trial = trial_limit
-
-        for zip_code in zip_codes:
-            if remaining_trial is not None and remaining_trial <= 0:
+        if remaining_trial is not None and remaining_trial <= 0:
+            if zip_list:
                 self.logger.info(
-                    "Trial limit reached, stopping before zip %s", zip_code
+                    "Trial limit reached, stopping before zip %s", zip_list[0]
                 )
-                break
+            return all_agents
 
-            self.logger.info("Processing zip code %s", zip_code)
-            raw_agents = self.client.search_agents_by_zip(
-                zip_code=zip_code,
-                max_records=max_per_zip,
+        window = max(1, limit) * 2
+        zip_iter = iter(zip_list)
+        pending: Deque[Tuple[str, "asyncio.Task[List[Dict[str, Any]]]"]] = deque()
+
+        def schedule(zip_code: str) -> None:
+            task = asyncio.ensure_future(
+                self._search_zip_async(zip_code, max_per_zip, semaphore)
             )
+            pending.append((zip_code, task))
 
-            for raw in raw_agents:
-                normalized = normalizer.normalize(raw)
-                all_agents.append(normalized)
+        try:
+            for zip_code in zip_iter:
+                schedule(zip_code)
+                if len(pending) >= window:
+                    break
+
+            while pending:
+                zip_code, task = pending.popleft()
+                raw_agents = await task
+                next_zip = next(zip_iter, None)
+                if next_zip is not None:
+                    schedule(next_zip)
+
+                # A whole zip is normalized as one batch.
+                self.metrics.observe("agents_per_zip", len(raw_agents))
                 if remaining_trial is not None:
-                    remaining_trial -= 1
+                    raw_agents = raw_agents[:remaining_trial]
+                all_agents.extend(self._normalize_page(raw_agents))
+                if remaining_trial is not None:
+                    remaining_trial -= len(raw_agents)
                     if remaining_trial <= 0:
                         self.logger.info(
                             "Trial limit reached after zip %s (%d agents total)",
@@ -48,5 +473,12 @@ class AgentExtractor:
                             len(all_agents),
                         )
                         return all_agents
+        finally:
+            for _, task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(
+                    *(task for _, task in pending), return_exceptions=True
+                )
 
-        return all_agents
\ No newline at end of file
+        return all_agents
@@ -0,0 +1,257 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from pagination_manager import PaginationManager
+from parsers.html_parser import parse_agents_page
+from realtor_client import build_cookies, build_headers, build_page_url
+from utils.rate_limiter import parse_retry_after
+from utils.retry import (
+    END_OF_RESULTS_STATUS_CODES,
+    REQUEST_BUDGET_EXHAUSTED,
+    FetchError,
+    RetryPolicy,
+    is_retryable_status,
+)
+
+@dataclass
+class AsyncRealtorClient:
+    """
+    asyncio sibling of :class:`RealtorClient` backed by a pooled aiohttp
+    session.
+
+    Use it as an async context manager (or call :meth:`aclose`) so the
+    connection pool is released. Connections are kept alive between pages and
+    capped both globally and per host.
+
+    Failures are handled like :class:`RealtorClient`: 404/410 end a zip's
+    results, transport errors and retryable statuses are retried per
+    ``retry_policy`` (within ``retry_budget``), and anything else raises
+    :class:`FetchError` instead of passing for an empty page.
+    """
+
+    base_url: str
+    rate_limiter: Optional[Any] = None
+    session: Optional[aiohttp.ClientSession] = None
+    user_agent: Optional[str] = None
+    cookie: Optional[str] = None
+    logger: Optional[Any] = None
+    timeout: float = 15.0
+    max_connections: int = 100
+    max_connections_per_host: int = 10
+    keepalive_timeout: float = 30.0
+    parser_backend: Optional[str] = None
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy)
+    retry_budget: Optional[Any] = None
+    circuit_breaker: Optional[Any] = None
+    request_budget: Optional[Any] = None
+
+    def __post_init__(self) -> None:
+        self._owns_session = self.session is None
+        self.pagination = PaginationManager()
+        self.parse_strategy_counts: Dict[str, int] = {}
+        self.retry_count = 0
+        if self.logger is None:
+            # Lazy import to avoid circular dependency
+            from utils.logger import get_logger
+
+            self.logger = get_logger(self.__class__.__name__)
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                cookies=build_cookies(self.cookie),
+            )
+        return self.session
+
+    async def __aenter__(self) -> "AsyncRealtorClient":
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self.session is not None and self._owns_session:
+            await self.session.close()
+            self.session = None
+
+    async def _fetch_page(self, zip_code: str, page_number: int) -> str:
+        url = build_page_url(self.base_url, zip_code, page_number)
+
+        if self.logger:
+            self.logger.debug("Fetching URL %s (page %d)", url, page_number)
+
+        host = urlsplit(url).netloc
+        attempt = 1
+        while True:
+            if self.circuit_breaker is not None:
+                # The breaker pauses by sleeping; keep the event loop running.
+                await asyncio.to_thread(self.circuit_breaker.before_request)
+            if self.rate_limiter:
+                if hasattr(self.rate_limiter, "acquire"):
+                    await self.rate_limiter.acquire(host)
+                else:
+                    await self.rate_limiter.wait()
+            if self.request_budget is not None and not self.request_budget.try_consume():
+                raise FetchError(
+                    url,
+                    REQUEST_BUDGET_EXHAUSTED,
+                    retryable=False,
+                    zip_code=zip_code,
+                    page_number=page_number,
+                    attempts=attempt,
+                )
+
+            try:
+                page = await self._request_page(url, host)
+            except FetchError as exc:
+                exc.zip_code = zip_code
+                exc.page_number = page_number
+                exc.attempts = attempt
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record(False)
+                if (
+                    not exc.retryable
+                    or attempt >= self.retry_policy.max_attempts
+                    or (self.retry_budget is not None and not self.retry_budget.try_consume())
+                ):
+                    if self.logger:
+                        self.logger.warning(
+                            "Giving up on %s after %d attempt(s): %s", url, attempt, exc.message
+                        )
+                    raise
+                delay = self.retry_policy.delay_for(attempt, exc.retry_after)
+                if self.logger:
+                    self.logger.warning(
+                        "Request error for %s: %s; retry %d/%d in %.1fs",
+                        url,
+                        exc.message,
+                        attempt,
+                        self.retry_policy.max_attempts - 1,
+                        delay,
+                    )
+                self.retry_count += 1
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record(True)
+            return page
+
+    async def _request_page(self, url: str, host: str) -> str:
+        """Issue one GET; classify failures as retryable or fatal."""
+        session = self._ensure_session()
+        try:
+            async with session.get(url, headers=build_headers(self.user_agent)) as response:
+                record = getattr(self.rate_limiter, "record_response", None)
+                if record is not None:
+                    record(response.status, response.headers.get("Retry-After"), host=host)
+                status = response.status
+                if status in END_OF_RESULTS_STATUS_CODES:
+                    if self.logger:
+                        self.logger.debug("No page at %s (HTTP %d)", url, status)
+                    return ""
+                if status >= 400:
+                    raise FetchError(
+                        url,
+                        f"HTTP {status}",
+                        retryable=is_retryable_status(status),
+                        status_code=status,
+                        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                    )
+                return await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            raise FetchError(url, str(exc) or type(exc).__name__, retryable=True) from exc
+
+    async def iter_agent_pages(
+        self, zip_code: str, max_records: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield the raw agents of a zip code one page at a time. A page that
+        cannot be fetched raises :class:`FetchError` after the pages before
+        it have been yielded.
+        """
+        total_agents = 0
+        page_number = 1
+        last_page: Optional[int] = None
+
+        while True:
+            html = await self._fetch_page(zip_code, page_number)
+            if not html:
+                break
+
+            # Parsing is CPU-bound; keep the event loop free for sockets.
+            result = await asyncio.to_thread(
+                parse_agents_page, html, zip_code, self.parser_backend
+            )
+            self.parse_strategy_counts[result.strategy] = (
+                self.parse_strategy_counts.get(result.strategy, 0) + 1
+            )
+            if self.logger:
+                self.logger.debug(
+                    "Parsed page %d for zip %s via %s (%d agents)",
+                    page_number,
+                    zip_code,
+                    result.strategy,
+                    len(result.agents),
+                )
+            page_agents = result.agents
+            if not page_agents:
+                if self.logger:
+                    self.logger.debug(
+                        "No agents found on page %d for zip %s", page_number, zip_code
+                    )
+                break
+
+            if page_number == 1:
+                # Stop at the advertised last page instead of fetching an
+                # empty trailing one.
+                last_page = self.pagination.plan_last_page(
+                    result.total_count, result.page_size or len(page_agents)
+                )
+
+            if max_records is not None and total_agents + len(page_agents) >= max_records:
+                page_agents = page_agents[: max_records - total_agents]
+                total_agents += len(page_agents)
+                yield page_agents
+                break
+
+            total_agents += len(page_agents)
+            yield page_agents
+
+            if not self.pagination.should_continue(
+                page_number=page_number,
+                agents_on_page=len(page_agents),
+                total_agents=total_agents,
+                max_agents=max_records,
+                last_page=last_page,
+            ):
+                break
+
+            page_number += 1
+
+        if self.logger:
+            self.logger.info(
+                "Fetched %d raw agents for zip %s", total_agents, zip_code
+            )
+
+    async def search_agents_by_zip(
+        self, zip_code: str, max_records: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Fetch and parse agents for a single zip code."""
+        agents: List[Dict[str, Any]] = []
+        async for page_agents in self.iter_agent_pages(zip_code, max_records=max_records):
+            agents.extend(page_agents)
+        return agents
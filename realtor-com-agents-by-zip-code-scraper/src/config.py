@@ -10,20 +10,138 @@ from dotenv import load_dotenv
 class Settings:
     base_url: str = "https://www.realtor.com/realestateagents"
     rate_limit_rpm: int = 30
+    rate_limit_burst: int = 1
+    rate_limit_adaptive: bool = True
     user_agent: Optional[str] = None
     cookie: Optional[str] = None
     trial_limit: Optional[int] = None
     output_dir: Path = Path("data")
+    workers: int = 1
+    max_connections_per_host: int = 10
+    pipelined: bool = False
+    page_fanout: int = 1
+    parse_processes: int = 0
+    parser_backend: str = "html.parser"
+    dedup: bool = False
+    snapshot_path: Path = Path("data/snapshot.sqlite3")
+    response_cache_path: Optional[Path] = None
+    response_cache_ttl_seconds: int = 24 * 3600
+    response_cache_max_mb: int = 512
+    parse_cache_path: Optional[Path] = None
+    parse_cache_entries: int = 4096
+    parse_cache_max_mb: int = 256
+    retry_max_attempts: int = 4
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 60.0
+    retry_budget: Optional[int] = None
+    breaker_error_rate: float = 0.5
+    breaker_window: int = 20
+    breaker_cooldown_seconds: float = 60.0
+    processes: int = 1
+    request_budget: Optional[int] = None
+    work_queue_path: Optional[Path] = None
+    lease_seconds: float = 300.0
+    record_path: Optional[Path] = None
+    replay_path: Optional[Path] = None
+    replay_latency: float = 0.0
+    replay_jitter: float = 0.0
+    replay_error_rate: float = 0.0
+    stream_pages: bool = False
+    identities_path: Optional[Path] = None
+    identity_quarantine_seconds: float = 600.0
+    identity_block_threshold: int = 2
+    identity_empty_threshold: int = 3
+    schedule_zips: bool = False
+    schedule_saturation: float = 0.8
+    schedule_saturated_pages: Optional[int] = None
+    schedule_deadline_seconds: Optional[float] = None
+    metrics_port: Optional[int] = None
+    metrics_json_path: Optional[Path] = None
+    metrics_interval: float = 10.0
 
     @classmethod
     def from_dict(cls, data: dict) -> "Settings":
         return cls(
             base_url=data.get("base_url", cls.base_url),
             rate_limit_rpm=int(data.get("rate_limit_rpm", cls.rate_limit_rpm)),
+            rate_limit_burst=int(data.get("rate_limit_burst", cls.rate_limit_burst)),
+            rate_limit_adaptive=bool(
+                data.get("rate_limit_adaptive", cls.rate_limit_adaptive)
+            ),
             user_agent=data.get("user_agent"),
             cookie=data.get("cookie"),
             trial_limit=data.get("trial_limit"),
             output_dir=Path(data.get("output_dir", cls.output_dir)),
+            workers=int(data.get("workers", cls.workers)),
+            max_connections_per_host=int(
+                data.get("max_connections_per_host", cls.max_connections_per_host)
+            ),
+            pipelined=bool(data.get("pipelined", cls.pipelined)),
+            page_fanout=int(data.get("page_fanout", cls.page_fanout)),
+            parse_processes=int(data.get("parse_processes", cls.parse_processes)),
+            parser_backend=data.get("parser_backend") or cls.parser_backend,
+            dedup=bool(data.get("dedup", cls.dedup)),
+            snapshot_path=Path(data.get("snapshot_path") or cls.snapshot_path),
+            response_cache_path=(
+                Path(data["response_cache_path"])
+                if data.get("response_cache_path")
+                else None
+            ),
+            response_cache_ttl_seconds=int(
+                data.get("response_cache_ttl_seconds", cls.response_cache_ttl_seconds)
+            ),
+            response_cache_max_mb=int(
+                data.get("response_cache_max_mb", cls.response_cache_max_mb)
+            ),
+            parse_cache_path=(
+                Path(data["parse_cache_path"]) if data.get("parse_cache_path") else None
+            ),
+            parse_cache_entries=int(data.get("parse_cache_entries", cls.parse_cache_entries)),
+            parse_cache_max_mb=int(data.get("parse_cache_max_mb", cls.parse_cache_max_mb)),
+            retry_max_attempts=int(data.get("retry_max_attempts", cls.retry_max_attempts)),
+            retry_base_delay=float(data.get("retry_base_delay", cls.retry_base_delay)),
+            retry_max_delay=float(data.get("retry_max_delay", cls.retry_max_delay)),
+            retry_budget=data.get("retry_budget"),
+            breaker_error_rate=float(data.get("breaker_error_rate", cls.breaker_error_rate)),
+            breaker_window=int(data.get("breaker_window", cls.breaker_window)),
+            breaker_cooldown_seconds=float(
+                data.get("breaker_cooldown_seconds", cls.breaker_cooldown_seconds)
+            ),
+            processes=int(data.get("processes", cls.processes)),
+            request_budget=data.get("request_budget"),
+            work_queue_path=(
+                Path(data["work_queue_path"]) if data.get("work_queue_path") else None
+            ),
+            lease_seconds=float(data.get("lease_seconds", cls.lease_seconds)),
+            record_path=Path(data["record_path"]) if data.get("record_path") else None,
+            replay_path=Path(data["replay_path"]) if data.get("replay_path") else None,
+            replay_latency=float(data.get("replay_latency", cls.replay_latency)),
+            replay_jitter=float(data.get("replay_jitter", cls.replay_jitter)),
+            replay_error_rate=float(data.get("replay_error_rate", cls.replay_error_rate)),
+            stream_pages=bool(data.get("stream_pages", cls.stream_pages)),
+            identities_path=(
+                Path(data["identities_path"]) if data.get("identities_path") else None
+            ),
+            identity_quarantine_seconds=float(
+                data.get("identity_quarantine_seconds", cls.identity_quarantine_seconds)
+            ),
+            identity_block_threshold=int(
+                data.get("identity_block_threshold", cls.identity_block_threshold)
+            ),
+            identity_empty_threshold=int(
+                data.get("identity_empty_threshold", cls.identity_empty_threshold)
+            ),
+            schedule_zips=bool(data.get("schedule_zips", cls.schedule_zips)),
+            schedule_saturation=float(
+                data.get("schedule_saturation", cls.schedule_saturation)
+            ),
+            schedule_saturated_pages=data.get("schedule_saturated_pages"),
+            schedule_deadline_seconds=data.get("schedule_deadline_seconds"),
+            metrics_port=data.get("metrics_port"),
+            metrics_json_path=(
+                Path(data["metrics_json_path"]) if data.get("metrics_json_path") else None
+            ),
+            metrics_interval=float(data.get("metrics_interval", cls.metrics_interval)),
         )
 
 def _project_root() -> Path:
@@ -92,4 +210,44 @@ def get_settings(yaml_path: Optional[str] = None) -> Settings:
     if output_dir:
         settings.output_dir = Path(output_dir)
 
+    parser_backend = os.getenv("PARSER_BACKEND")
+    if parser_backend:
+        settings.parser_backend = parser_backend
+
+    response_cache_path = os.getenv("RESPONSE_CACHE_PATH")
+    if response_cache_path:
+        settings.response_cache_path = Path(response_cache_path)
+
+    parse_cache_path = os.getenv("PARSE_CACHE_PATH")
+    if parse_cache_path:
+        settings.parse_cache_path = Path(parse_cache_path)
+
+    retry_budget = os.getenv("RETRY_BUDGET")
+    if retry_budget:
+        try:
+            settings.retry_budget = int(retry_budget)
+        except ValueError:
+            pass
+
+    request_budget = os.getenv("REQUEST_BUDGET")
+    if request_budget:
+        try:
+            settings.request_budget = int(request_budget)
+        except ValueError:
+            pass
+
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        try:
+            settings.metrics_port = int(metrics_port)
+        except ValueError:
+            pass
+
+    workers = os.getenv("WORKERS")
+    if workers:
+        try:
+            settings.workers = int(workers)
+        except ValueError:
+            pass
+
     return settings
\ No newline at end of file
@@ -0,0 +1,270 @@
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+import yaml
+
+from utils.logger import get_logger
+from utils.metrics import NULL_METRICS
+from utils.retry import FetchError
+
+# Responses that mean the site is refusing this identity.
+BLOCK_STATUS_CODES = frozenset({401, 403, 429})
+
+OUTCOME_OK = "ok"
+OUTCOME_EMPTY = "empty"
+OUTCOME_BLOCKED = "blocked"
+OUTCOME_ERROR = "error"
+
+@dataclass
+class Identity:
+    """One crawler identity: a User-Agent, its session cookie and an optional proxy."""
+
+    name: str
+    user_agent: Optional[str] = None
+    cookie: Optional[str] = None
+    proxy: Optional[str] = None
+
+def load_identities(path: Path) -> List[Identity]:
+    """
+    Read identities from a YAML/JSON list or a plain-text User-Agent list.
+
+    YAML/JSON entries are mappings with ``user_agent``, ``cookie``, ``proxy``
+    and optionally ``name`` keys (a top-level ``identities`` key may wrap the
+    list). Text files hold one User-Agent per line; ``#`` starts a comment.
+    """
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yaml", ".yml", ".json"):
+        data = json.loads(text) if path.suffix.lower() == ".json" else yaml.safe_load(text)
+        if isinstance(data, dict):
+            data = data.get("identities")
+        if not isinstance(data, list):
+            raise ValueError(f"Identity file {path} must contain a list of identities.")
+        identities = []
+        for n, entry in enumerate(data, start=1):
+            if not isinstance(entry, dict):
+                raise ValueError(f"Identity #{n} in {path} must be a mapping.")
+            identities.append(
+                Identity(
+                    name=str(entry.get("name") or f"identity-{n}"),
+                    user_agent=entry.get("user_agent"),
+                    cookie=entry.get("cookie"),
+                    proxy=entry.get("proxy"),
+                )
+            )
+    else:
+        lines = [line.strip() for line in text.splitlines()]
+        user_agents = [line for line in lines if line and not line.startswith("#")]
+        identities = [
+            Identity(name=f"identity-{n}", user_agent=ua)
+            for n, ua in enumerate(user_agents, start=1)
+        ]
+    if not identities:
+        raise ValueError(f"Identity file {path} contains no identities.")
+    return identities
+
+@dataclass
+class _IdentityState:
+    identity: Identity
+    client: Any
+    in_flight: int = 0
+    zips: int = 0
+    last_used: float = 0.0
+    consecutive_blocks: int = 0
+    consecutive_empty: int = 0
+    quarantines: int = 0
+    quarantined_until: float = 0.0
+    outcomes: Deque[str] = field(default_factory=lambda: deque(maxlen=20))
+
+    @property
+    def health(self) -> float:
+        """Share of recent zips that came back with agents (1.0 when unused)."""
+        if not self.outcomes:
+            return 1.0
+        return self.outcomes.count(OUTCOME_OK) / len(self.outcomes)
+
+class IdentityPool:
+    """
+    A set of identities, each with its own client and health record.
+
+    Every identity has its own ``RealtorClient`` (built by
+    ``client_factory``), and so its own session, keep-alive pool, rate
+    limiter and circuit breaker: throughput grows with the number of
+    identities. :meth:`acquire` hands out the least busy, healthiest
+    identity that is not quarantined. An identity is quarantined for
+    ``quarantine_seconds`` (doubling on every repeat, up to 8x) after
+    ``block_threshold`` blocked zips or ``empty_threshold`` empty zips in a
+    row; when every identity is quarantined, :meth:`acquire` waits for the
+    first to come back.
+    """
+
+    def __init__(
+        self,
+        identities: List[Identity],
+        client_factory: Callable[[Identity], Any],
+        quarantine_seconds: float = 600.0,
+        block_threshold: int = 2,
+        empty_threshold: int = 3,
+        logger: Optional[Any] = None,
+        metrics: Any = NULL_METRICS,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if not identities:
+            raise ValueError("An identity pool needs at least one identity.")
+        self.states = [_IdentityState(identity, client_factory(identity)) for identity in identities]
+        self.quarantine_seconds = quarantine_seconds
+        self.block_threshold = max(1, block_threshold)
+        self.empty_threshold = max(1, empty_threshold)
+        self.logger = logger or get_logger(__name__)
+        self.metrics = metrics
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def acquire(self, exclude: Iterable[str] = (), wait: bool = True) -> Optional[_IdentityState]:
+        """
+        Check out an identity for one zip.
+
+        Identities named in ``exclude`` are skipped; with ``wait=False``
+        ``None`` is returned instead of waiting out a quarantine.
+        """
+        excluded = set(exclude)
+        while True:
+            with self._lock:
+                now = self._clock()
+                available = [
+                    s
+                    for s in self.states
+                    if s.quarantined_until <= now and s.identity.name not in excluded
+                ]
+                if available:
+                    state = min(
+                        available, key=lambda s: (s.in_flight, -s.health, s.last_used)
+                    )
+                    state.in_flight += 1
+                    state.zips += 1
+                    state.last_used = now
+                    return state
+                if not wait or len(excluded) >= len(self.states):
+                    return None
+                delay = min(s.quarantined_until for s in self.states) - now
+            self.logger.warning("All identities are quarantined; waiting %.0fs", delay)
+            self._sleep(delay)
+
+    def release(self, state: _IdentityState, outcome: str) -> None:
+        """Record how a zip went on ``state`` and quarantine it if needed."""
+        with self._lock:
+            state.in_flight -= 1
+            state.outcomes.append(outcome)
+            state.consecutive_blocks = (
+                state.consecutive_blocks + 1 if outcome == OUTCOME_BLOCKED else 0
+            )
+            state.consecutive_empty = (
+                state.consecutive_empty + 1 if outcome == OUTCOME_EMPTY else 0
+            )
+            if (
+                state.consecutive_blocks < self.block_threshold
+                and state.consecutive_empty < self.empty_threshold
+            ):
+                return
+            reason = "blocked" if state.consecutive_blocks else "empty results"
+            duration = self.quarantine_seconds * min(8, 2**state.quarantines)
+            state.quarantines += 1
+            state.quarantined_until = self._clock() + duration
+            state.consecutive_blocks = state.consecutive_empty = 0
+        self.metrics.inc("identity_quarantines_total")
+        self.logger.warning(
+            "Quarantining identity %s for %.0fs (%s)", state.identity.name, duration, reason
+        )
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            now = self._clock()
+            return {
+                s.identity.name: {
+                    "zips": s.zips,
+                    "health": round(s.health, 3),
+                    "quarantines": s.quarantines,
+                    "quarantined": s.quarantined_until > now,
+                }
+                for s in self.states
+            }
+
+class PooledRealtorClient:
+    """
+    Drop-in for ``RealtorClient`` that crawls each zip on a pooled identity.
+
+    A zip whose identity gets blocked part-way is continued from the failed
+    page on another identity, at most ``max_handoffs`` times; the last
+    :class:`FetchError` is raised when it runs out of identities to try.
+    """
+
+    def __init__(self, pool: IdentityPool, max_handoffs: int = 2) -> None:
+        self.pool = pool
+        self.max_handoffs = max_handoffs
+
+    @property
+    def clients(self) -> List[Any]:
+        return [state.client for state in self.pool.states]
+
+    def iter_agent_pages(
+        self,
+        zip_code: str,
+        max_records: Optional[int] = None,
+        start_page: int = 1,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        page_number = start_page
+        fetched = 0
+        tried: List[str] = []
+        state = self.pool.acquire()
+        while True:
+            tried.append(state.identity.name)
+            outcome = OUTCOME_OK
+            try:
+                remaining = max_records - fetched if max_records is not None else None
+                for page_agents in state.client.iter_agent_pages(
+                    zip_code=zip_code, max_records=remaining, start_page=page_number
+                ):
+                    fetched += len(page_agents)
+                    page_number += 1
+                    yield page_agents
+                if page_number == start_page:
+                    outcome = OUTCOME_EMPTY
+                return
+            except FetchError as exc:
+                blocked = exc.status_code in BLOCK_STATUS_CODES
+                outcome = OUTCOME_BLOCKED if blocked else OUTCOME_ERROR
+                if not blocked or len(tried) > self.max_handoffs:
+                    raise
+                error = exc
+            finally:
+                self.pool.release(state, outcome)
+
+            failed = state
+            state = self.pool.acquire(exclude=tried, wait=False)
+            if state is None:
+                raise error
+            self.pool.logger.info(
+                "Identity %s blocked on zip %s page %d; continuing on %s",
+                failed.identity.name,
+                zip_code,
+                page_number,
+                state.identity.name,
+            )
+
+    def search_agents_by_zip(
+        self, zip_code: str, max_records: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        agents: List[Dict[str, Any]] = []
+        for page_agents in self.iter_agent_pages(zip_code, max_records=max_records):
+            agents.extend(page_agents)
+        return agents
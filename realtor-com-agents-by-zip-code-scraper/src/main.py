@@ -1,18 +1,55 @@
 import argparse
+import asyncio
+import dataclasses
+import functools
+import itertools
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
-from config import get_settings
+from config import Settings, get_settings
 from utils.logger import get_logger
-from utils.rate_limiter import RateLimiter
+from utils.metrics import (
+    NULL_METRICS,
+    Metrics,
+    SnapshotWriter,
+    describe_crawl_metrics,
+    serve_prometheus,
+)
+from utils.profiler import PROFILE_MODES, RunProfiler, format_stage_table
+from utils.rate_limiter import TokenBucketRateLimiter
+from utils.retry import CircuitBreaker, RequestBudget, RetryBudget, RetryPolicy
+from utils.replay_session import RecordingSession, ReplaySession, ReplayStore
 from realtor_client import RealtorClient
 from agent_extractor import AgentExtractor
-from storage.json_exporter import export_agents_to_json
+from agent_dedup import AgentDedupIndex
+from agent_delta import ChangesetBuilder
+from identity_pool import IdentityPool, PooledRealtorClient, load_identities
+from sharded_crawl import ShardedCrawl
+from zip_scheduler import ZipScheduler
+from parsers.agent_record import to_jsonable
+from storage.json_exporter import export_agents_to_json, export_agents_to_jsonl
 from storage.csv_exporter import export_agents_to_csv
+from storage.parquet_exporter import export_agents_to_parquet
+from storage.sqlite_exporter import export_agents_to_sqlite
+from storage.checkpoint_journal import CheckpointJournal
+from storage.parse_cache import ParseCache
+from storage.response_cache import ResponseCache
+from storage.snapshot_store import SnapshotStore
 
 logger = get_logger(__name__)
 
+EXPORTERS: Dict[str, Callable[[Iterable[Dict[str, Any]], Path], int]] = {
+    "json": export_agents_to_json,
+    "jsonl": export_agents_to_jsonl,
+    "csv": export_agents_to_csv,
+    "parquet": export_agents_to_parquet,
+    "sqlite": export_agents_to_sqlite,
+}
+# Formats that upsert into an existing file instead of replacing it.
+IN_PLACE_FORMATS = {"sqlite"}
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Realtor.com Agents by Zip Code Scraper CLI"
@@ -37,7 +74,7 @@ def parse_args() -> argparse.Namespace:
         "--output-format",
         type=str,
         default="json",
-        choices=["json", "csv"],
+        choices=sorted(EXPORTERS),
         help="Output format for scraped agents.",
     )
     parser.add_argument(
@@ -64,6 +101,198 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Optional User-Agent string override.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of zip codes to fetch concurrently (default from settings).",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Use the asyncio client (requires aiohttp); --workers sets the "
+        "number of zips in flight.",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Prefetch the next page of a zip while the current page is parsed.",
+    )
+    parser.add_argument(
+        "--page-fanout",
+        type=int,
+        default=None,
+        help="Fetch up to this many pages of a zip concurrently once the "
+        "page count is known from the advertised total.",
+    )
+    parser.add_argument(
+        "--identities",
+        type=str,
+        default=None,
+        help="Crawl with a pool of identities (YAML list of user_agent/cookie/proxy, "
+        "or one User-Agent per line); each gets its own session and rate limit.",
+    )
+    parser.add_argument(
+        "--schedule",
+        action="store_true",
+        help="Crawl zips in order of expected new agents, learned at runtime from the "
+        "zips each agent services.",
+    )
+    parser.add_argument(
+        "--saturated-page-cap",
+        type=int,
+        default=None,
+        help="With --schedule: fetch at most this many pages of zips whose agents "
+        "are mostly known already.",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="With --schedule: crawl the most productive zips that fit in this many "
+        "seconds (combines with --request-budget).",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream compressed pages, stop reading once the results are complete "
+        "and parse the raw bytes.",
+    )
+    parser.add_argument(
+        "--parse-processes",
+        type=int,
+        default=None,
+        help="Parse pages in a process pool of this size (0 parses in-thread).",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Shard the zip codes across this many worker processes, each with "
+        "its own client; the rate limit is split between them.",
+    )
+    parser.add_argument(
+        "--request-budget",
+        type=int,
+        default=None,
+        help="Maximum number of requests for the whole crawl, across all processes.",
+    )
+    parser.add_argument(
+        "--work-queue",
+        type=str,
+        default=None,
+        help="SQLite work queue of a sharded crawl (default: next to the output). "
+        "Rerunning against an existing queue continues the crawl.",
+    )
+    parser.add_argument(
+        "--join",
+        action="store_true",
+        help="Only work on the zip codes of an existing --work-queue (e.g. from "
+        "another host on shared storage); the coordinating run writes the export.",
+    )
+    parser.add_argument(
+        "--record",
+        type=str,
+        default=None,
+        help="Record every fetched page into this SQLite file for offline replay.",
+    )
+    parser.add_argument(
+        "--replay",
+        type=str,
+        default=None,
+        help="Serve pages from a --record file instead of the network.",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=None,
+        help="Simulated network latency per replayed request, in seconds.",
+    )
+    parser.add_argument(
+        "--replay-error-rate",
+        type=float,
+        default=None,
+        help="Share of replayed requests that fail with HTTP 503 (0-1).",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Collect per-stage timings and counters and log a summary table at the end.",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="sampling",
+        default=None,
+        choices=PROFILE_MODES,
+        help="Profile the run (sampling by default, or deterministic) with tracemalloc "
+        "and write collapsed stacks, top allocations and a per-stage wall/CPU split "
+        "next to the output; implies --metrics. Combine with --replay for "
+        "reproducible profiles.",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=25,
+        help="Number of allocation sites in the --profile allocation report.",
+    )
+    parser.add_argument(
+        "--profile-frames",
+        type=int,
+        default=1,
+        help="Frames kept per allocation under --profile; deeper tracebacks tag "
+        "allocation sites with their stage but slow the run down further.",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve metrics in Prometheus text format on this port (/metrics) "
+        "while crawling; implies --metrics.",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=str,
+        default=None,
+        help="Periodically write a JSON metrics snapshot to this file; implies --metrics.",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Merge agents listed under several zip codes into a single record "
+        "(the export is written once the crawl has finished).",
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Incremental crawl: reuse the previous run's agents for zips whose "
+        "first page is unchanged and write a changeset next to the export.",
+    )
+    parser.add_argument(
+        "--response-cache",
+        type=str,
+        default=None,
+        help="SQLite file used to cache fetched pages across runs.",
+    )
+    parser.add_argument(
+        "--parse-cache",
+        type=str,
+        default=None,
+        help="SQLite file used to cache parsed pages across runs; identical pages "
+        "are not parsed again.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run from its checkpoint journal, skipping "
+        "completed zip codes and pages.",
+    )
+    parser.add_argument(
+        "--no-checkpoint",
+        action="store_true",
+        help="Do not keep a checkpoint journal while scraping.",
+    )
     return parser.parse_args()
 
 def load_zip_codes(args: argparse.Namespace, project_root: Path) -> List[str]:
@@ -114,6 +343,293 @@ def resolve_output_path(
     default_dir.mkdir(parents=True, exist_ok=True)
     return default_dir / f"agents.{output_format}"
 
+def build_rate_limiter(settings: Settings) -> TokenBucketRateLimiter:
+    return TokenBucketRateLimiter(
+        calls_per_minute=settings.rate_limit_rpm,
+        burst=settings.rate_limit_burst,
+        adaptive=settings.rate_limit_adaptive,
+    )
+
+def resolve_path(path: Path, project_root: Path) -> Path:
+    return path if path.is_absolute() else project_root / path
+
+def build_session(settings: Settings) -> Optional[Any]:
+    """Recording/replaying session per the settings; ``None`` for plain HTTP."""
+    if settings.replay_path is not None:
+        return ReplaySession(
+            ReplayStore(settings.replay_path),
+            latency=settings.replay_latency,
+            jitter=settings.replay_jitter,
+            error_rate=settings.replay_error_rate,
+        )
+    if settings.record_path is not None:
+        return RecordingSession(
+            ReplayStore(settings.record_path),
+            pool_size=max(10, settings.workers * settings.page_fanout),
+        )
+    return None
+
+def build_retry_policy(settings: Settings) -> RetryPolicy:
+    return RetryPolicy(
+        max_attempts=max(1, settings.retry_max_attempts),
+        base_delay=settings.retry_base_delay,
+        max_delay=settings.retry_max_delay,
+    )
+
+def build_circuit_breaker(settings: Settings) -> CircuitBreaker:
+    return CircuitBreaker(
+        error_rate_threshold=settings.breaker_error_rate,
+        window=settings.breaker_window,
+        min_requests=max(1, settings.breaker_window // 2),
+        cooldown=settings.breaker_cooldown_seconds,
+        logger=logger,
+    )
+
+def build_client(
+    settings: Settings,
+    cookie: Optional[str],
+    user_agent: Optional[str],
+    response_cache: Optional[ResponseCache] = None,
+    parse_executor: Optional[ProcessPoolExecutor] = None,
+    request_budget: Optional[Any] = None,
+    metrics: Any = NULL_METRICS,
+    proxy: Optional[str] = None,
+    parse_cache: Optional[ParseCache] = None,
+    retry_budget: Optional[RetryBudget] = None,
+) -> RealtorClient:
+    return RealtorClient(
+        base_url=settings.base_url,
+        rate_limiter=build_rate_limiter(settings),
+        session=build_session(settings),
+        user_agent=user_agent,
+        cookie=cookie,
+        logger=logger,
+        max_connections=max(10, settings.workers * settings.page_fanout),
+        pipelined=settings.pipelined,
+        page_fanout=settings.page_fanout,
+        parse_executor=parse_executor,
+        parser_backend=settings.parser_backend,
+        response_cache=response_cache,
+        parse_cache=parse_cache,
+        retry_policy=build_retry_policy(settings),
+        retry_budget=(
+            retry_budget if retry_budget is not None else RetryBudget(settings.retry_budget)
+        ),
+        circuit_breaker=build_circuit_breaker(settings),
+        request_budget=request_budget,
+        metrics=metrics,
+        streamed=settings.stream_pages,
+        proxy=proxy,
+    )
+
+def build_crawl_client(
+    settings: Settings,
+    cookie: Optional[str],
+    user_agent: Optional[str],
+    response_cache: Optional[ResponseCache] = None,
+    parse_executor: Optional[ProcessPoolExecutor] = None,
+    request_budget: Optional[Any] = None,
+    metrics: Any = NULL_METRICS,
+    parse_cache: Optional[ParseCache] = None,
+    retry_budget: Optional[RetryBudget] = None,
+) -> Any:
+    """
+    A ``RealtorClient``, or a ``PooledRealtorClient`` when identities are configured.
+
+    Every identity gets its own session and rate limiter, but the retry and
+    request budgets are shared so they stay per run.
+    """
+    if retry_budget is None:
+        retry_budget = RetryBudget(settings.retry_budget)
+    if settings.identities_path is None:
+        return build_client(
+            settings,
+            cookie,
+            user_agent,
+            response_cache=response_cache,
+            parse_executor=parse_executor,
+            request_budget=request_budget,
+            metrics=metrics,
+            parse_cache=parse_cache,
+            retry_budget=retry_budget,
+        )
+
+    def identity_client(identity: Any) -> RealtorClient:
+        # Cookies belong to a session, so only the User-Agent falls back to
+        # the global setting.
+        return build_client(
+            settings,
+            identity.cookie,
+            identity.user_agent or user_agent,
+            response_cache=response_cache,
+            parse_executor=parse_executor,
+            request_budget=request_budget,
+            metrics=metrics,
+            proxy=identity.proxy,
+            parse_cache=parse_cache,
+            retry_budget=retry_budget,
+        )
+
+    pool = IdentityPool(
+        load_identities(settings.identities_path),
+        identity_client,
+        quarantine_seconds=settings.identity_quarantine_seconds,
+        block_threshold=settings.identity_block_threshold,
+        empty_threshold=settings.identity_empty_threshold,
+        logger=logger,
+        metrics=metrics,
+    )
+    return PooledRealtorClient(pool)
+
+def build_parse_cache(settings: Settings) -> ParseCache:
+    return ParseCache(
+        settings.parse_cache_path,
+        max_entries=settings.parse_cache_entries,
+        max_bytes=settings.parse_cache_max_mb * 1024 * 1024,
+    )
+
+def build_shard_client(
+    settings: Settings,
+    cookie: Optional[str],
+    user_agent: Optional[str],
+    request_budget: Any,
+) -> Any:
+    """Client of one sharded-crawl worker process (see ``ShardedCrawl``)."""
+    response_cache = None
+    if settings.response_cache_path is not None:
+        # SQLite in WAL mode lets every process share the cache file.
+        response_cache = ResponseCache(
+            settings.response_cache_path,
+            ttl_seconds=settings.response_cache_ttl_seconds,
+            max_bytes=settings.response_cache_max_mb * 1024 * 1024,
+        )
+    parse_cache = None
+    if settings.parse_cache_path is not None:
+        parse_cache = build_parse_cache(settings)
+    return build_crawl_client(
+        settings,
+        cookie,
+        user_agent,
+        response_cache=response_cache,
+        request_budget=request_budget,
+        parse_cache=parse_cache,
+    )
+
+def build_sharded_crawl(
+    settings: Settings, queue_path: Path, cookie: Optional[str], user_agent: Optional[str]
+) -> ShardedCrawl:
+    # Each process paces itself, so they split the configured rate limit
+    # (fractionally: rounding up would exceed it once processes > rpm).
+    shard_settings = dataclasses.replace(
+        settings, rate_limit_rpm=settings.rate_limit_rpm / settings.processes
+    )
+    return ShardedCrawl(
+        queue_path=queue_path,
+        shard_dir=queue_path.with_name(queue_path.name + ".shards"),
+        client_factory=functools.partial(build_shard_client, shard_settings, cookie, user_agent),
+        processes=settings.processes,
+        threads=settings.workers,
+        request_budget=settings.request_budget,
+        lease_seconds=settings.lease_seconds,
+        logger=logger,
+    )
+
+def build_metrics(settings: Settings, enabled: bool) -> Any:
+    """Start the configured metrics outputs; ``NULL_METRICS`` when disabled."""
+    if not (enabled or settings.metrics_port is not None or settings.metrics_json_path):
+        return NULL_METRICS
+    metrics = Metrics()
+    describe_crawl_metrics(metrics)
+    if settings.metrics_port is not None:
+        serve_prometheus(metrics, settings.metrics_port)
+        logger.info("Serving metrics on http://127.0.0.1:%d/metrics", settings.metrics_port)
+    return metrics
+
+def build_profiler(mode: str, directory: Path, top_n: int, trace_frames: int) -> RunProfiler:
+    """A profiler that attributes frames and allocations to the pipeline stages."""
+    return RunProfiler(
+        directory,
+        stage_functions={
+            "fetch": [RealtorClient._request_page],
+            "rate_limit_wait": [RealtorClient._wait_for_rate_limit],
+            "parse": [RealtorClient._parse],
+            "normalize": [AgentExtractor._normalize_page],
+            "export": list(EXPORTERS.values()),
+        },
+        mode=mode,
+        top_n=top_n,
+        trace_frames=trace_frames,
+    )
+
+def finish_profile(profiler: RunProfiler) -> None:
+    report = profiler.stop()
+    logger.info("Profile (%s):\n%s", profiler.mode, format_stage_table(report))
+    logger.info("Profile written to %s", profiler.directory)
+
+def log_failure_summary(summary: Dict[str, Any], path: Path) -> None:
+    """Log failed zip/page units and write them to ``path`` as JSON."""
+    if not summary["failed_units"]:
+        return
+    by_status = ", ".join(f"{k}={v}" for k, v in sorted(summary["by_status"].items()))
+    logger.warning(
+        "%d page(s) could not be fetched for zip codes %s (%s); details in %s",
+        summary["failed_units"],
+        ", ".join(summary["failed_zip_codes"]),
+        by_status,
+        path,
+    )
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+def log_parse_strategies(counts: Dict[str, int]) -> None:
+    total = sum(counts.values())
+    if not total:
+        return
+    summary = ", ".join(
+        f"{strategy}={count} ({count / total:.0%})"
+        for strategy, count in sorted(counts.items())
+    )
+    logger.info("Parse strategies over %d pages: %s", total, summary)
+
+async def run_async_extraction(
+    settings: Settings,
+    zip_codes: List[str],
+    cookie: Optional[str],
+    user_agent: Optional[str],
+    failures: Optional[List[Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Crawl with the asyncio client; failed units are appended to ``failures``."""
+    # Imported lazily so aiohttp is only required for --async runs.
+    from async_realtor_client import AsyncRealtorClient
+
+    async with AsyncRealtorClient(
+        base_url=settings.base_url,
+        rate_limiter=build_rate_limiter(settings),
+        user_agent=user_agent,
+        cookie=cookie,
+        logger=logger,
+        max_connections_per_host=settings.max_connections_per_host,
+        parser_backend=settings.parser_backend,
+        retry_policy=build_retry_policy(settings),
+        retry_budget=RetryBudget(settings.retry_budget),
+        circuit_breaker=build_circuit_breaker(settings),
+        request_budget=(
+            RequestBudget(settings.request_budget) if settings.request_budget is not None else None
+        ),
+    ) as client:
+        extractor = AgentExtractor(
+            client=client, logger=logger, workers=settings.workers
+        )
+        if failures is not None:
+            extractor.failures = failures
+        agents = await extractor.extract_for_zip_codes_async(
+            zip_codes=zip_codes,
+            max_per_zip=None,
+            trial_limit=settings.trial_limit,
+        )
+        log_parse_strategies(client.parse_strategy_counts)
+        return agents
+
 def main() -> None:
     project_root = Path(__file__).resolve().parents[1]
     args = parse_args()
@@ -121,19 +637,162 @@ def main() -> None:
     settings = get_settings(args.settings)
     if args.trial_limit is not None:
         settings.trial_limit = args.trial_limit
+    if args.workers is not None:
+        settings.workers = args.workers
+    if settings.workers < 1:
+        logger.error("--workers must be at least 1 (got %d)", settings.workers)
+        raise SystemExit(1)
+    if args.pipeline:
+        settings.pipelined = True
+    if args.page_fanout is not None:
+        settings.page_fanout = args.page_fanout
+    if settings.page_fanout < 1:
+        logger.error("--page-fanout must be at least 1 (got %d)", settings.page_fanout)
+        raise SystemExit(1)
+    if args.stream:
+        settings.stream_pages = True
+    if args.parse_processes is not None:
+        settings.parse_processes = args.parse_processes
+    if args.dedup:
+        settings.dedup = True
+    if args.response_cache:
+        settings.response_cache_path = Path(args.response_cache)
+    if args.parse_cache:
+        settings.parse_cache_path = Path(args.parse_cache)
 
     cookie = args.cookie or settings.cookie
     user_agent = args.user_agent or settings.user_agent
 
-    rate_limiter = RateLimiter(calls_per_minute=settings.rate_limit_rpm)
-    client = RealtorClient(
-        base_url=settings.base_url,
-        rate_limiter=rate_limiter,
-        user_agent=user_agent,
-        cookie=cookie,
-        logger=logger,
-    )
-    extractor = AgentExtractor(client=client, logger=logger)
+    if args.processes is not None:
+        settings.processes = args.processes
+    if settings.processes < 1:
+        logger.error("--processes must be at least 1 (got %d)", settings.processes)
+        raise SystemExit(1)
+    if args.request_budget is not None:
+        settings.request_budget = args.request_budget
+    if args.work_queue:
+        settings.work_queue_path = Path(args.work_queue)
+    if args.record:
+        settings.record_path = Path(args.record)
+    if args.replay:
+        settings.replay_path = Path(args.replay)
+    if args.replay_latency is not None:
+        settings.replay_latency = args.replay_latency
+    if args.replay_error_rate is not None:
+        settings.replay_error_rate = args.replay_error_rate
+    if args.metrics_port is not None:
+        settings.metrics_port = args.metrics_port
+    if args.metrics_json:
+        settings.metrics_json_path = Path(args.metrics_json)
+    if settings.record_path is not None and settings.replay_path is not None:
+        logger.error("--record and --replay cannot be combined")
+        raise SystemExit(1)
+    if args.use_async and (settings.record_path is not None or settings.replay_path is not None):
+        logger.error("--record/--replay are not supported with --async")
+        raise SystemExit(1)
+    if args.use_async and settings.stream_pages:
+        logger.error("--stream is not supported with --async")
+        raise SystemExit(1)
+    if args.schedule:
+        settings.schedule_zips = True
+    if args.saturated_page_cap is not None:
+        settings.schedule_saturated_pages = args.saturated_page_cap
+    if args.deadline is not None:
+        settings.schedule_deadline_seconds = args.deadline
+    if settings.schedule_zips and args.use_async:
+        logger.error("--schedule is not supported with --async")
+        raise SystemExit(1)
+    if args.identities:
+        settings.identities_path = Path(args.identities)
+    if settings.identities_path is not None:
+        if args.use_async:
+            logger.error("--identities is not supported with --async")
+            raise SystemExit(1)
+        settings.identities_path = resolve_path(settings.identities_path, project_root)
+        try:
+            identity_count = len(load_identities(settings.identities_path))
+        except (OSError, ValueError) as exc:
+            logger.error("Failed to load identities: %s", exc)
+            raise SystemExit(1)
+        if settings.workers < identity_count:
+            logger.info(
+                "Raising workers to %d so every identity has a zip in flight", identity_count
+            )
+            settings.workers = identity_count
+    for name in ("record_path", "replay_path"):
+        path = getattr(settings, name)
+        if path is not None:
+            setattr(settings, name, resolve_path(path, project_root))
+    if settings.replay_path is not None and not settings.replay_path.exists():
+        logger.error("Replay file not found: %s", settings.replay_path)
+        raise SystemExit(1)
+    sharded_run = settings.processes > 1 or args.join
+    if sharded_run and (args.use_async or args.delta or args.resume or settings.schedule_zips):
+        logger.error(
+            "--processes/--join cannot be combined with --async, --delta, --resume or "
+            "--schedule; a sharded crawl resumes from its work queue"
+        )
+        raise SystemExit(1)
+    if sharded_run and args.profile:
+        logger.error("--profile cannot be combined with --processes/--join")
+        raise SystemExit(1)
+    if args.join and settings.work_queue_path is None:
+        logger.error("--join requires --work-queue")
+        raise SystemExit(1)
+
+    # Sharded workers run in their own processes and are not instrumented.
+    metrics = build_metrics(settings, args.metrics or args.profile is not None)
+    snapshot_writer: Optional[SnapshotWriter] = None
+    if settings.metrics_json_path is not None:
+        snapshot_writer = SnapshotWriter(
+            metrics,
+            resolve_path(settings.metrics_json_path, project_root),
+            interval=settings.metrics_interval,
+        ).start()
+
+    response_cache: Optional[ResponseCache] = None
+    if settings.response_cache_path is not None:
+        settings.response_cache_path = resolve_path(settings.response_cache_path, project_root)
+        if not sharded_run:
+            response_cache = ResponseCache(
+                settings.response_cache_path,
+                ttl_seconds=settings.response_cache_ttl_seconds,
+                max_bytes=settings.response_cache_max_mb * 1024 * 1024,
+            )
+    parse_cache: Optional[ParseCache] = None
+    if settings.parse_cache_path is not None:
+        settings.parse_cache_path = resolve_path(settings.parse_cache_path, project_root)
+        if not sharded_run:
+            parse_cache = build_parse_cache(settings)
+    parse_executor: Optional[ProcessPoolExecutor] = None
+    if settings.parse_processes > 0 and not sharded_run:
+        parse_executor = ProcessPoolExecutor(max_workers=settings.parse_processes)
+    # Sharded workers build their own clients in their processes.
+    client: Optional[Any] = None
+    if not sharded_run:
+        client = build_crawl_client(
+            settings,
+            cookie,
+            user_agent,
+            response_cache=response_cache,
+            parse_executor=parse_executor,
+            request_budget=(
+                RequestBudget(settings.request_budget)
+                if settings.request_budget is not None
+                else None
+            ),
+            metrics=metrics,
+            parse_cache=parse_cache,
+            retry_budget=RetryBudget(settings.retry_budget),
+        )
+
+    if args.join:
+        sharded = build_sharded_crawl(
+            settings, resolve_path(settings.work_queue_path, project_root), cookie, user_agent
+        )
+        sharded.run()
+        sharded.close()
+        raise SystemExit(0)
 
     try:
         zip_codes = load_zip_codes(args, project_root)
@@ -144,30 +803,211 @@ def main() -> None:
     output_format = args.output_format.lower()
     output_path = resolve_output_path(args, project_root, output_format)
 
+    # The journal lives next to the output so --resume finds it again; it is
+    # removed once the export has been written successfully.
+    journal: Optional[CheckpointJournal] = None
+    if args.resume and (args.use_async or args.no_checkpoint):
+        logger.error("--resume cannot be combined with --async or --no-checkpoint")
+        raise SystemExit(1)
+    if args.delta and args.use_async:
+        logger.error("--delta cannot be combined with --async")
+        raise SystemExit(1)
+    if not args.use_async and not args.no_checkpoint and not sharded_run:
+        journal_path = output_path.with_name(output_path.name + ".checkpoint.jsonl")
+        journal = CheckpointJournal(journal_path, resume=args.resume, logger=logger)
+        if args.resume:
+            logger.info("Resuming from checkpoint journal %s", journal_path)
+
+    snapshot: Optional[SnapshotStore] = None
+    changeset: Optional[ChangesetBuilder] = None
+    if args.delta:
+        snapshot_path = settings.snapshot_path
+        if not snapshot_path.is_absolute():
+            snapshot_path = project_root / snapshot_path
+        snapshot = SnapshotStore(snapshot_path)
+        # Loaded before crawling: zips are overwritten as they complete.
+        changeset = ChangesetBuilder(snapshot.iter_zip_agents(zip_codes))
+
+    scheduler: Optional[ZipScheduler] = None
+    if settings.schedule_zips:
+        scheduler = ZipScheduler(
+            saturation=settings.schedule_saturation,
+            saturated_pages=settings.schedule_saturated_pages,
+            request_budget=settings.request_budget,
+            deadline=settings.schedule_deadline_seconds,
+        )
+
+    extractor = AgentExtractor(
+        client=client,
+        logger=logger,
+        workers=settings.workers,
+        journal=journal,
+        snapshot=snapshot,
+        metrics=metrics,
+        scheduler=scheduler,
+    )
+
+    sharded: Optional[ShardedCrawl] = None
+    if sharded_run:
+        queue_path = settings.work_queue_path
+        if queue_path is None:
+            queue_path = output_path.with_name(output_path.name + ".queue.sqlite3")
+        sharded = build_sharded_crawl(
+            settings, resolve_path(queue_path, project_root), cookie, user_agent
+        )
+    failure_summary = sharded.failure_summary if sharded is not None else extractor.failure_summary
+
+    profiler: Optional[RunProfiler] = None
+    if args.profile:
+        profiler = build_profiler(
+            args.profile,
+            output_path.with_name(output_path.name + ".profile"),
+            top_n=args.profile_top,
+            trace_frames=args.profile_frames,
+        )
+        metrics.stage_clock = profiler.clock
+        profiler.start()
+
     logger.info("Starting scrape for zip codes: %s", ", ".join(zip_codes))
+    agents: Iterable[Dict[str, Any]]
     try:
-        agents = extractor.extract_for_zip_codes(
-            zip_codes=zip_codes,
-            max_per_zip=None,
-            trial_limit=settings.trial_limit,
-        )
+        if sharded is not None:
+            counts = sharded.run(zip_codes)
+            agents = sharded.iter_agents()
+            if settings.trial_limit is not None:
+                # Workers crawl whole zips; the limit applies to the merge.
+                agents = itertools.islice(agents, max(0, settings.trial_limit))
+        elif args.use_async:
+            agents = asyncio.run(
+                run_async_extraction(
+                    settings, zip_codes, cookie, user_agent, failures=extractor.failures
+                )
+            )
+        else:
+            agents = extractor.iter_agents(
+                zip_codes=zip_codes,
+                max_per_zip=None,
+                trial_limit=settings.trial_limit,
+            )
+        agent_iter = iter(agents)
+        first_agent = next(agent_iter, None)
     except Exception as exc:
         logger.error("Scraping failed: %s", exc, exc_info=True)
         raise SystemExit(1)
 
-    if not agents:
+    failures_path = output_path.with_name(output_path.name + ".failures.json")
+    if first_agent is None:
+        log_failure_summary(failure_summary(), failures_path)
+        if journal is not None:
+            # Keep the journal when pages failed so --resume can retry them.
+            journal.close(remove=not extractor.failures)
+        if sharded is not None:
+            sharded.close()
+        if snapshot_writer is not None:
+            snapshot_writer.stop()
+        if profiler is not None:
+            finish_profile(profiler)
         logger.warning("No agents were extracted. Exiting without writing output.")
         raise SystemExit(0)
 
+    # Agents are streamed into a partial file and only moved into place once
+    # the whole pipeline has finished; databases are updated in place.
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    if output_format == "json":
-        export_agents_to_json(agents, output_path)
+    if output_format in IN_PLACE_FORMATS:
+        partial_path = output_path
     else:
-        export_agents_to_csv(agents, output_path)
+        partial_path = output_path.with_name(output_path.name + ".part")
+    dedup: Optional[AgentDedupIndex] = None
+    try:
+        export_agents: Iterable[Dict[str, Any]] = itertools.chain([first_agent], agent_iter)
+        if changeset is not None:
+            export_agents = changeset.track(export_agents)
+        # The export consumes the crawl as it streams (with --dedup, the
+        # whole crawl is read into the index first), so this covers both.
+        with metrics.timer("export_seconds", format=output_format), metrics.stage("export"):
+            if settings.dedup:
+                # Merged records are only final once every zip has been seen.
+                dedup = AgentDedupIndex()
+                dedup.add_all(export_agents)
+                export_agents = dedup
+            written = EXPORTERS[output_format](export_agents, partial_path)
+    except Exception as exc:
+        logger.error("Scraping failed: %s", exc, exc_info=True)
+        raise SystemExit(1)
+    finally:
+        if parse_executor is not None:
+            parse_executor.shutdown()
+    if partial_path != output_path:
+        partial_path.replace(output_path)
+    if profiler is not None:
+        finish_profile(profiler)
+    if journal is not None:
+        journal.close(remove=not extractor.failures)
 
+    if sharded is not None:
+        summary = failure_summary()
+        log_failure_summary(summary, failures_path)
+        left = counts["pending"] + counts["leased"]
+        if left:
+            logger.warning(
+                "%d zip code(s) were not crawled; rerun with the same work queue (%s) "
+                "to continue",
+                left,
+                sharded.queue_path,
+            )
+        # Keep the queue while anything is left to retry.
+        sharded.close(remove=not left and not summary["failed_units"])
+    elif not args.use_async:
+        clients = client.clients if isinstance(client, PooledRealtorClient) else [client]
+        strategy_counts: Dict[str, int] = {}
+        for each in clients:
+            for strategy, count in each.parse_strategy_counts.items():
+                strategy_counts[strategy] = strategy_counts.get(strategy, 0) + count
+        log_parse_strategies(strategy_counts)
+        retries = sum(each.retry_count for each in clients)
+        trips = sum(each.circuit_breaker.trips for each in clients)
+        if retries or trips:
+            logger.info(
+                "Retried %d request(s); circuit breaker tripped %d time(s)", retries, trips
+            )
+        if isinstance(client, PooledRealtorClient):
+            logger.info("Identities: %s", json.dumps(client.pool.summary()))
+        if scheduler is not None:
+            logger.info("Zip scheduler: %s", json.dumps(scheduler.summary()))
+        log_failure_summary(failure_summary(), failures_path)
+    else:
+        log_failure_summary(failure_summary(), failures_path)
+    if dedup is not None:
+        logger.info("Deduplication: %s", dedup.summary())
+    if changeset is not None and snapshot is not None:
+        changes = changeset.build(extractor.refreshed_zips)
+        changes_path = output_path.with_name(output_path.name + ".changes.json")
+        with changes_path.open("w", encoding="utf-8") as f:
+            json.dump(changes, f, indent=2, ensure_ascii=False, default=to_jsonable)
+        snapshot.close()
+        logger.info(
+            "Delta crawl: %d zip(s) unchanged, %d refetched; added=%d updated=%d "
+            "removed=%d written to %s",
+            extractor.delta_stats["unchanged"],
+            extractor.delta_stats["changed"],
+            changes["summary"]["added"],
+            changes["summary"]["updated"],
+            changes["summary"]["removed"],
+            changes_path,
+        )
+    if response_cache is not None:
+        logger.info("Response cache: %s", response_cache.summary())
+        response_cache.close()
+    if parse_cache is not None:
+        logger.info("Parse cache: %s", parse_cache.summary())
+        parse_cache.close()
+    if snapshot_writer is not None:
+        snapshot_writer.stop()
+    if metrics.enabled:
+        logger.info("Metrics:\n%s", metrics.summary_table())
     logger.info(
         "Scraping complete. Wrote %d agents to %s",
-        len(agents),
+        written,
         output_path,
     )
 
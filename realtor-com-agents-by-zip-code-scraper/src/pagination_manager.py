@@ -8,6 +8,9 @@ class PaginationManager:
 
     This does not rely on site-specific next-page markers; instead, it uses
     generic conditions such as: presence of results and optional max limit.
+    When a page advertises the total result count, :meth:`plan_last_page`
+    turns it into an exact page count so the trailing empty page is never
+    requested.
     """
 
     min_agents_per_page: int = 1
@@ -19,11 +22,35 @@ class PaginationManager:
         agents_on_page: int,
         total_agents: int,
         max_agents: Optional[int],
+        last_page: Optional[int] = None,
     ) -> bool:
+        if last_page is not None and page_number >= last_page:
+            return False
         if max_agents is not None and total_agents >= max_agents:
             return False
         if agents_on_page < self.min_agents_per_page:
             return False
         if self.max_pages is not None and page_number >= self.max_pages:
             return False
-        return True
\ No newline at end of file
+        return True
+
+    def may_have_next_page(self, page_number: int) -> bool:
+        """Whether a page after ``page_number`` could still be requested."""
+        return self.max_pages is None or page_number < self.max_pages
+
+    def plan_last_page(
+        self,
+        total_count: Optional[int],
+        page_size: Optional[int],
+    ) -> Optional[int]:
+        """
+        Number of the last page holding results, or ``None`` if unknown.
+
+        Capped by ``max_pages``; a reported total of zero plans one page.
+        """
+        if total_count is None or not page_size:
+            return None
+        last_page = max(1, -(-total_count // page_size))
+        if self.max_pages is not None:
+            last_page = min(last_page, self.max_pages)
+        return last_page
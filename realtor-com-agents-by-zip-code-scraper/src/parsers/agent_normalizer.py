@@ -1,4 +1,41 @@
-from typing import Any, Dict, Optional
+import re
+import sys
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from parsers.agent_record import FIELD_ORDER, AgentRecord, intern_text
+
+_LIST_SEPARATORS = re.compile(r"[,;]")
+# Below this size the per-column setup costs more than it saves.
+BATCH_MIN_ROWS = 64
+
+def split_list_field(raw: Optional[str]) -> List[str]:
+    """Canonical list for a comma/semicolon separated field (phones, zips)."""
+    if not raw:
+        return []
+    return [part for part in map(str.strip, _LIST_SEPARATORS.split(raw)) if part]
+
+def _clean_column(
+    values: List[Optional[str]], clean: Callable[[str], str]
+) -> List[str]:
+    """Clean each distinct value once; repeated zip/area strings are common."""
+    cache: Dict[str, str] = {}
+    out: List[str] = []
+    append = out.append
+    for value in values:
+        if not value:
+            append("")
+            continue
+        cleaned = cache.get(value)
+        if cleaned is None:
+            cleaned = cache[value] = clean(value)
+        append(cleaned)
+    return out
+
+def _interned(values: List[Optional[str]]) -> List[Optional[str]]:
+    # Same as intern_text per value, without a Python call per agent.
+    intern = sys.intern
+    return [intern(value) if value and isinstance(value, str) else value for value in values]
 
 class AgentNormalizer:
     """
@@ -6,21 +43,7 @@ class AgentNormalizer:
     described in the project README.
     """
 
-    FIELD_ORDER = [
-        "Agent name",
-        "Website",
-        "Email",
-        "Listing count",
-        "Sold count",
-        "Office Phone",
-        "Mobile Phones",
-        "Areas serviced",
-        "Zip codes serviced",
-        "Office / Company name",
-        "Company Website",
-        "Review count",
-        "Agent Photo",
-    ]
+    FIELD_ORDER = FIELD_ORDER
 
     def _clean_phones(self, raw: Optional[str]) -> str:
         if not raw:
@@ -43,37 +66,85 @@ class AgentNormalizer:
         # Fallback to the context zip code if provided
         return context_zip or ""
 
+    def normalize_record(self, raw: Dict[str, Any]) -> AgentRecord:
+        """Normalize ``raw`` into a compact :class:`AgentRecord`."""
+        return AgentRecord(
+            name=raw.get("name") or "",
+            website=raw.get("profile_url") or "",
+            email=raw.get("email") or "",
+            listing_count=int(raw.get("listing_count") or 0),
+            sold_count=int(raw.get("sold_count") or 0),
+            office_phone=raw.get("office_phone") or "",
+            mobile_phones=self._clean_phones(raw.get("mobile_phones_raw")),
+            areas_serviced=self._clean_areas(raw.get("areas_serviced_raw")),
+            zip_codes_serviced=self._clean_zip_codes(
+                raw.get("zip_codes_serviced_raw"),
+                raw.get("zip_code_context"),
+            ),
+            office_name=raw.get("office_name") or "",
+            company_website=raw.get("company_website"),
+            review_count=int(raw.get("review_count") or 0),
+            photo_url=raw.get("photo_url"),
+        )
+
     def normalize(self, raw: Dict[str, Any]) -> Dict[str, Any]:
-        agent_name = raw.get("name") or ""
-        website = raw.get("profile_url") or ""
-        email = raw.get("email") or ""
-        listing_count = raw.get("listing_count") or 0
-        sold_count = raw.get("sold_count") or 0
-        office_phone = raw.get("office_phone") or ""
-        mobile_phones = self._clean_phones(raw.get("mobile_phones_raw"))
-        areas_serviced = self._clean_areas(raw.get("areas_serviced_raw"))
-        zip_codes_serviced = self._clean_zip_codes(
-            raw.get("zip_codes_serviced_raw"),
-            raw.get("zip_code_context"),
+        return self.normalize_record(raw).to_dict()
+
+    def normalize_batch(self, raws: Iterable[Dict[str, Any]]) -> List[AgentRecord]:
+        """
+        Normalize a page (or many pages) of raw agents column-wise.
+
+        Produces exactly what :meth:`normalize_record` does per agent, but
+        each field is processed as one column and every distinct
+        phone/area/zip string is cleaned only once per batch. Batches smaller
+        than ``BATCH_MIN_ROWS`` are normalized record by record.
+        """
+        rows = raws if isinstance(raws, list) else list(raws)
+        if len(rows) < BATCH_MIN_ROWS:
+            return [self.normalize_record(raw) for raw in rows]
+
+        def column(key: str) -> List[Any]:
+            return list(map(dict.get, rows, repeat(key)))
+
+        def text(key: str) -> List[str]:
+            return [value or "" for value in column(key)]
+
+        def count(key: str) -> List[int]:
+            return [int(value) if value else 0 for value in column(key)]
+
+        phones = _clean_column(
+            column("mobile_phones_raw"), lambda raw: ", ".join(split_list_field(raw))
+        )
+        areas = _clean_column(
+            column("areas_serviced_raw"), lambda raw: sys.intern(" ".join(raw.split()))
         )
-        office_name = raw.get("office_name") or ""
-        company_website = raw.get("company_website")
-        review_count = raw.get("review_count") or 0
-        photo_url = raw.get("photo_url")
-
-        normalized: Dict[str, Any] = {
-            "Agent name": agent_name,
-            "Website": website,
-            "Email": email,
-            "Listing count": int(listing_count),
-            "Sold count": int(sold_count),
-            "Office Phone": office_phone,
-            "Mobile Phones": mobile_phones,
-            "Areas serviced": areas_serviced,
-            "Zip codes serviced": zip_codes_serviced,
-            "Office / Company name": office_name,
-            "Company Website": company_website,
-            "Review count": int(review_count),
-            "Agent Photo": photo_url,
-        }
-        return normalized
\ No newline at end of file
+        raw_zips = column("zip_codes_serviced_raw")
+        zips = _clean_column(
+            raw_zips, lambda raw: sys.intern(", ".join(split_list_field(raw)))
+        )
+        # Blank zip lists fall back to the zip code the page was fetched for.
+        zips = [
+            cleaned if raw and not raw.isspace() else intern_text(context or "")
+            for cleaned, raw, context in zip(zips, raw_zips, column("zip_code_context"))
+        ]
+
+        # Values are interned column-wise above, so skip AgentRecord.__init__.
+        make = AgentRecord.from_values
+        return [
+            make(values)
+            for values in zip(
+                text("name"),
+                text("profile_url"),
+                text("email"),
+                count("listing_count"),
+                count("sold_count"),
+                _interned(text("office_phone")),
+                phones,
+                areas,
+                zips,
+                _interned(text("office_name")),
+                _interned(column("company_website")),
+                count("review_count"),
+                column("photo_url"),
+            )
+        ]
@@ -0,0 +1,130 @@
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional
+
+# Output field -> attribute, in the schema's column order.
+FIELD_SLOTS = (
+    ("Agent name", "name"),
+    ("Website", "website"),
+    ("Email", "email"),
+    ("Listing count", "listing_count"),
+    ("Sold count", "sold_count"),
+    ("Office Phone", "office_phone"),
+    ("Mobile Phones", "mobile_phones"),
+    ("Areas serviced", "areas_serviced"),
+    ("Zip codes serviced", "zip_codes_serviced"),
+    ("Office / Company name", "office_name"),
+    ("Company Website", "company_website"),
+    ("Review count", "review_count"),
+    ("Agent Photo", "photo_url"),
+)
+FIELD_ORDER = [field for field, _ in FIELD_SLOTS]
+_SLOT_BY_FIELD = dict(FIELD_SLOTS)
+
+def intern_text(value: Optional[str]) -> Optional[str]:
+    """Share one copy of strings that repeat across agents (offices, zips, areas)."""
+    # Anything else a parser hands over is kept as is, like a plain dict would.
+    return sys.intern(value) if value and isinstance(value, str) else value
+
+class AgentRecord(Mapping):
+    """
+    Compact, slotted normalized agent.
+
+    A record costs a fixed 13-pointer object instead of a 13-key dict, and
+    strings that repeat across agents are interned. It is a ``Mapping``
+    keyed by the output field names (``record["Agent name"]``, with item
+    assignment for known fields), compares equal to the equivalent dict,
+    and :meth:`to_dict` returns the exact dict the JSON/CSV exporters have
+    always written.
+    """
+
+    __slots__ = tuple(slot for _, slot in FIELD_SLOTS)
+
+    def __init__(
+        self,
+        name: str,
+        website: str,
+        email: str,
+        listing_count: int,
+        sold_count: int,
+        office_phone: str,
+        mobile_phones: str,
+        areas_serviced: str,
+        zip_codes_serviced: str,
+        office_name: str,
+        company_website: Optional[str],
+        review_count: int,
+        photo_url: Optional[str],
+    ) -> None:
+        self.name = name
+        self.website = website
+        self.email = email
+        self.listing_count = listing_count
+        self.sold_count = sold_count
+        self.office_phone = intern_text(office_phone)
+        self.mobile_phones = mobile_phones
+        self.areas_serviced = intern_text(areas_serviced)
+        self.zip_codes_serviced = intern_text(zip_codes_serviced)
+        self.office_name = intern_text(office_name)
+        self.company_website = intern_text(company_website)
+        self.review_count = review_count
+        self.photo_url = photo_url
+
+    @classmethod
+    def from_values(cls, values: Any) -> "AgentRecord":
+        """Build from field values in ``FIELD_ORDER`` that are already interned."""
+        record = object.__new__(cls)
+        (
+            record.name,
+            record.website,
+            record.email,
+            record.listing_count,
+            record.sold_count,
+            record.office_phone,
+            record.mobile_phones,
+            record.areas_serviced,
+            record.zip_codes_serviced,
+            record.office_name,
+            record.company_website,
+            record.review_count,
+            record.photo_url,
+        ) = values
+        return record
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "AgentRecord":
+        return cls(*(data.get(field) for field in FIELD_ORDER))
+
+    def __getitem__(self, field: str) -> Any:
+        try:
+            return getattr(self, _SLOT_BY_FIELD[field])
+        except KeyError:
+            raise KeyError(field) from None
+
+    def __setitem__(self, field: str, value: Any) -> None:
+        # Lets merges (e.g. AgentDedupIndex) update a record in place.
+        setattr(self, _SLOT_BY_FIELD[field], value)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELD_ORDER)
+
+    def __len__(self) -> int:
+        return len(FIELD_SLOTS)
+
+    def copy(self) -> "AgentRecord":
+        return AgentRecord(*(getattr(self, slot) for _, slot in FIELD_SLOTS))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, slot) for field, slot in FIELD_SLOTS}
+
+    def __repr__(self) -> str:
+        return f"AgentRecord({self.to_dict()!r})"
+
+    def __reduce__(self) -> Any:
+        return (AgentRecord, tuple(getattr(self, slot) for _, slot in FIELD_SLOTS))
+
+def to_jsonable(value: Any) -> Any:
+    """``json.dumps(default=...)`` hook that serializes records as dicts."""
+    if isinstance(value, AgentRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
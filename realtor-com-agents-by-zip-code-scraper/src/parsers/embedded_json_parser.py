@@ -0,0 +1,217 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+# Next.js pages ship their props in <script id="__NEXT_DATA__" ...>{...}</script>.
+NEXT_DATA_MARKERS = ('id="__NEXT_DATA__"', "id='__NEXT_DATA__'")
+AGENT_LIST_KEYS = ("agents", "agent_list", "agentList")
+TOTAL_COUNT_KEYS = ("matching_rows", "total_count", "totalCount", "total")
+PAGE_SIZE_KEYS = ("limit", "page_size", "pageSize")
+
+_NEXT_DATA_MARKERS_BYTES = tuple(marker.encode("ascii") for marker in NEXT_DATA_MARKERS)
+
+def _find_payload_text(html: Union[str, bytes]) -> Optional[Union[str, bytes]]:
+    """Locate the embedded JSON with plain substring scans (no DOM)."""
+    if isinstance(html, str):
+        markers: Tuple[Any, ...] = NEXT_DATA_MARKERS
+        tag_end: Any = ">"
+        script_end: Any = "</script>"
+    else:
+        # UTF-8 bytes: json.loads decodes the payload slice directly.
+        markers, tag_end, script_end = _NEXT_DATA_MARKERS_BYTES, b">", b"</script>"
+    marker = -1
+    for candidate in markers:
+        marker = html.find(candidate)
+        if marker >= 0:
+            break
+    if marker < 0:
+        return None
+    start = html.find(tag_end, marker)
+    if start < 0:
+        return None
+    end = html.find(script_end, start)
+    if end < 0:
+        return None
+    return html[start + 1 : end]
+
+def _find_agent_list(
+    node: Any, depth: int = 0
+) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+    """
+    Depth-first search for the first ``agents``-style list of objects.
+
+    Returns the list together with the object holding it, whose sibling keys
+    usually carry the result totals. An empty list only counts next to a
+    total count, so an unrelated empty ``agents`` key does not pass for a
+    page without results.
+    """
+    if depth > 12:
+        return None
+    if isinstance(node, dict):
+        for key in AGENT_LIST_KEYS:
+            value = node.get(key)
+            if (
+                isinstance(value, list)
+                and all(isinstance(v, dict) for v in value)
+                and (value or any(k in node for k in TOTAL_COUNT_KEYS))
+            ):
+                return value, node
+        children: Iterable[Any] = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        if isinstance(child, (dict, list)):
+            found = _find_agent_list(child, depth + 1)
+            if found is not None:
+                return found
+    return None
+
+def _int_field(container: Dict[str, Any], keys: Iterable[str]) -> Optional[int]:
+    for key in keys:
+        value = container.get(key)
+        if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+            return value
+    return None
+
+def _first(item: Dict[str, Any], *paths: str) -> Any:
+    """Return the first non-empty value among dotted ``paths``."""
+    for path in paths:
+        value: Any = item
+        for part in path.split("."):
+            if not isinstance(value, dict):
+                value = None
+                break
+            value = value.get(part)
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+def _as_int(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        digits = "".join(ch for ch in value if ch.isdigit())
+        return int(digits) if digits else None
+    return None
+
+def _text(value: Any) -> Optional[str]:
+    """Scalar payload values as text; objects and lists are dropped."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return str(value)
+    return None
+
+def _join(value: Any, field: str = "name") -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        parts = []
+        for entry in value:
+            if isinstance(entry, dict):
+                entry = entry.get(field)
+            if entry not in (None, ""):
+                parts.append(str(entry))
+        return ", ".join(parts) if parts else None
+    return str(value)
+
+def _phones_of_type(phones: Any, kinds: Iterable[str]) -> List[str]:
+    if not isinstance(phones, list):
+        return []
+    wanted = {k.lower() for k in kinds}
+    numbers = []
+    for phone in phones:
+        if isinstance(phone, dict) and str(phone.get("type", "")).lower() in wanted:
+            number = phone.get("number")
+            if number:
+                numbers.append(str(number))
+    return numbers
+
+def _map_agent(item: Dict[str, Any], zip_code: Optional[str]) -> Dict[str, Any]:
+    name = _text(_first(item, "full_name", "person_name", "name", "nick_name"))
+    if name is None:
+        first_last = " ".join(
+            str(p) for p in (item.get("first_name"), item.get("last_name")) if p
+        )
+        name = first_last or None
+
+    phones = item.get("phones")
+    office_phones = _phones_of_type(phones, ("office",))
+    mobile_phones = _phones_of_type(phones, ("mobile", "cell"))
+    office_phone = office_phones[0] if office_phones else _first(item, "office_phone")
+    if office_phone is None:
+        office_phone_list = _first(item, "office.phones")
+        if isinstance(office_phone_list, list) and office_phone_list:
+            entry = office_phone_list[0]
+            office_phone = entry.get("number") if isinstance(entry, dict) else entry
+
+    return {
+        "name": name,
+        "profile_url": _text(_first(item, "web_url", "href", "profile_url", "url")),
+        "email": _text(_first(item, "email")),
+        "listing_count": _as_int(
+            _first(item, "for_sale_price.count", "for_sale.count", "listings_count", "listing_count")
+        ),
+        "sold_count": _as_int(
+            _first(item, "recently_sold.count", "sold_count", "sold.count")
+        ),
+        "office_phone": _text(office_phone),
+        "mobile_phones_raw": ", ".join(mobile_phones) if mobile_phones else _join(
+            _first(item, "mobile_phones")
+        ),
+        "areas_serviced_raw": _join(_first(item, "served_areas", "areas_serviced")),
+        "zip_codes_serviced_raw": _join(_first(item, "zips", "zip_codes", "served_zips")),
+        "office_name": _text(_first(item, "office.name", "broker.name", "office_name")),
+        "company_website": _text(
+            _first(item, "office.website", "office.href", "company_website")
+        ),
+        "review_count": _as_int(
+            _first(item, "review_count", "reviews_count", "ratings.count")
+        ),
+        "photo_url": _text(_first(item, "photo.href", "photo_url", "photo")),
+        "zip_code_context": zip_code,
+    }
+
+def parse_embedded_results(
+    html: Union[str, bytes], zip_code: Optional[str] = None
+) -> Optional[Tuple[List[Dict[str, Any]], Optional[int], Optional[int]]]:
+    """
+    Like :func:`parse_embedded_agents`, but also return the advertised total
+    result count and page size (``None`` when the payload omits them).
+    """
+    text = _find_payload_text(html)
+    if text is None:
+        return None
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return None
+    found = _find_agent_list(payload)
+    if found is None:
+        return None
+    agents, container = found
+    return (
+        [_map_agent(item, zip_code) for item in agents],
+        _int_field(container, TOTAL_COUNT_KEYS),
+        _int_field(container, PAGE_SIZE_KEYS),
+    )
+
+def parse_embedded_agents(
+    html: Union[str, bytes], zip_code: Optional[str] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Extract agents from an embedded ``__NEXT_DATA__`` payload.
+
+    Returns the raw agent dicts (same schema as ``parse_agents_html``), or
+    ``None`` when the page carries no usable payload so callers can fall
+    back to DOM parsing. An empty list means the payload reported no agents.
+    """
+    results = parse_embedded_results(html, zip_code=zip_code)
+    return results[0] if results is not None else None
@@ -1,6 +1,49 @@
-from typing import Any, Dict, List, Optional
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
+
+from parsers.embedded_json_parser import parse_embedded_results
+
+STRATEGY_EMBEDDED_JSON = "embedded_json"
+STRATEGY_DOM = "dom"
+
+# A page as fetched: text, or UTF-8 bytes from a streamed read.
+PageSource = Union[str, bytes]
+
+DEFAULT_BACKEND = "html.parser"
+SUPPORTED_BACKENDS = ("html.parser", "lxml")
+
+# "245 agents found", "Showing 1-20 of 245 agents", ...
+_RESULT_COUNT_PATTERNS = (
+    re.compile(r"([\d,]+)\s+(?:real estate\s+)?agents?\s+found", re.IGNORECASE),
+    re.compile(r"\bof\s+([\d,]+)\s+(?:real estate\s+)?(?:agents|results)\b", re.IGNORECASE),
+)
+_RESULT_COUNT_PATTERNS_BYTES = tuple(
+    re.compile(pattern.pattern.encode("ascii"), pattern.flags & ~re.UNICODE)
+    for pattern in _RESULT_COUNT_PATTERNS
+)
+
+# Class name -> card field, mirroring the CSS selectors this parser has
+# always used (".agent-name", ".listing-count", ...). A card's elements are
+# walked once and each field keeps its first match in document order, which
+# is exactly what ``card.select_one(<selector list>)`` returns.
+_CLASS_FIELDS = {
+    "agent-name": "name",
+    "listing-count": "listing",
+    "sold-count": "sold",
+    "office-phone": "office_phone",
+    "mobile-phone": "mobile_phones",
+    "mobile-phones": "mobile_phones",
+    "areas-serviced": "areas",
+    "zip-codes-serviced": "zips",
+    "zip-codes": "zips",
+    "office-name": "office_name",
+    "company-name": "office_name",
+    "review-count": "review_count",
+    "reviews": "reviews",
+}
 
 def _extract_int(text: Optional[str]) -> Optional[int]:
     if not text:
@@ -10,15 +53,128 @@ def _extract_int(text: Optional[str]) -> Optional[int]:
         return None
     return int(digits)
 
-def parse_agents_html(html: str, zip_code: Optional[str] = None) -> List[Dict[str, Any]]:
+def extract_result_count(html: PageSource) -> Optional[int]:
+    """Advertised total number of agents for the search, if the page shows one."""
+    if isinstance(html, bytes):
+        for pattern in _RESULT_COUNT_PATTERNS_BYTES:
+            match = pattern.search(html)
+            if match:
+                return _extract_int(match.group(1).decode("ascii"))
+        return None
+    for pattern in _RESULT_COUNT_PATTERNS:
+        match = pattern.search(html)
+        if match:
+            return _extract_int(match.group(1))
+    return None
+
+def resolve_backend(backend: Optional[str]) -> str:
     """
-    Parse Realtor-like HTML and return a list of raw agent dictionaries.
+    Map a configured backend name to a BeautifulSoup tree builder.
 
-    This parser is resilient and uses generic selectors so it can work with
-    simplified HTML used in tests and modest changes in the real site.
+    ``lxml`` is an optional dependency; when it is not installed the
+    pure-Python ``html.parser`` is used instead.
+    """
+    if not backend:
+        return DEFAULT_BACKEND
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(
+            f"Unsupported parser backend {backend!r}; "
+            f"expected one of {', '.join(SUPPORTED_BACKENDS)}."
+        )
+    if backend == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            return DEFAULT_BACKEND
+    return backend
+
+def _walk_card(card: Tag) -> Dict[str, Tag]:
+    """Resolve every card field in a single traversal of its descendants."""
+    found: Dict[str, Tag] = {}
+    for el in card.descendants:
+        if not isinstance(el, Tag):
+            continue
+
+        classes = el.get("class") or ()
+        for cls in classes:
+            field = _CLASS_FIELDS.get(cls)
+            if field is not None and field not in found:
+                found[field] = el
+        if "company-website" in classes and "company_website" not in found and el.has_attr("href"):
+            found["company_website"] = el
+
+        tag_name = el.name
+        if tag_name == "a":
+            if "name" not in found and el.get("data-testid") == "agent-name":
+                found["name"] = el
+            href = el.get("href")
+            if href is not None:
+                if "email" not in found and href.startswith("mailto:"):
+                    found["email"] = el
+                if "profile_link" not in found and (
+                    "agent-profile-link" in classes or "realestateagents" in href
+                ):
+                    found["profile_link"] = el
+            elif "profile_link" not in found and "agent-profile-link" in classes:
+                found["profile_link"] = el
+        elif tag_name == "img" and "photo" not in found:
+            if "agent-photo" in classes or el.get("data-testid") == "agent-photo":
+                found["photo"] = el
+    return found
+
+def _text(el: Optional[Tag], strip: bool = True) -> Optional[str]:
+    return el.get_text(strip=strip) if el is not None else None
+
+def _attr(el: Optional[Tag], name: str) -> Optional[str]:
+    return el[name] if el is not None and el.has_attr(name) else None
+
+def _extract_card(card: Tag, zip_code: Optional[str]) -> Dict[str, Any]:
+    found = _walk_card(card)
+    name_el = found.get("name")
+    profile_link_el = (
+        name_el if name_el is not None and name_el.has_attr("href") else found.get("profile_link")
+    )
+    review_el = found.get("review_count") or found.get("reviews")
+
+    return {
+        "name": _text(name_el),
+        "profile_url": _attr(profile_link_el, "href"),
+        "email": _text(found.get("email")),
+        "listing_count": _extract_int(_text(found.get("listing"))),
+        "sold_count": _extract_int(_text(found.get("sold"))),
+        "office_phone": _text(found.get("office_phone")),
+        "mobile_phones_raw": _text(found.get("mobile_phones")),
+        "areas_serviced_raw": _text(found.get("areas"), strip=False),
+        "zip_codes_serviced_raw": _text(found.get("zips")),
+        "office_name": _text(found.get("office_name")),
+        "company_website": _attr(found.get("company_website"), "href"),
+        "review_count": _extract_int(_text(review_el)),
+        "photo_url": _attr(found.get("photo"), "src"),
+        "zip_code_context": zip_code,
+    }
+
+@dataclass
+class ParseResult:
+    """
+    Agents parsed from one page and the strategy that produced them.
+
+    ``total_count`` and ``page_size`` are the search totals the page
+    advertises, when it does; they let pagination be planned up front.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    agents: List[Dict[str, Any]] = []
+
+    agents: List[Dict[str, Any]]
+    strategy: str
+    total_count: Optional[int] = None
+    page_size: Optional[int] = None
+
+def _parse_dom(
+    html: PageSource, zip_code: Optional[str], backend: Optional[str]
+) -> List[Dict[str, Any]]:
+    if isinstance(html, bytes):
+        # Declared up front so the tree builder skips charset detection.
+        soup = BeautifulSoup(html, resolve_backend(backend), from_encoding="utf-8")
+    else:
+        soup = BeautifulSoup(html, resolve_backend(backend))
 
     # Primary heuristic: cards with a generic 'agent-card' class
     cards = soup.select(".agent-card")
@@ -26,44 +182,46 @@ def parse_agents_html(html: str, zip_code: Optional[str] = None) -> List[Dict[st
         # Fallback heuristics
         cards = soup.select("[data-testid*='agent-card'], article")
 
-    for card in cards:
-        name_el = card.select_one(".agent-name, a.agent-name, a[data-testid='agent-name']")
-        profile_link_el = name_el if name_el and name_el.has_attr("href") else card.select_one(
-            "a.agent-profile-link, a[href*='realestateagents']"
+    return [_extract_card(card, zip_code) for card in cards]
+
+def parse_agents_page(
+    html: PageSource, zip_code: Optional[str] = None, backend: Optional[str] = None
+) -> ParseResult:
+    """
+    Parse one results page, preferring the embedded JSON payload.
+
+    The DOM heuristics only run when the page has no usable payload; the
+    returned :class:`ParseResult` records which strategy was used and any
+    advertised result totals. ``html`` may also be UTF-8 bytes, which are
+    parsed without being decoded to a ``str`` first.
+    """
+    embedded = parse_embedded_results(html, zip_code=zip_code)
+    if embedded is not None:
+        agents, total_count, page_size = embedded
+        if total_count is None:
+            total_count = extract_result_count(html)
+        return ParseResult(
+            agents=agents,
+            strategy=STRATEGY_EMBEDDED_JSON,
+            total_count=total_count,
+            page_size=page_size,
         )
-        email_el = card.select_one("a[href^='mailto:']")
-        listing_el = card.select_one(".listing-count")
-        sold_el = card.select_one(".sold-count")
-        office_phone_el = card.select_one(".office-phone")
-        mobile_phones_el = card.select_one(".mobile-phone, .mobile-phones")
-        areas_el = card.select_one(".areas-serviced")
-        zips_el = card.select_one(".zip-codes-serviced, .zip-codes")
-        office_name_el = card.select_one(".office-name, .company-name")
-        company_website_el = card.select_one(".company-website[href]")
-        photo_el = card.select_one("img.agent-photo, img[data-testid='agent-photo']")
-
-        raw: Dict[str, Any] = {
-            "name": name_el.get_text(strip=True) if name_el else None,
-            "profile_url": profile_link_el["href"] if profile_link_el and profile_link_el.has_attr("href") else None,
-            "email": email_el.get_text(strip=True) if email_el else None,
-            "listing_count": _extract_int(listing_el.get_text(strip=True) if listing_el else None),
-            "sold_count": _extract_int(sold_el.get_text(strip=True) if sold_el else None),
-            "office_phone": office_phone_el.get_text(strip=True) if office_phone_el else None,
-            "mobile_phones_raw": mobile_phones_el.get_text(strip=True) if mobile_phones_el else None,
-            "areas_serviced_raw": areas_el.get_text(strip=False) if areas_el else None,
-            "zip_codes_serviced_raw": zips_el.get_text(strip=True) if zips_el else None,
-            "office_name": office_name_el.get_text(strip=True) if office_name_el else None,
-            "company_website": company_website_el["href"] if company_website_el and company_website_el.has_attr("href") else None,
-            "review_count": _extract_int(
-                (card.select_one(".review-count") or card.select_one(".reviews"))
-                .get_text(strip=True)
-                if (card.select_one(".review-count") or card.select_one(".reviews"))
-                else None
-            ),
-            "photo_url": photo_el["src"] if photo_el and photo_el.has_attr("src") else None,
-            "zip_code_context": zip_code,
-        }
-
-        agents.append(raw)
-
-    return agents
\ No newline at end of file
+    return ParseResult(
+        agents=_parse_dom(html, zip_code, backend),
+        strategy=STRATEGY_DOM,
+        total_count=extract_result_count(html),
+    )
+
+def parse_agents_html(
+    html: str, zip_code: Optional[str] = None, backend: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Parse Realtor-like HTML and return a list of raw agent dictionaries.
+
+    This parser is resilient and uses generic selectors so it can work with
+    simplified HTML used in tests and modest changes in the real site.
+    ``backend`` selects the tree builder (see :data:`SUPPORTED_BACKENDS`).
+    Pages embedding a ``__NEXT_DATA__`` payload are decoded without
+    building a DOM at all (see :func:`parse_agents_page`).
+    """
+    return parse_agents_page(html, zip_code=zip_code, backend=backend).agents
@@ -1,24 +1,124 @@
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from pagination_manager import PaginationManager
-from parsers.html_parser import parse_agents_html
+from parsers.html_parser import PageSource, ParseResult, parse_agents_page
+from utils.metrics import NULL_METRICS
+from utils.page_stream import DEFAULT_CHUNK_SIZE, STREAM_ACCEPT_ENCODING, read_page_body
+from utils.rate_limiter import parse_retry_after
+from utils.retry import (
+    END_OF_RESULTS_STATUS_CODES,
+    REQUEST_BUDGET_EXHAUSTED,
+    FetchError,
+    RetryPolicy,
+    is_retryable_status,
+)
+
+def build_page_url(base_url: str, zip_code: str, page_number: int) -> str:
+    url = f"{base_url}/{zip_code}"
+    if page_number > 1:
+        url = f"{url}/pg-{page_number}"
+    return url
+
+def build_headers(user_agent: Optional[str]) -> Dict[str, str]:
+    headers = {
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+    if user_agent:
+        headers["User-Agent"] = user_agent
+    return headers
+
+def build_cookies(cookie: Optional[str]) -> Dict[str, str]:
+    cookies: Dict[str, str] = {}
+    if cookie:
+        cookies["KP_UIDz-ssn"] = cookie
+    return cookies
 
 @dataclass
 class RealtorClient:
+    """
+    Synchronous Realtor.com client.
+
+    With ``pipelined=True`` page N+1 is requested on a background thread
+    while page N is parsed; the speculative request is abandoned before it
+    is sent if pagination stops. ``parse_executor`` (e.g. a
+    ``ProcessPoolExecutor``) moves HTML parsing off the calling thread.
+
+    When a page advertises the zip's total result count, the remaining page
+    count is planned up front: the trailing empty page is not requested and,
+    with ``page_fanout > 1``, the remaining pages are fetched concurrently.
+
+    Transient failures (timeouts, connection errors, 429/5xx) are retried
+    per ``retry_policy``, optionally capped by a shared ``retry_budget`` and
+    gated by a ``circuit_breaker``. A page that still cannot be fetched
+    raises :class:`FetchError` instead of looking like the end of results.
+    Every request, retries included, draws from ``request_budget`` (a
+    ``RequestBudget`` or ``SharedRequestBudget``) when one is set; once it is spent further fetches fail without being sent.
+
+    Requests, bytes, retries, rate-limit waits and request/parse latencies
+    are recorded into ``metrics`` (a no-op unless a ``Metrics`` is given).
+
+    With ``streamed=True`` pages are requested compressed and read in
+    chunks; reading stops once the results are complete (see
+    ``utils.page_stream``) and the raw UTF-8 bytes go to the parser without
+    being decoded to ``str``. Cutting a body short closes its connection
+    unless only a little of it was left to read.
+
+    A ``parse_cache`` (``ParseCache``) returns the earlier parse of a page
+    whose body was seen before instead of parsing it again.
+
+    ``proxy`` routes the client's own session through an HTTP(S) proxy; a
+    pool of clients with different identities is ``PooledRealtorClient``.
+    """
+
     base_url: str
     rate_limiter: Optional[Any] = None
     session: Optional[requests.Session] = None
     user_agent: Optional[str] = None
     cookie: Optional[str] = None
     logger: Optional[Any] = None
+    max_connections: int = 10
+    pipelined: bool = False
+    page_fanout: int = 1
+    parse_executor: Optional[Executor] = None
+    parser_backend: Optional[str] = None
+    response_cache: Optional[Any] = None
+    parse_cache: Optional[Any] = None
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy)
+    retry_budget: Optional[Any] = None
+    circuit_breaker: Optional[Any] = None
+    request_budget: Optional[Any] = None
+    metrics: Any = NULL_METRICS
+    streamed: bool = False
+    stream_chunk_size: int = DEFAULT_CHUNK_SIZE
+    proxy: Optional[str] = None
 
     def __post_init__(self) -> None:
         if self.session is None:
             self.session = requests.Session()
+            # Size the keep-alive pool so concurrent zip workers sharing this
+            # client do not discard connections.
+            adapter = HTTPAdapter(
+                pool_connections=self.max_connections,
+                pool_maxsize=self.max_connections,
+            )
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+            if self.proxy:
+                self.session.proxies = {"http": self.proxy, "https": self.proxy}
         self.pagination = PaginationManager()
+        self.parse_strategy_counts: Dict[str, int] = {}
+        self.retry_count = 0
+        self._stats_lock = threading.Lock()
         if self.logger is None:
             # Lazy import to avoid circular dependency
             from utils.logger import get_logger
@@ -26,86 +126,385 @@ class RealtorClient:
             self.logger = get_logger(self.__class__.__name__)
 
     def _build_headers(self) -> Dict[str, str]:
-        headers = {
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-        if self.user_agent:
-            headers["User-Agent"] = self.user_agent
-        return headers
+        return build_headers(self.user_agent)
 
     def _build_cookies(self) -> Dict[str, str]:
-        cookies: Dict[str, str] = {}
-        if self.cookie:
-            cookies["KP_UIDz-ssn"] = self.cookie
-        return cookies
+        return build_cookies(self.cookie)
 
-    def _fetch_page(self, zip_code: str, page_number: int) -> str:
-        url = f"{self.base_url}/{zip_code}"
-        if page_number > 1:
-            url = f"{url}/pg-{page_number}"
-        params: Dict[str, str] = {}
+    def _wait_for_rate_limit(self, host: str) -> None:
+        # Adaptive limiters (TokenBucketRateLimiter) keep one bucket per host.
+        if hasattr(self.rate_limiter, "record_response"):
+            self.rate_limiter.wait(host)
+        else:
+            self.rate_limiter.wait()
+
+    def _record_response(self, response: Any, host: str) -> None:
+        record = getattr(self.rate_limiter, "record_response", None)
+        if record is None:
+            return
+        headers = getattr(response, "headers", None) or {}
+        record(response.status_code, headers.get("Retry-After"), host=host)
+
+    def _fetch_page(
+        self,
+        zip_code: str,
+        page_number: int,
+        cancelled: Optional[threading.Event] = None,
+    ) -> PageSource:
+        url = build_page_url(self.base_url, zip_code, page_number)
+
+        cached = None
+        if self.response_cache is not None:
+            cached = self.response_cache.lookup(url)
+            if cached is not None and cached.fresh:
+                # Fresh cache hits never touch the network or the rate budget.
+                if self.logger:
+                    self.logger.debug("Cache hit for %s", url)
+                self.metrics.inc("cache_hits_total")
+                return cached.body
 
         if self.logger:
             self.logger.debug("Fetching URL %s (page %d)", url, page_number)
 
-        if self.rate_limiter:
-            self.rate_limiter.wait()
+        host = urlsplit(url).netloc
+        attempt = 1
+        while True:
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.before_request()
+            if self.rate_limiter:
+                if self.metrics.enabled:
+                    with self.metrics.timer("rate_limit_wait_seconds"), self.metrics.stage(
+                        "rate_limit_wait"
+                    ):
+                        self._wait_for_rate_limit(host)
+                else:
+                    self._wait_for_rate_limit(host)
+
+            if cancelled is not None and cancelled.is_set():
+                if self.logger:
+                    self.logger.debug("Skipping cancelled prefetch of %s", url)
+                return ""
+            if self.request_budget is not None and not self.request_budget.try_consume():
+                raise FetchError(
+                    url,
+                    REQUEST_BUDGET_EXHAUSTED,
+                    retryable=False,
+                    zip_code=zip_code,
+                    page_number=page_number,
+                    attempts=attempt,
+                )
+
+            try:
+                if self.metrics.enabled:
+                    with self.metrics.stage("fetch"):
+                        page = self._request_page(url, host, cached)
+                else:
+                    page = self._request_page(url, host, cached)
+            except FetchError as exc:
+                exc.zip_code = zip_code
+                exc.page_number = page_number
+                exc.attempts = attempt
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record(False)
+                if (
+                    not exc.retryable
+                    or attempt >= self.retry_policy.max_attempts
+                    or (self.retry_budget is not None and not self.retry_budget.try_consume())
+                ):
+                    if self.logger:
+                        self.logger.warning(
+                            "Giving up on %s after %d attempt(s): %s", url, attempt, exc.message
+                        )
+                    raise
+                delay = self.retry_policy.delay_for(attempt, exc.retry_after)
+                if self.logger:
+                    self.logger.warning(
+                        "Request error for %s: %s; retry %d/%d in %.1fs",
+                        url,
+                        exc.message,
+                        attempt,
+                        self.retry_policy.max_attempts - 1,
+                        delay,
+                    )
+                with self._stats_lock:
+                    self.retry_count += 1
+                self.metrics.inc("retries_total")
+                time.sleep(delay)
+                attempt += 1
+                continue
 
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record(True)
+            return page
+
+    def _request_page(self, url: str, host: str, cached: Optional[Any]) -> PageSource:
+        """Issue one GET; classify failures as retryable or fatal."""
+        headers = self._build_headers()
+        if cached is not None:
+            headers.update(cached.conditional_headers())
+        options: Dict[str, Any] = {}
+        if self.streamed:
+            headers["Accept-Encoding"] = STREAM_ACCEPT_ENCODING
+            options["stream"] = True
+
+        started = time.perf_counter() if self.metrics.enabled else 0.0
         try:
             response = self.session.get(
                 url,
-                headers=self._build_headers(),
+                headers=headers,
                 cookies=self._build_cookies(),
-                params=params,
+                params={},
                 timeout=15,
+                **options,
             )
-            response.raise_for_status()
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            self.metrics.inc("requests_total", status="error")
+            raise FetchError(url, str(exc), retryable=True) from exc
         except requests.RequestException as exc:
+            self.metrics.inc("requests_total", status="error")
+            raise FetchError(url, str(exc), retryable=False) from exc
+
+        self._record_response(response, host)
+        status = response.status_code
+        if self.streamed and status >= 300:
+            # Not a page to stream; read the short body so the connection is reused.
+            response.content
+        if self.metrics.enabled:
+            self.metrics.observe("request_seconds", time.perf_counter() - started)
+            self.metrics.inc("requests_total", status=status)
+            # Streamed bodies are counted as far as they are read.
+            body = None if self.streamed else getattr(response, "content", None)
+            if body is not None:
+                self.metrics.inc("response_bytes_total", len(body))
+        if cached is not None and status == 304:
+            self.response_cache.mark_revalidated(cached)
+            return cached.body
+        if status in END_OF_RESULTS_STATUS_CODES:
             if self.logger:
-                self.logger.warning("Request error for %s: %s", url, exc)
+                self.logger.debug("No page at %s (HTTP %d)", url, status)
             return ""
+        if status >= 400:
+            response_headers = getattr(response, "headers", None) or {}
+            raise FetchError(
+                url,
+                f"HTTP {status}",
+                retryable=is_retryable_status(status),
+                status_code=status,
+                retry_after=parse_retry_after(response_headers.get("Retry-After")),
+            )
+
+        page = self._read_streamed(url, response) if self.streamed else response.text
+        if self.response_cache is not None and page:
+            response_headers = getattr(response, "headers", None) or {}
+            self.response_cache.store(
+                url,
+                page,
+                etag=response_headers.get("ETag"),
+                last_modified=response_headers.get("Last-Modified"),
+            )
+        return page
 
-        return response.text
+    def _read_streamed(self, url: str, response: Any) -> bytes:
+        try:
+            streamed = read_page_body(response, chunk_size=self.stream_chunk_size)
+        except (
+            requests.ConnectionError,
+            requests.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+        ) as exc:
+            raise FetchError(url, str(exc), retryable=True) from exc
+        except requests.RequestException as exc:
+            raise FetchError(url, str(exc), retryable=False) from exc
+        if self.metrics.enabled:
+            self.metrics.inc("response_bytes_total", len(streamed.body))
+            if streamed.truncated:
+                self.metrics.inc("truncated_pages_total")
+        return streamed.body
 
-    def search_agents_by_zip(
-        self, zip_code: str, max_records: Optional[int] = None
-    ) -> List[Dict[str, Any]]:
-        """Fetch and parse agents for a single zip code."""
-        agents: List[Dict[str, Any]] = []
-        page_number = 1
+    def _parse(self, html: PageSource, zip_code: str) -> ParseResult:
+        """Parse ``html``, or take the result from the parse cache."""
+        result: Optional[ParseResult] = None
+        cache_key = b""
+        if self.parse_cache is not None:
+            cache_key = self.parse_cache.key(html, zip_code, self.parser_backend)
+            result = self.parse_cache.lookup(cache_key)
+            if self.metrics.enabled:
+                self.metrics.inc(
+                    "parse_cache_lookups_total", result=("hit" if result is not None else "miss")
+                )
+        if result is None:
+            started = time.perf_counter()
+            if self.parse_executor is not None:
+                result = self.parse_executor.submit(
+                    parse_agents_page, html, zip_code, self.parser_backend
+                ).result()
+            else:
+                result = parse_agents_page(html, zip_code=zip_code, backend=self.parser_backend)
+            elapsed = time.perf_counter() - started
+            if self.metrics.enabled:
+                self.metrics.observe("parse_seconds", elapsed)
+            if self.parse_cache is not None:
+                self.parse_cache.store(cache_key, result, elapsed)
+        return result
 
-        while True:
-            html = self._fetch_page(zip_code, page_number)
-            if not html:
-                break
+    def _parse_page(self, html: PageSource, zip_code: str, page_number: int) -> ParseResult:
+        if self.metrics.enabled:
+            with self.metrics.stage("parse"):
+                result = self._parse(html, zip_code)
+        else:
+            result = self._parse(html, zip_code)
 
-            page_agents = parse_agents_html(html, zip_code=zip_code)
-            if not page_agents:
-                if self.logger:
-                    self.logger.debug(
-                        "No agents found on page %d for zip %s", page_number, zip_code
-                    )
-                break
+        with self._stats_lock:
+            self.parse_strategy_counts[result.strategy] = (
+                self.parse_strategy_counts.get(result.strategy, 0) + 1
+            )
+        if self.logger:
+            self.logger.debug(
+                "Parsed page %d for zip %s via %s (%d agents)",
+                page_number,
+                zip_code,
+                result.strategy,
+                len(result.agents),
+            )
+        return result
 
-            agents.extend(page_agents)
+    def _plan_last_page(
+        self,
+        result: ParseResult,
+        page_number: int,
+        total_agents: int,
+        max_records: Optional[int],
+    ) -> Optional[int]:
+        # Without an advertised page size it can only be inferred from a
+        # first page, which is full whenever more results follow.
+        page_size = result.page_size
+        if page_size is None and page_number == 1:
+            page_size = len(result.agents)
+        last_page = self.pagination.plan_last_page(result.total_count, page_size)
+        if last_page is not None and max_records is not None:
+            still_needed = max_records - total_agents - len(result.agents)
+            needed_pages = max(0, -(-still_needed // page_size))
+            last_page = min(last_page, page_number + needed_pages)
+        return last_page
 
-            if max_records is not None and len(agents) >= max_records:
-                agents = agents[:max_records]
-                break
+    def iter_agent_pages(
+        self,
+        zip_code: str,
+        max_records: Optional[int] = None,
+        start_page: int = 1,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield the raw agents of a zip code one page at a time, so callers can
+        process results without holding every page in memory. Pages are
+        consecutive from ``start_page`` (used to resume a partial zip).
+        """
+        total_agents = 0
+        page_number = start_page
+        last_page: Optional[int] = None
+        planned = False
+        executor: Optional[ThreadPoolExecutor] = None
+        # Speculative fetches for the pages after ``page_number``, in order.
+        pending: Deque["Future[PageSource]"] = deque()
+        cancel_prefetch = threading.Event()
+        if self.pipelined or self.page_fanout > 1:
+            executor = ThreadPoolExecutor(
+                max_workers=max(1, self.page_fanout), thread_name_prefix="prefetch"
+            )
 
-            if not self.pagination.should_continue(
-                page_number=page_number,
-                agents_on_page=len(page_agents),
-                total_agents=len(agents),
-                max_agents=max_records,
+        def schedule_ahead() -> None:
+            if executor is None:
+                return
+            if last_page is not None and self.page_fanout > 1:
+                depth = self.page_fanout
+            else:
+                depth = 1 if self.pipelined else 0
+            next_page = page_number + 1 + len(pending)
+            while (
+                len(pending) < depth
+                and self.pagination.may_have_next_page(next_page - 1)
+                and (last_page is None or next_page <= last_page)
             ):
-                break
+                pending.append(
+                    executor.submit(self._fetch_page, zip_code, next_page, cancel_prefetch)
+                )
+                next_page += 1
 
-            page_number += 1
+        try:
+            while True:
+                if pending:
+                    html = pending.popleft().result()
+                else:
+                    html = self._fetch_page(zip_code, page_number)
+                if not html:
+                    break
+
+                # The first page's advertised total may show there is no
+                # next page, so prefetching starts once it has been planned.
+                if planned:
+                    schedule_ahead()
+                result = self._parse_page(html, zip_code, page_number)
+                page_agents = result.agents
+                if not page_agents:
+                    if self.logger:
+                        self.logger.debug(
+                            "No agents found on page %d for zip %s", page_number, zip_code
+                        )
+                    break
+
+                if last_page is None:
+                    last_page = self._plan_last_page(
+                        result, page_number, total_agents, max_records
+                    )
+                    if last_page is not None and self.logger:
+                        self.logger.debug(
+                            "Zip %s advertises %d agents: planned %d page(s)",
+                            zip_code,
+                            result.total_count,
+                            last_page,
+                        )
+                    replan = last_page is not None or not planned
+                else:
+                    replan = False
+                planned = True
+
+                if max_records is not None and total_agents + len(page_agents) >= max_records:
+                    page_agents = page_agents[: max_records - total_agents]
+                    total_agents += len(page_agents)
+                    yield page_agents
+                    break
+
+                if replan:
+                    schedule_ahead()
+                total_agents += len(page_agents)
+                yield page_agents
+
+                if not self.pagination.should_continue(
+                    page_number=page_number,
+                    agents_on_page=len(page_agents),
+                    total_agents=total_agents,
+                    max_agents=max_records,
+                    last_page=last_page,
+                ):
+                    break
+
+                page_number += 1
+        finally:
+            if executor is not None:
+                # Speculative fetches still waiting on the rate limiter are
+                # dropped before they reach the network.
+                cancel_prefetch.set()
+                executor.shutdown(wait=False, cancel_futures=True)
 
         if self.logger:
             self.logger.info(
-                "Fetched %d raw agents for zip %s", len(agents), zip_code
+                "Fetched %d raw agents for zip %s", total_agents, zip_code
             )
-        return agents
\ No newline at end of file
+
+    def search_agents_by_zip(
+        self, zip_code: str, max_records: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Fetch and parse agents for a single zip code."""
+        agents: List[Dict[str, Any]] = []
+        for page_agents in self.iter_agent_pages(zip_code, max_records=max_records):
+            agents.extend(page_agents)
+        return agents
@@ -0,0 +1,299 @@
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from agent_extractor import AgentExtractor
+from parsers.agent_record import AgentRecord, to_jsonable
+from storage.work_queue import FAILED, SharedRequestBudget, WorkQueue
+from utils.logger import get_logger
+from utils.retry import REQUEST_BUDGET_EXHAUSTED, FailedUnit, summarize_failures
+
+# Builds a worker's client from its share of the request budget. Must be
+# picklable (a module-level function or a functools.partial of one) because
+# worker processes are spawned.
+ClientFactory = Callable[[Any], Any]
+
+class ShardWriter:
+    """One worker's output: a JSONL file with a line per finished zip."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = self.path.open("ab")
+
+    def write(
+        self, zip_code: str, agents: List[Dict[str, Any]], failures: List[FailedUnit]
+    ) -> int:
+        """Append a zip's agents durably and return the line's byte offset."""
+        record = {
+            "zip": zip_code,
+            "agents": agents,
+            "failures": [unit.to_dict() for unit in failures],
+        }
+        data = (json.dumps(record, ensure_ascii=False, default=to_jsonable) + "\n").encode("utf-8")
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(data)
+            self._file.flush()
+            # The queue points at this offset, so it must survive a crash.
+            os.fsync(self._file.fileno())
+        return offset
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+def run_shard_worker(
+    worker_id: str,
+    queue_path: Path,
+    shard_path: Path,
+    client_factory: ClientFactory,
+    threads: int = 1,
+    lease_seconds: float = 300.0,
+    poll_interval: float = 1.0,
+) -> None:
+    """
+    Crawl zips claimed from the work queue until none are left.
+
+    This is the entry point of every worker process, and of ``--join``
+    runs on other hosts. ``threads`` claim loops share one client. A zip
+    whose crawl ran into the exhausted request budget is handed back to
+    the queue unfinished and the worker stops. An unexpected error in a
+    claim loop hands its zip back too, stops the other loops and is raised
+    once they have finished, so the process exits non-zero and the
+    coordinator restarts it.
+    """
+    logger = get_logger(f"shard.{worker_id}")
+    queue = WorkQueue(queue_path, lease_seconds=lease_seconds)
+    budget = SharedRequestBudget(queue)
+    client = client_factory(budget)
+    extractor = AgentExtractor(client=client, logger=logger)
+    writer = ShardWriter(shard_path)
+    stopped = threading.Event()
+    errors: List[BaseException] = []
+
+    def heartbeat() -> None:
+        while not stopped.wait(lease_seconds / 3):
+            queue.renew(worker_id)
+
+    def crawl_zip(zip_code: str) -> bool:
+        """Crawl and record one claimed zip; ``False`` once the worker should stop."""
+        agents = extractor.extract_for_zip_codes([zip_code], workers=1)
+        failures = [unit for unit in list(extractor.failures) if unit.zip_code == zip_code]
+        if any(unit.error == REQUEST_BUDGET_EXHAUSTED for unit in failures):
+            queue.release(zip_code, worker_id)
+            logger.warning("Request budget exhausted; leaving zip %s for a later run", zip_code)
+            return False
+        offset = writer.write(zip_code, agents, failures)
+        queue.complete(
+            zip_code, worker_id, str(writer.path), offset, len(agents), failed=bool(failures)
+        )
+        return True
+
+    def crawl_zips() -> None:
+        while not stopped.is_set():
+            zip_code = queue.claim(worker_id)
+            if zip_code is None:
+                if queue.outstanding() == 0:
+                    return
+                # Other workers hold the remaining leases; one may expire.
+                stopped.wait(poll_interval)
+                continue
+            try:
+                if not crawl_zip(zip_code):
+                    stopped.set()
+                    return
+            except Exception as exc:
+                # Left leased, the heartbeat would keep the zip from every
+                # other worker and the sibling loops would wait on it forever.
+                logger.error("Crawling zip %s failed: %s", zip_code, exc, exc_info=True)
+                errors.append(exc)
+                stopped.set()
+                queue.release(zip_code, worker_id)
+                return
+
+    beat = threading.Thread(target=heartbeat, name=f"{worker_id}-heartbeat", daemon=True)
+    beat.start()
+    loops = [
+        threading.Thread(target=crawl_zips, name=f"{worker_id}-{n}")
+        for n in range(max(1, threads))
+    ]
+    try:
+        for loop in loops:
+            loop.start()
+        for loop in loops:
+            loop.join()
+        if errors:
+            raise errors[0]
+    finally:
+        stopped.set()
+        beat.join()
+        writer.close()
+        queue.close()
+
+class ShardedCrawl:
+    """
+    Crawls zip codes with several worker processes sharing a work queue.
+
+    Each process runs its own client (and so its own session and rate
+    limiter) and claims zips from a :class:`WorkQueue` SQLite file. The
+    coordinator spawns the processes, requeues the zips of a process that
+    dies and starts a replacement (at most ``max_restarts`` times), and
+    afterwards merges the per-process shard files into one stream of agents
+    in input order. Zips that ran into the request budget stay in the queue:
+    running again against the same queue continues the crawl.
+
+    Workers on other hosts can join a crawl by running
+    :func:`run_shard_worker` against the same queue file on shared storage.
+    """
+
+    def __init__(
+        self,
+        queue_path: Path,
+        shard_dir: Path,
+        client_factory: ClientFactory,
+        processes: int,
+        threads: int = 1,
+        request_budget: Optional[int] = None,
+        lease_seconds: float = 300.0,
+        max_restarts: int = 3,
+        poll_interval: float = 1.0,
+        logger: Optional[Any] = None,
+    ) -> None:
+        if processes < 1:
+            raise ValueError("processes must be at least 1.")
+        self.queue = WorkQueue(queue_path, lease_seconds=lease_seconds)
+        self.queue_path = Path(queue_path)
+        self.shard_dir = Path(shard_dir)
+        self.client_factory = client_factory
+        self.processes = processes
+        self.threads = threads
+        self.request_budget = request_budget
+        self.lease_seconds = lease_seconds
+        self.max_restarts = max_restarts
+        self.poll_interval = poll_interval
+        self.logger = logger or get_logger(__name__)
+        self.restarts = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._worker_seq = 0
+
+    def _spawn(self) -> Tuple[str, Any]:
+        self._worker_seq += 1
+        worker_id = f"{socket.gethostname()}-{os.getpid()}-{self._worker_seq}"
+        process = self._context.Process(
+            target=run_shard_worker,
+            args=(
+                worker_id,
+                self.queue_path,
+                self.shard_dir / f"{worker_id}.jsonl",
+                self.client_factory,
+                self.threads,
+                self.lease_seconds,
+                self.poll_interval,
+            ),
+            name=worker_id,
+        )
+        process.start()
+        return worker_id, process
+
+    def run(self, zip_codes: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Crawl until the queue is drained; returns the queue's state counts.
+
+        With ``zip_codes=None`` the existing queue (and its request budget)
+        is worked on as is. The budget counts every request made against the
+        queue, including those of earlier runs.
+        """
+        if zip_codes is not None:
+            self.queue.set_request_limit(self.request_budget)
+            remaining = self.queue.enqueue(zip_codes)
+        else:
+            remaining = self.queue.outstanding()
+        if not remaining:
+            self.logger.info("Work queue %s has no zip codes left to crawl", self.queue_path)
+            return self.queue.counts()
+
+        self.logger.info(
+            "Crawling %d zip code(s) with %d worker process(es)", remaining, self.processes
+        )
+        workers = dict(self._spawn() for _ in range(min(self.processes, remaining)))
+        while workers:
+            time.sleep(self.poll_interval)
+            for worker_id, process in list(workers.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                del workers[worker_id]
+                if process.exitcode == 0:
+                    continue
+                requeued = self.queue.release_worker(worker_id)
+                self.logger.warning(
+                    "Worker %s exited with code %s; requeued %d zip code(s)",
+                    worker_id,
+                    process.exitcode,
+                    requeued,
+                )
+                if self.restarts < self.max_restarts and self.queue.outstanding():
+                    self.restarts += 1
+                    replacement, process = self._spawn()
+                    workers[replacement] = process
+
+        counts = self.queue.counts()
+        self.logger.info(
+            "Work queue: %d done, %d failed, %d left; %d request(s) used",
+            counts["done"],
+            counts["failed"],
+            counts["pending"] + counts["leased"],
+            self.queue.requests_used(),
+        )
+        return counts
+
+    def _iter_shard_records(self, states: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        wanted = set(states) if states is not None else None
+        files: Dict[str, Any] = {}
+        try:
+            for _, state, shard, offset in self.queue.iter_results():
+                if wanted is not None and state not in wanted:
+                    continue
+                handle = files.get(shard)
+                if handle is None:
+                    handle = files[shard] = open(shard, "rb")
+                handle.seek(offset)
+                yield json.loads(handle.readline())
+        finally:
+            for handle in files.values():
+                handle.close()
+
+    def iter_agents(self) -> Iterator[AgentRecord]:
+        """Merged agents of every finished zip, in input order."""
+        for record in self._iter_shard_records():
+            for agent in record["agents"]:
+                yield AgentRecord.from_dict(agent)
+
+    def failure_summary(self) -> Dict[str, Any]:
+        units = [
+            FailedUnit(**unit)
+            for record in self._iter_shard_records([FAILED])
+            for unit in record["failures"]
+        ]
+        return summarize_failures(units)
+
+    def close(self, remove: bool = False) -> None:
+        """Close the queue; ``remove`` deletes it along with the shard files."""
+        self.queue.close()
+        if not remove:
+            return
+        for shard in self.shard_dir.glob("*.jsonl"):
+            shard.unlink()
+        for suffix in ("", "-wal", "-shm"):
+            Path(str(self.queue_path) + suffix).unlink(missing_ok=True)
+        try:
+            self.shard_dir.rmdir()
+        except OSError:
+            pass
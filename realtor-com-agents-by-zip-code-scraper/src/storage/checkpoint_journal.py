@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from parsers.agent_record import to_jsonable
+
+class CheckpointJournal:
+    """
+    Append-only, crash-safe progress journal for a crawl.
+
+    Each line is a JSON record: a completed ``(zip, page)`` unit with its
+    normalized agents, or a marker that a zip was fully crawled. Every
+    append is flushed and fsync'd before returning. On resume a torn or
+    corrupt tail (e.g. the process died mid-write) is truncated away.
+
+    Only byte offsets are kept in memory; persisted agents are re-read from
+    disk when a resumed run replays them.
+    """
+
+    def __init__(self, path: Path, resume: bool = False, logger: Optional[Any] = None) -> None:
+        self.path = Path(path)
+        self.logger = logger
+        self._lock = threading.Lock()
+        # zip -> [(page_number, byte offset of the page record)]
+        self._pages: Dict[str, List[Tuple[int, int]]] = {}
+        self._complete: Dict[str, bool] = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            self._load()
+        else:
+            self.path.write_bytes(b"")
+        self._file = self.path.open("ab")
+
+    def _load(self) -> None:
+        good_offset = 0
+        with self.path.open("rb") as f:
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self._index(record, offset)
+                good_offset = f.tell()
+
+        size = self.path.stat().st_size
+        if good_offset < size:
+            if self.logger:
+                self.logger.warning(
+                    "Discarding %d bytes of torn checkpoint data in %s",
+                    size - good_offset,
+                    self.path,
+                )
+            with self.path.open("r+b") as f:
+                f.truncate(good_offset)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _index(self, record: Dict[str, Any], offset: int) -> None:
+        zip_code = str(record.get("zip"))
+        if record.get("complete"):
+            self._complete[zip_code] = True
+        elif "page" in record:
+            self._pages.setdefault(zip_code, []).append((int(record["page"]), offset))
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        data = (json.dumps(record, ensure_ascii=False, default=to_jsonable) + "\n").encode("utf-8")
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._index(record, offset)
+
+    def record_page(self, zip_code: str, page_number: int, agents: List[Dict[str, Any]]) -> None:
+        self._append({"zip": zip_code, "page": page_number, "agents": agents})
+
+    def record_zip_complete(self, zip_code: str) -> None:
+        self._append({"zip": zip_code, "complete": True})
+
+    def is_zip_complete(self, zip_code: str) -> bool:
+        return self._complete.get(zip_code, False)
+
+    def next_page(self, zip_code: str) -> int:
+        pages = self._pages.get(zip_code)
+        return max(page for page, _ in pages) + 1 if pages else 1
+
+    def iter_pages(self, zip_code: str) -> Iterator[List[Dict[str, Any]]]:
+        """Replay the persisted agents of ``zip_code`` page by page."""
+        entries = sorted(self._pages.get(zip_code, []))
+        if not entries:
+            return
+        with self.path.open("rb") as f:
+            for _, offset in entries:
+                f.seek(offset)
+                yield json.loads(f.readline())["agents"]
+
+    def close(self, remove: bool = False) -> None:
+        with self._lock:
+            self._file.close()
+        if remove:
+            self.path.unlink(missing_ok=True)
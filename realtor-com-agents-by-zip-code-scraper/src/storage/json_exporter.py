@@ -1,7 +1,35 @@
 import json
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable
 
-def export_agents_to_json(agents: List[Dict[str, Any]], output_path: Path) -> None:
+from parsers.agent_record import to_jsonable
+
+def export_agents_to_json(agents: Iterable[Dict[str, Any]], output_path: Path) -> int:
+    """
+    Stream agents into a pretty-printed JSON array and return the count.
+
+    Records are written one at a time, producing the same bytes as
+    ``json.dump(list(agents), f, ensure_ascii=False, indent=2)``.
+    """
+    count = 0
+    with output_path.open("w", encoding="utf-8") as f:
+        f.write("[")
+        for agent in agents:
+            f.write(",\n  " if count else "\n  ")
+            # Nested lines are re-indented one level for the enclosing array;
+            # newlines inside string values are escaped, so this is safe.
+            text = json.dumps(agent, ensure_ascii=False, indent=2, default=to_jsonable)
+            f.write(text.replace("\n", "\n  "))
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
+
+def export_agents_to_jsonl(agents: Iterable[Dict[str, Any]], output_path: Path) -> int:
+    """Stream agents as JSON Lines (one compact object per line)."""
+    count = 0
     with output_path.open("w", encoding="utf-8") as f:
-        json.dump(agents, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+        for agent in agents:
+            f.write(json.dumps(agent, ensure_ascii=False, default=to_jsonable))
+            f.write("\n")
+            count += 1
+    return count
@@ -0,0 +1,87 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from parsers.agent_normalizer import AgentNormalizer
+
+INT_FIELDS = ("Listing count", "Sold count", "Review count")
+LIST_FIELDS = ("Mobile Phones", "Zip codes serviced")
+DEFAULT_ROW_GROUP_SIZE = 50_000
+
+def _require_pyarrow() -> Any:
+    # pyarrow is optional: only Parquet exports need it.
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError(
+            "Parquet export requires the 'pyarrow' package (pip install pyarrow)."
+        ) from exc
+    return pyarrow
+
+def parquet_schema() -> Any:
+    """Arrow schema in ``AgentNormalizer.FIELD_ORDER`` with typed columns."""
+    pa = _require_pyarrow()
+    fields = []
+    for name in AgentNormalizer.FIELD_ORDER:
+        if name in INT_FIELDS:
+            fields.append(pa.field(name, pa.int32()))
+        elif name in LIST_FIELDS:
+            fields.append(pa.field(name, pa.list_(pa.string())))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+def _split_list(value: Any) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [part.strip() for part in str(value).split(",") if part.strip()]
+
+def export_agents_to_parquet(
+    agents: Iterable[Dict[str, Any]],
+    output_path: Path,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    compression: str = "zstd",
+) -> int:
+    """
+    Stream agents into a compressed Parquet file and return the row count.
+
+    Rows are buffered column-wise and flushed as one row group every
+    ``row_group_size`` agents, so memory stays bounded by the batch size.
+    Counts are ``int32`` columns; phones and zip codes are string lists.
+    """
+    pa = _require_pyarrow()
+    schema = parquet_schema()
+    names = AgentNormalizer.FIELD_ORDER
+    columns: Dict[str, List[Any]] = {name: [] for name in names}
+    count = 0
+
+    def flush(writer: Any) -> None:
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        for values in columns.values():
+            values.clear()
+
+    text_columns = [
+        (name, columns[name].append)
+        for name in names
+        if name not in INT_FIELDS and name not in LIST_FIELDS
+    ]
+    int_columns = [(name, columns[name].append) for name in INT_FIELDS]
+    list_columns = [(name, columns[name].append) for name in LIST_FIELDS]
+
+    with pa.parquet.ParquetWriter(str(output_path), schema, compression=compression) as writer:
+        for agent in agents:
+            get = agent.get
+            for name, append in text_columns:
+                append(get(name))
+            for name, append in int_columns:
+                append(int(get(name) or 0))
+            for name, append in list_columns:
+                append(_split_list(get(name)))
+            count += 1
+            if count % row_group_size == 0:
+                flush(writer)
+        if count % row_group_size or not count:
+            flush(writer)
+    return count
@@ -0,0 +1,208 @@
+import functools
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from parsers import embedded_json_parser, html_parser
+from parsers.html_parser import PageSource, ParseResult
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parses (
+    key BLOB PRIMARY KEY,
+    version TEXT NOT NULL,
+    result BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    parse_seconds REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_parses_last_access ON parses (last_access);
+"""
+
+@functools.lru_cache(maxsize=None)
+def parser_version() -> str:
+    """Digest of the parser sources; any change to the selector logic changes it."""
+    digest = hashlib.blake2b(digest_size=8)
+    for module in (html_parser, embedded_json_parser):
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+def page_key(html: PageSource, zip_code: Optional[str], backend: Optional[str]) -> bytes:
+    """
+    Hash of a page body and the arguments that shape its parse.
+
+    Text and streamed UTF-8 bytes of the same page hash alike; surrounding
+    whitespace is ignored. The zip is part of the key because parsed agents
+    carry it as ``zip_code_context``.
+    """
+    body = html.encode("utf-8") if isinstance(html, str) else html
+    digest = hashlib.blake2b(body.strip(), digest_size=16)
+    digest.update(b"\0" + (zip_code or "").encode("utf-8"))
+    digest.update(b"\0" + html_parser.resolve_backend(backend).encode("ascii"))
+    return digest.digest()
+
+def _copy(result: ParseResult) -> ParseResult:
+    # Callers get their own agent dicts; the cached ones stay pristine.
+    return ParseResult(
+        agents=[dict(agent) for agent in result.agents],
+        strategy=result.strategy,
+        total_count=result.total_count,
+        page_size=result.page_size,
+    )
+
+class ParseCache:
+    """
+    Parsed pages keyed by a hash of their body, so identical pages are parsed once.
+
+    Results live in an in-memory LRU of ``max_entries`` pages, backed by a
+    SQLite file at ``path`` (``None`` keeps the cache in memory only) that
+    carries them across runs. Every entry is tied to :func:`parser_version`:
+    entries from other parser versions are dropped when the file is opened.
+    Each entry remembers how long its parse took, so hits add up to the
+    parse time saved. Once the stored results exceed ``max_bytes`` the least
+    recently used are evicted; the limit holds for the file as a whole when
+    several worker processes share it.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_entries: int = 4096,
+        max_bytes: int = 256 * 1024 * 1024,
+        version: Optional[str] = None,
+    ) -> None:
+        self.path = Path(path) if path is not None else None
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.version = version or parser_version()
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[bytes, Tuple[ParseResult, float]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+        self.stats: Dict[str, Any] = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stored": 0,
+            "evicted": 0,
+            "invalidated": 0,
+            "seconds_saved": 0.0,
+        }
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            cursor = self._conn.execute("DELETE FROM parses WHERE version != ?", (self.version,))
+            self.stats["invalidated"] = cursor.rowcount
+            self._conn.commit()
+            row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM parses").fetchone()
+            self._total_bytes = int(row[0])
+
+    @staticmethod
+    def key(html: PageSource, zip_code: Optional[str], backend: Optional[str]) -> bytes:
+        return page_key(html, zip_code, backend)
+
+    def lookup(self, key: bytes) -> Optional[ParseResult]:
+        """The cached parse for ``key`` (a copy), or ``None``."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["seconds_saved"] += entry[1]
+                return _copy(entry[0])
+            if self._conn is None:
+                self.stats["misses"] += 1
+                return None
+            row = self._conn.execute(
+                "SELECT result, parse_seconds FROM parses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute(
+                "UPDATE parses SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        blob, parse_seconds = row
+        result = ParseResult(**json.loads(zlib.decompress(blob)))
+        with self._lock:
+            self._remember_locked(key, result, parse_seconds)
+            self.stats["hits"] += 1
+            self.stats["disk_hits"] += 1
+            self.stats["seconds_saved"] += parse_seconds
+        return _copy(result)
+
+    def store(self, key: bytes, result: ParseResult, parse_seconds: float) -> None:
+        """Cache ``result``, which took ``parse_seconds`` to produce."""
+        cached = _copy(result)
+        blob = None
+        if self._conn is not None:
+            payload = {
+                "agents": cached.agents,
+                "strategy": cached.strategy,
+                "total_count": cached.total_count,
+                "page_size": cached.page_size,
+            }
+            blob = zlib.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"), 6)
+        with self._lock:
+            self._remember_locked(key, cached, parse_seconds)
+            self.stats["stored"] += 1
+            if self._conn is None or blob is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parses "
+                "(key, version, result, size, parse_seconds, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, self.version, blob, len(blob), parse_seconds, time.time()),
+            )
+            # Other processes may share the file, so the size is re-read
+            # inside this write transaction rather than tracked locally.
+            row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM parses").fetchone()
+            self._total_bytes = int(row[0])
+            self._evict_locked()
+            self._conn.commit()
+
+    def _remember_locked(self, key: bytes, result: ParseResult, parse_seconds: float) -> None:
+        self._memory[key] = (result, parse_seconds)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_locked(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM parses ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM parses WHERE key = ?", (key,))
+                self._total_bytes -= int(size)
+                self.stats["evicted"] += 1
+
+    def summary(self) -> str:
+        s = self.stats
+        lookups = s["hits"] + s["misses"]
+        hit_rate = s["hits"] / lookups if lookups else 0.0
+        return (
+            f"hits={s['hits']} (disk={s['disk_hits']}) misses={s['misses']} "
+            f"hit_rate={hit_rate:.0%} parse_time_saved={s['seconds_saved']:.3f}s "
+            f"invalidated={s['invalidated']} evicted={s['evicted']} "
+            f"memory={len(self._memory)} size={self._total_bytes}B"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,183 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+"""
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers that let the server answer ``304 Not Modified``."""
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache stored in a single SQLite file.
+
+    Entries are keyed by a hash of the URL and hold the zlib-compressed body
+    with its validators. Entries younger than ``ttl_seconds`` are served
+    without touching the network; older ones are revalidated with
+    ``If-None-Match``/``If-Modified-Since``. Once the compressed bodies
+    exceed ``max_bytes`` the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_seconds: float = 24 * 3600,
+        max_bytes: int = 512 * 1024 * 1024,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        self._total_bytes = int(row[0])
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "stale": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "stored": 0,
+            "evicted": 0,
+            "bytes_served": 0,
+            "bytes_downloaded": 0,
+        }
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        """Return the cached entry for ``url`` (fresh or stale), if any."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?",
+                (self._key(url),),
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            body, etag, last_modified, stored_at = row
+            fresh = now - stored_at < self.ttl_seconds
+            if fresh:
+                self.stats["hits"] += 1
+                self._conn.execute(
+                    "UPDATE responses SET last_access = ? WHERE key = ?",
+                    (now, self._key(url)),
+                )
+                self._conn.commit()
+            else:
+                self.stats["stale"] += 1
+        text = zlib.decompress(body).decode("utf-8")
+        if fresh:
+            with self._lock:
+                self.stats["bytes_served"] += len(text)
+        return CachedResponse(
+            url=url, body=text, etag=etag, last_modified=last_modified, fresh=fresh
+        )
+
+    def mark_revalidated(self, entry: CachedResponse) -> None:
+        """Record a ``304 Not Modified``: the stored body is fresh again."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ?, last_access = ? WHERE key = ?",
+                (now, now, self._key(entry.url)),
+            )
+            self._conn.commit()
+            self.stats["revalidated"] += 1
+            self.stats["bytes_served"] += len(entry.body)
+
+    def store(
+        self,
+        url: str,
+        body: Union[str, bytes],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        # Streamed pages arrive as UTF-8 bytes already.
+        blob = zlib.compress(body.encode("utf-8") if isinstance(body, str) else body, 6)
+        now = time.time()
+        key = self._key(url)
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if old is not None:
+                self._total_bytes -= int(old[0])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, body, size, etag, last_modified, stored_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, blob, len(blob), etag, last_modified, now, now),
+            )
+            self._total_bytes += len(blob)
+            self.stats["stored"] += 1
+            self.stats["bytes_downloaded"] += len(body)
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= int(size)
+                self.stats["evicted"] += 1
+
+    def summary(self) -> str:
+        s = self.stats
+        lookups = s["hits"] + s["stale"] + s["misses"]
+        hit_rate = (s["hits"] + s["revalidated"]) / lookups if lookups else 0.0
+        return (
+            f"hits={s['hits']} stale={s['stale']} revalidated={s['revalidated']} "
+            f"misses={s['misses']} "
+            f"hit_rate={hit_rate:.0%} served={s['bytes_served']}B "
+            f"downloaded={s['bytes_downloaded']}B evicted={s['evicted']} "
+            f"size={self._total_bytes}B"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from agent_dedup import agent_identity
+from parsers.agent_record import to_jsonable
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS zip_snapshots (
+    zip TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    agent_count INTEGER NOT NULL,
+    crawled_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS zip_agents (
+    zip TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    identity TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    PRIMARY KEY (zip, position)
+);
+"""
+
+def page_fingerprint(agents: List[Dict[str, Any]]) -> str:
+    """Content hash of a page of normalized agents."""
+    digest = hashlib.sha256()
+    for agent in agents:
+        text = json.dumps(agent, sort_keys=True, ensure_ascii=False, default=to_jsonable)
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+class SnapshotStore:
+    """
+    The previous run's normalized agents per zip, kept in a SQLite file.
+
+    For each zip the store holds the fingerprint of its first results page
+    and every agent it returned, in order. A delta crawl compares a freshly
+    fetched page 1 with the stored fingerprint and replays the stored
+    agents instead of walking the remaining pages when nothing changed.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def fingerprint(self, zip_code: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint FROM zip_snapshots WHERE zip = ?", (zip_code,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def agents(self, zip_code: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT agent FROM zip_agents WHERE zip = ? ORDER BY position", (zip_code,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def iter_zip_agents(self, zip_codes: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``(zip, agent)`` for the stored agents of ``zip_codes``."""
+        for zip_code in zip_codes:
+            for agent in self.agents(zip_code):
+                yield zip_code, agent
+
+    def replace_zip(
+        self, zip_code: str, fingerprint: str, agents: List[Dict[str, Any]]
+    ) -> None:
+        rows = [
+            (
+                zip_code,
+                position,
+                agent_identity(agent),
+                json.dumps(agent, ensure_ascii=False, default=to_jsonable),
+            )
+            for position, agent in enumerate(agents)
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM zip_agents WHERE zip = ?", (zip_code,))
+                self._conn.executemany(
+                    "INSERT INTO zip_agents (zip, position, identity, agent) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO zip_snapshots (zip, fingerprint, agent_count, crawled_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (zip_code, fingerprint, len(agents), time.time()),
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
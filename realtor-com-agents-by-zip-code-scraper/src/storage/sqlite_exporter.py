@@ -0,0 +1,134 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from agent_dedup import agent_identity
+
+# Normalized field -> column, in AgentNormalizer.FIELD_ORDER.
+COLUMNS = (
+    ("Agent name", "name"),
+    ("Website", "website"),
+    ("Email", "email"),
+    ("Listing count", "listing_count"),
+    ("Sold count", "sold_count"),
+    ("Office Phone", "office_phone"),
+    ("Mobile Phones", "mobile_phones"),
+    ("Areas serviced", "areas_serviced"),
+    ("Zip codes serviced", "zip_codes_serviced"),
+    ("Office / Company name", "office_name"),
+    ("Company Website", "company_website"),
+    ("Review count", "review_count"),
+    ("Agent Photo", "photo_url"),
+)
+DEFAULT_BATCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    id INTEGER PRIMARY KEY,
+    identity TEXT NOT NULL UNIQUE,
+    name TEXT,
+    website TEXT,
+    email TEXT,
+    listing_count INTEGER NOT NULL DEFAULT 0,
+    sold_count INTEGER NOT NULL DEFAULT 0,
+    office_phone TEXT,
+    mobile_phones TEXT,
+    areas_serviced TEXT,
+    zip_codes_serviced TEXT,
+    office_name TEXT,
+    company_website TEXT,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    photo_url TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS agent_zips (
+    zip TEXT NOT NULL,
+    agent_id INTEGER NOT NULL REFERENCES agents (id) ON DELETE CASCADE,
+    PRIMARY KEY (zip, agent_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_agent_zips_agent ON agent_zips (agent_id);
+CREATE INDEX IF NOT EXISTS idx_agents_office ON agents (office_name);
+"""
+
+_COLUMN_NAMES = ", ".join(column for _, column in COLUMNS)
+_UPSERT = (
+    f"INSERT INTO agents (identity, {_COLUMN_NAMES}, updated_at) "
+    f"VALUES (?, {', '.join('?' for _ in COLUMNS)}, ?) "
+    "ON CONFLICT (identity) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for _, column in COLUMNS)
+    + ", updated_at = excluded.updated_at"
+)
+
+def _zip_codes(agent: Dict[str, Any]) -> List[str]:
+    raw = agent.get("Zip codes serviced") or ""
+    return [part.strip() for part in raw.split(",") if part.strip()]
+
+def _write_batch(conn: sqlite3.Connection, batch: List[Dict[str, Any]]) -> None:
+    now = time.time()
+    rows: List[Tuple[Any, ...]] = []
+    identities: List[str] = []
+    for agent in batch:
+        identity = agent_identity(agent)
+        identities.append(identity)
+        rows.append((identity, *(agent.get(field) for field, _ in COLUMNS), now))
+
+    with conn:
+        conn.executemany(_UPSERT, rows)
+        ids: Dict[str, int] = {}
+        # Chunked to stay under SQLite's bound-parameter limit.
+        unique = list(dict.fromkeys(identities))
+        for start in range(0, len(unique), 500):
+            chunk = unique[start : start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            ids.update(
+                conn.execute(
+                    f"SELECT identity, id FROM agents WHERE identity IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            )
+        # A rerun replaces each agent's zip links instead of accumulating them.
+        conn.executemany(
+            "DELETE FROM agent_zips WHERE agent_id = ?", [(ids[i],) for i in unique]
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO agent_zips (zip, agent_id) VALUES (?, ?)",
+            [
+                (zip_code, ids[identity])
+                for identity, agent in zip(identities, batch)
+                for zip_code in _zip_codes(agent)
+            ],
+        )
+
+def export_agents_to_sqlite(
+    agents: Iterable[Dict[str, Any]],
+    output_path: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    Upsert agents into a SQLite database and return the number processed.
+
+    Agents are keyed by their stable identity, so rerunning a crawl against
+    the same file updates rows in place. Each batch is one transaction;
+    ``agent_zips`` links agents to the zip codes they serve and is indexed
+    for zip and office lookups.
+    """
+    count = 0
+    conn = sqlite3.connect(str(output_path))
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.executescript(_SCHEMA)
+        batch: List[Dict[str, Any]] = []
+        for agent in agents:
+            batch.append(agent)
+            count += 1
+            if len(batch) >= batch_size:
+                _write_batch(conn, batch)
+                batch = []
+        if batch:
+            _write_batch(conn, batch)
+    finally:
+        conn.close()
+    return count
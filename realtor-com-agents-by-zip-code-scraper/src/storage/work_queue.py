@@ -0,0 +1,258 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS zip_queue (
+    zip TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    shard TEXT,
+    shard_offset INTEGER,
+    agent_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_zip_queue_state ON zip_queue (state, position);
+CREATE TABLE IF NOT EXISTS request_budget (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    max_requests INTEGER,
+    used INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO request_budget (id, max_requests, used) VALUES (1, NULL, 0);
+"""
+
+class WorkQueue:
+    """
+    Zip-code work queue shared by crawl processes through a SQLite file.
+
+    Workers :meth:`claim` one zip at a time under a lease that they
+    :meth:`renew` while they are alive. A lease that is not renewed within
+    ``lease_seconds`` (the worker died, or its host did) expires and the zip
+    becomes claimable again. Finished zips record where their agents were
+    written (shard file and byte offset) so a coordinator can merge the
+    shards in input order.
+
+    The queue also holds the crawl-wide request budget that every worker
+    draws from (see :class:`SharedRequestBudget`). Re-enqueueing the same
+    zips into an existing queue keeps finished zips and retries failed ones,
+    so an interrupted crawl continues where it stopped.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        lease_seconds: float = 300.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self._clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode; writes that read-then-update use BEGIN IMMEDIATE
+        # so two processes cannot claim the same zip.
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _write(self, work: Callable[[sqlite3.Connection], object]) -> object:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def enqueue(self, zip_codes: Iterable[str]) -> int:
+        """Add ``zip_codes`` in order; returns how many still need crawling."""
+        rows = [(zip_code, position) for position, zip_code in enumerate(zip_codes)]
+
+        def work(conn: sqlite3.Connection) -> int:
+            conn.executemany(
+                "INSERT INTO zip_queue (zip, position, state) VALUES (?, ?, 'pending') "
+                "ON CONFLICT (zip) DO UPDATE SET position = excluded.position",
+                rows,
+            )
+            conn.execute(
+                "UPDATE zip_queue SET state = 'pending', worker = NULL, lease_expires = NULL "
+                "WHERE state = 'failed'"
+            )
+            return conn.execute(
+                "SELECT COUNT(*) FROM zip_queue WHERE state IN ('pending', 'leased')"
+            ).fetchone()[0]
+
+        return int(self._write(work))
+
+    def claim(self, worker: str) -> Optional[str]:
+        """Lease the next pending (or abandoned) zip to ``worker``."""
+        now = self._clock()
+
+        def work(conn: sqlite3.Connection) -> Optional[str]:
+            conn.execute(
+                "UPDATE zip_queue SET state = 'pending', worker = NULL, lease_expires = NULL "
+                "WHERE state = 'leased' AND lease_expires < ?",
+                (now,),
+            )
+            row = conn.execute(
+                "SELECT zip FROM zip_queue WHERE state = 'pending' ORDER BY position LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE zip_queue SET state = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE zip = ?",
+                (worker, now + self.lease_seconds, row[0]),
+            )
+            return row[0]
+
+        return self._write(work)  # type: ignore[return-value]
+
+    def renew(self, worker: str) -> None:
+        """Extend the leases ``worker`` holds."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE zip_queue SET lease_expires = ? WHERE state = 'leased' AND worker = ?",
+                (self._clock() + self.lease_seconds, worker),
+            )
+
+    def complete(
+        self,
+        zip_code: str,
+        worker: str,
+        shard: str,
+        shard_offset: int,
+        agent_count: int,
+        failed: bool = False,
+    ) -> bool:
+        """
+        Record where ``zip_code``'s agents were written.
+
+        Returns ``False`` if the lease was lost (the zip was reassigned), in
+        which case the other worker's result is the one that counts.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE zip_queue SET state = ?, worker = NULL, lease_expires = NULL, "
+                "shard = ?, shard_offset = ?, agent_count = ? "
+                "WHERE zip = ? AND state = 'leased' AND worker = ?",
+                (FAILED if failed else DONE, shard, shard_offset, agent_count, zip_code, worker),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, zip_code: str, worker: str) -> None:
+        """Hand an unfinished zip back to the queue."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE zip_queue SET state = 'pending', worker = NULL, lease_expires = NULL "
+                "WHERE zip = ? AND state = 'leased' AND worker = ?",
+                (zip_code, worker),
+            )
+
+    def release_worker(self, worker: str) -> int:
+        """Requeue every zip leased by a worker known to be dead."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE zip_queue SET state = 'pending', worker = NULL, lease_expires = NULL "
+                "WHERE state = 'leased' AND worker = ?",
+                (worker,),
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM zip_queue GROUP BY state"
+            ).fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def outstanding(self) -> int:
+        """Zips that are pending or leased."""
+        counts = self.counts()
+        return counts[PENDING] + counts[LEASED]
+
+    def iter_results(self) -> Iterator[Tuple[str, str, str, int]]:
+        """Yield ``(zip, state, shard, offset)`` of finished zips in input order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT zip, state, shard, shard_offset FROM zip_queue "
+                "WHERE state IN ('done', 'failed') AND shard IS NOT NULL ORDER BY position"
+            ).fetchall()
+        for zip_code, state, shard, offset in rows:
+            yield zip_code, state, shard, int(offset)
+
+    def set_request_limit(self, max_requests: Optional[int]) -> None:
+        """Cap the total number of requests of the crawl (``None`` = no cap)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE request_budget SET max_requests = ? WHERE id = 1", (max_requests,)
+            )
+
+    def requests_used(self) -> int:
+        with self._lock:
+            return int(
+                self._conn.execute("SELECT used FROM request_budget WHERE id = 1").fetchone()[0]
+            )
+
+    def reserve_requests(self, count: int) -> int:
+        """Take up to ``count`` requests from the shared budget; returns the grant."""
+
+        def work(conn: sqlite3.Connection) -> int:
+            max_requests, used = conn.execute(
+                "SELECT max_requests, used FROM request_budget WHERE id = 1"
+            ).fetchone()
+            granted = count if max_requests is None else max(0, min(count, max_requests - used))
+            if granted:
+                conn.execute(
+                    "UPDATE request_budget SET used = used + ? WHERE id = 1", (granted,)
+                )
+            return granted
+
+        return int(self._write(work))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class SharedRequestBudget:
+    """
+    A process's view of the crawl-wide request budget in a :class:`WorkQueue`.
+
+    Requests are reserved from the queue ``block`` at a time so workers do not
+    write to the database on every request. Reserved requests that are never
+    used are simply lost, so the crawl can end up to ``block`` requests per
+    process under the limit but never over it. Has the same ``try_consume``
+    interface as ``RequestBudget``.
+    """
+
+    def __init__(self, queue: WorkQueue, block: int = 10) -> None:
+        self.queue = queue
+        self.block = max(1, block)
+        self.exhausted = False
+        self._available = 0
+        self._lock = threading.Lock()
+
+    def try_consume(self) -> bool:
+        with self._lock:
+            if self._available == 0 and not self.exhausted:
+                self._available = self.queue.reserve_requests(self.block)
+                self.exhausted = self._available == 0
+            if self._available == 0:
+                return False
+            self._available -= 1
+            return True
@@ -0,0 +1,304 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; covers rate-limit sleeps, page fetches and parse times.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "total", "min", "max")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+class Metrics:
+    """
+    In-process counters and histograms for a crawl.
+
+    Series are identified by a metric name plus keyword labels, e.g.
+    ``metrics.inc("requests_total", status=200)``. Histograms keep
+    Prometheus-style cumulative buckets. :meth:`to_prometheus` renders the
+    text exposition format, :meth:`snapshot` a JSON-friendly dict and
+    :meth:`summary_table` a human-readable end-of-run table.
+
+    :meth:`stage` marks a pipeline stage (fetch, parse, ...); it only costs
+    something when a ``stage_clock`` (see ``utils.profiler``) is attached.
+    """
+
+    enabled = True
+
+    def __init__(self, namespace: str = "realtor_scraper") -> None:
+        self.namespace = namespace
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+        self._help: Dict[str, str] = {}
+        self.stage_clock: Optional[Any] = None
+
+    def describe(self, name: str, help_text: str, buckets: Optional[Sequence[float]] = None) -> None:
+        """Set a metric's help text (and a histogram's buckets)."""
+        self._help[name] = help_text
+        if buckets is not None:
+            self._buckets[name] = tuple(buckets)
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self._buckets.get(name, LATENCY_BUCKETS))
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        clock = self.stage_clock
+        if clock is None:
+            yield
+            return
+        token = clock.enter(name)
+        try:
+            yield
+        finally:
+            clock.exit(token)
+
+    def counter_value(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full = f"{self.namespace}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{full}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                full = f"{self.namespace}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(
+                            f"{full}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {cumulative}"
+                        )
+                    lines.append(
+                        f"{full}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram.count}"
+                    )
+                    lines.append(f"{full}_sum{_format_labels(labels)} {histogram.total:g}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        def series_name(name: str, labels: Labels) -> str:
+            return name + _format_labels(labels)
+
+        with self._lock:
+            counters = {
+                series_name(name, labels): value
+                for name, series in self._counters.items()
+                for labels, value in series.items()
+            }
+            histograms = {
+                series_name(name, labels): {
+                    "count": h.count,
+                    "sum": round(h.total, 6),
+                    "min": round(h.min, 6) if h.count else None,
+                    "max": round(h.max, 6) if h.count else None,
+                    "p50": round(h.quantile(0.5), 6) if h.count else None,
+                    "p95": round(h.quantile(0.95), 6) if h.count else None,
+                }
+                for name, series in self._histograms.items()
+                for labels, h in series.items()
+            }
+        return {
+            "timestamp": time.time(),
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def summary_table(self) -> str:
+        """Fixed-width table of every series, for the end-of-run log."""
+        snapshot = self.snapshot()
+        rows = [("metric", "count", "total", "mean", "p50", "p95", "max")]
+        for name, value in sorted(snapshot["counters"].items()):
+            rows.append((name, "", f"{value:g}", "", "", "", ""))
+        for name, h in sorted(snapshot["histograms"].items()):
+            mean = h["sum"] / h["count"] if h["count"] else 0.0
+            rows.append(
+                (
+                    name,
+                    str(h["count"]),
+                    f"{h['sum']:.3f}",
+                    f"{mean:.4f}",
+                    f"{h['p50']:.4f}" if h["p50"] is not None else "",
+                    f"{h['p95']:.4f}" if h["p95"] is not None else "",
+                    f"{h['max']:.4f}" if h["max"] is not None else "",
+                )
+            )
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = []
+        for row in rows:
+            cells = [row[0].ljust(widths[0])]
+            cells += [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+            lines.append("  ".join(cells).rstrip())
+        return "\n".join(lines)
+
+class NullMetrics:
+    """Drop-in for :class:`Metrics` that records nothing."""
+
+    enabled = False
+
+    def describe(self, name: str, help_text: str, buckets: Optional[Sequence[float]] = None) -> None:
+        pass
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        pass
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        pass
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        yield
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        yield
+
+    def counter_value(self, name: str, **labels: Any) -> float:
+        return 0
+
+NULL_METRICS = NullMetrics()
+
+def describe_crawl_metrics(metrics: Any) -> None:
+    """Help texts and buckets of the metrics the crawler records."""
+    metrics.describe("requests_total", "HTTP requests by status code ('error' = no response).")
+    metrics.describe("response_bytes_total", "Response body bytes downloaded.")
+    metrics.describe("cache_hits_total", "Pages served from the response cache.")
+    metrics.describe("parse_cache_lookups_total", "Parse cache lookups by result (hit/miss).")
+    metrics.describe("retries_total", "Requests retried after a transient failure.")
+    metrics.describe("truncated_pages_total", "Streamed pages whose read stopped after the results.")
+    metrics.describe("identity_quarantines_total", "Identities quarantined after blocks or empty pages.")
+    metrics.describe("request_seconds", "Latency of a single HTTP request.")
+    metrics.describe("rate_limit_wait_seconds", "Time spent waiting on the rate limiter.")
+    metrics.describe("parse_seconds", "Time to parse one results page.")
+    metrics.describe("normalize_seconds", "Time to normalize one page of agents.")
+    metrics.describe("agents_per_zip", "Agents extracted per zip code.", buckets=COUNT_BUCKETS)
+    metrics.describe("export_seconds", "Time to write the export, including the crawl it streams.")
+
+def serve_prometheus(metrics: Metrics, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve ``/metrics`` in Prometheus text format from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+class SnapshotWriter:
+    """Rewrites a JSON snapshot of ``metrics`` every ``interval`` seconds."""
+
+    def __init__(self, metrics: Metrics, path: Path, interval: float = 10.0) -> None:
+        self.metrics = metrics
+        self.path = Path(path)
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+
+    def start(self) -> "SnapshotWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+        return self
+
+    def write(self) -> None:
+        partial = self.path.with_name(self.path.name + ".part")
+        partial.write_text(json.dumps(self.metrics.snapshot(), indent=2), encoding="utf-8")
+        os.replace(partial, self.path)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.write()
+
+    def stop(self) -> None:
+        """Stop the thread and write a final snapshot."""
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.write()
@@ -0,0 +1,155 @@
+import codecs
+import re
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from urllib3.util.request import ACCEPT_ENCODING
+
+from parsers.embedded_json_parser import NEXT_DATA_MARKERS
+
+# Every compression the installed urllib3 can decode (gzip/deflate, plus
+# br/zstd when their optional packages are present).
+STREAM_ACCEPT_ENCODING = ACCEPT_ENCODING
+
+DEFAULT_CHUNK_SIZE = 16 * 1024
+# When less than this much of a cut-off body is still on the wire it is
+# read and discarded, so the keep-alive connection goes back to the pool
+# instead of being closed.
+DEFAULT_DRAIN_BYTES = 32 * 1024
+
+_PAYLOAD_MARKERS = tuple(marker.encode("ascii") for marker in NEXT_DATA_MARKERS)
+_SCRIPT_END = b"</script>"
+# Markup of a Next.js app, whose payload script follows the rendered results.
+_NEXT_APP_MARKERS = (b'id="__next"', b"/_next/")
+# Closing tag of the element holding the rendered result cards.
+RESULTS_END_MARKERS = (b"</main>",)
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+_UTF8_COMPATIBLE = {"utf-8", "ascii"}
+
+def detect_encoding(content_type: Optional[str], head: bytes) -> str:
+    """
+    Charset of a page from its ``Content-Type`` or ``<meta charset>``.
+
+    Falls back to UTF-8 rather than running charset detection over the body.
+    """
+    for param in (content_type or "").split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset" and value.strip():
+            return value.strip().strip("\"'")
+    match = _META_CHARSET.search(head[:2048])
+    if match:
+        return match.group(1).decode("ascii")
+    return "utf-8"
+
+class ResultsEndScanner:
+    """
+    Finds the offset after which a results page holds nothing the parser reads.
+
+    That is the end of the ``__NEXT_DATA__`` script when the page embeds
+    one, and otherwise the close of the results container. Pages that look
+    like a Next.js app are only cut after their payload, which comes after
+    the rendered cards. Buffers are scanned incrementally as they grow.
+    """
+
+    _overlap = max(len(m) for m in _PAYLOAD_MARKERS + _NEXT_APP_MARKERS + RESULTS_END_MARKERS)
+
+    def __init__(self) -> None:
+        self._scanned = 0
+        self._payload_at: Optional[int] = None
+        self._next_app = False
+
+    @staticmethod
+    def _find_any(buffer: bytearray, markers: Any, start: int) -> int:
+        found = [pos for pos in (buffer.find(marker, start) for marker in markers) if pos >= 0]
+        return min(found) if found else -1
+
+    def feed(self, buffer: bytearray) -> Optional[int]:
+        """Offset to cut ``buffer`` at, or ``None`` while more is needed."""
+        start = max(0, self._scanned - self._overlap)
+        self._scanned = len(buffer)
+
+        if self._payload_at is None:
+            payload_at = self._find_any(buffer, _PAYLOAD_MARKERS, start)
+            if payload_at >= 0:
+                self._payload_at = payload_at
+        if self._payload_at is not None:
+            end = buffer.find(_SCRIPT_END, max(self._payload_at, start))
+            return end + len(_SCRIPT_END) if end >= 0 else None
+
+        if not self._next_app and self._find_any(buffer, _NEXT_APP_MARKERS, start) >= 0:
+            self._next_app = True
+        if self._next_app:
+            return None
+        end = self._find_any(buffer, RESULTS_END_MARKERS, start)
+        if end < 0:
+            return None
+        for marker in RESULTS_END_MARKERS:
+            if buffer.startswith(marker, end):
+                return end + len(marker)
+        return None
+
+@dataclass
+class StreamedBody:
+    """
+    A page body read by :func:`read_page_body`, always UTF-8 encoded.
+
+    ``truncated`` is set when reading stopped at the end of the results
+    rather than at the end of the body.
+    """
+
+    body: bytes
+    encoding: str
+    truncated: bool
+
+def read_page_body(
+    response: Any,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    drain_bytes: int = DEFAULT_DRAIN_BYTES,
+) -> StreamedBody:
+    """
+    Read a ``stream=True`` response until the results are complete.
+
+    Chunks are decompressed by urllib3 and collected into one buffer; the
+    rest of the body is not downloaded once :class:`ResultsEndScanner`
+    reports the results as closed. Bodies in another charset than UTF-8 are
+    transcoded, so the parser can always treat bytes as UTF-8.
+    """
+    buffer = bytearray()
+    scanner = ResultsEndScanner()
+    chunks = response.iter_content(chunk_size=chunk_size)
+    cut: Optional[int] = None
+    for chunk in chunks:
+        buffer += chunk
+        cut = scanner.feed(buffer)
+        if cut is not None:
+            break
+
+    if cut is not None:
+        del buffer[cut:]
+        remaining = _remaining_bytes(response)
+        if remaining is not None and remaining <= drain_bytes:
+            for _ in chunks:
+                pass
+    response.close()
+
+    headers = getattr(response, "headers", None) or {}
+    encoding = detect_encoding(headers.get("Content-Type"), bytes(buffer[:2048]))
+    body = bytes(buffer)
+    try:
+        if codecs.lookup(encoding).name not in _UTF8_COMPATIBLE:
+            body = body.decode(encoding, errors="replace").encode("utf-8")
+    except LookupError:
+        pass
+    return StreamedBody(body=body, encoding=encoding, truncated=cut is not None)
+
+def _remaining_bytes(response: Any) -> Optional[int]:
+    """Bytes of the body still on the wire, when the length is known."""
+    raw = getattr(response, "raw", None)
+    length = (getattr(response, "headers", None) or {}).get("Content-Length")
+    if raw is None or not length or not hasattr(raw, "tell"):
+        return None
+    try:
+        return max(0, int(length) - raw.tell())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,352 @@
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+STAGES = ("fetch", "rate_limit_wait", "parse", "normalize", "export")
+OTHER = "other"
+# An allocation whose traceback is too shallow to reach a stage function.
+UNKNOWN = "?"
+
+MODE_SAMPLING = "sampling"
+MODE_DETERMINISTIC = "deterministic"
+PROFILE_MODES = (MODE_SAMPLING, MODE_DETERMINISTIC)
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+class StageClock:
+    """
+    Exclusive wall and CPU time per pipeline stage, per thread.
+
+    Attached to ``Metrics.stage_clock``; every ``metrics.stage(name)`` block
+    then enters and leaves a stage here. Stages nest (export streams the
+    crawl, so fetch and parse run inside it): time spent in an inner stage
+    is not counted again for the outer one. CPU time is the thread's own
+    (``time.thread_time``). While ``tracemalloc`` is tracing, the change in
+    traced memory is recorded too; it is process-wide, so with several
+    threads it is only approximate.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.totals: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def _now() -> List[float]:
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        return [time.perf_counter(), time.thread_time(), traced]
+
+    def _add(self, name: str, started: List[float], now: List[float], calls: int = 0) -> None:
+        with self._lock:
+            entry = self.totals.setdefault(
+                name, {"calls": 0, "wall": 0.0, "cpu": 0.0, "bytes": 0}
+            )
+            entry["calls"] += calls
+            entry["wall"] += now[0] - started[0]
+            entry["cpu"] += now[1] - started[1]
+            entry["bytes"] += now[2] - started[2]
+
+    def enter(self, name: str) -> Any:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        now = self._now()
+        if stack:
+            parent_name, parent_started = stack[-1]
+            self._add(parent_name, parent_started, now)
+        stack.append((name, now))
+        return len(stack)
+
+    def exit(self, token: Any) -> None:
+        stack = self._local.stack
+        now = self._now()
+        name, started = stack.pop()
+        self._add(name, started, now, calls=1)
+        if stack:
+            stack[-1] = (stack[-1][0], now)
+
+class _StageIndex:
+    """Maps frames and allocation tracebacks to the stage functions they run under."""
+
+    def __init__(self, stage_functions: Mapping[str, Iterable[Callable[..., Any]]]) -> None:
+        self.codes: Dict[CodeType, str] = {}
+        self.lines: Dict[str, List[Tuple[int, int, str]]] = {}
+        for stage, functions in stage_functions.items():
+            for function in functions:
+                code = getattr(function, "__code__", None)
+                if code is None:
+                    continue
+                self.codes[code] = stage
+                lines = [line for _, _, line in code.co_lines() if line is not None]
+                if lines:
+                    self.lines.setdefault(code.co_filename, []).append(
+                        (min(lines), max(lines), stage)
+                    )
+
+    def for_frame(self, frame: Optional[FrameType]) -> str:
+        """Stage of the innermost stage function on ``frame``'s stack."""
+        while frame is not None:
+            stage = self.codes.get(frame.f_code)
+            if stage is not None:
+                return stage
+            frame = frame.f_back
+        return OTHER
+
+    def for_traceback(self, traceback: Iterable[Any], max_frames: int) -> str:
+        """
+        Stage of a ``tracemalloc`` traceback (stored oldest frame first).
+
+        A traceback of ``max_frames`` frames may have been cut short before
+        reaching a stage function, so it is not counted as ``other``.
+        """
+        frames = list(traceback)
+        for frame in reversed(frames):
+            for first, last, stage in self.lines.get(frame.filename, ()):
+                if first <= frame.lineno <= last:
+                    return stage
+        return UNKNOWN if len(frames) >= max_frames else OTHER
+
+class SamplingProfiler:
+    """Samples every thread's stack each ``interval`` seconds (wall-clock samples)."""
+
+    def __init__(self, stages: _StageIndex, interval: float = 0.005) -> None:
+        self.stages = stages
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.stage_samples: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                labels = []
+                current: Optional[FrameType] = frame
+                while current is not None:
+                    labels.append(_frame_label(current))
+                    current = current.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(labels))] += 1
+                self.stage_samples[self.stages.for_frame(frame)] += 1
+
+class DeterministicProfiler:
+    """
+    Traces every Python and C call on every thread (``sys.setprofile``).
+
+    Stack counts are the exclusive time of each call path in microseconds,
+    so repeated runs over the same replayed pages give the same paths and
+    closely matching weights. Tracing slows the run down several times.
+    """
+
+    def __init__(self, stages: _StageIndex) -> None:
+        self.stages = stages
+        self.stacks: Counter = Counter()
+        self.stage_samples: Counter = Counter()
+        self._local = threading.local()
+        self._active = False
+
+    def start(self) -> None:
+        self._active = True
+        threading.setprofile(self._profile)
+        sys.setprofile(self._profile)
+
+    def stop(self) -> None:
+        self._active = False
+        sys.setprofile(None)
+        threading.setprofile(None)
+
+    def _profile(self, frame: FrameType, event: str, arg: Any) -> None:
+        if not self._active:
+            return
+        now = time.perf_counter()
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._local.root = threading.current_thread().name
+        if event == "call" or event == "c_call":
+            if event == "call":
+                label = _frame_label(frame)
+            else:
+                module = getattr(arg, "__module__", None) or "builtins"
+                label = f"{module}:{getattr(arg, '__qualname__', repr(arg))}"
+            parent = stack[-1][0] if stack else self._local.root
+            # C calls are attributed through the Python frame calling them.
+            stack.append([f"{parent};{label}", now, 0.0, frame])
+        elif stack:
+            path, started, children, call_frame = stack.pop()
+            elapsed = now - started
+            micros = int((elapsed - children) * 1_000_000)
+            if micros > 0:
+                self.stacks[path] += micros
+                self.stage_samples[self.stages.for_frame(call_frame)] += micros
+            if stack:
+                stack[-1][2] += elapsed
+
+class RunProfiler:
+    """
+    Profiles a whole crawl: CPU stacks, allocations and a per-stage split.
+
+    ``mode`` is ``sampling`` (a background thread samples every stack each
+    ``interval`` seconds, cheap enough for real runs) or ``deterministic``
+    (every call is traced, exact but slow). ``tracemalloc`` runs alongside,
+    keeping ``trace_frames`` frames per allocation: one frame (its default)
+    already slows allocation-heavy parsing down about 4x, deeper tracebacks
+    several times more. :meth:`stop` writes to ``directory``:
+
+    * ``stacks.collapsed``: ``thread;frame;frame count`` lines for
+      flamegraph.pl / speedscope,
+    * ``allocations.txt``: the ``top_n`` allocation sites still holding
+      memory at the end of the run, tagged with their stage when the
+      traceback is deep enough to tell (``?`` otherwise),
+    * ``stages.json``: wall/CPU time and net traced memory per stage from
+      ``StageClock``, and the profiler's own share of samples per stage.
+
+    ``stage_functions`` maps each stage to the functions that implement it;
+    frames and allocations are attributed to the innermost one on the stack.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        stage_functions: Mapping[str, Iterable[Callable[..., Any]]],
+        mode: str = MODE_SAMPLING,
+        interval: float = 0.005,
+        top_n: int = 25,
+        trace_frames: int = 1,
+    ) -> None:
+        if mode not in PROFILE_MODES:
+            raise ValueError(
+                f"Unsupported profile mode {mode!r}; expected one of {', '.join(PROFILE_MODES)}."
+            )
+        self.directory = Path(directory)
+        self.mode = mode
+        self.top_n = top_n
+        self.trace_frames = max(1, trace_frames)
+        self.clock = StageClock()
+        self._stages = _StageIndex(stage_functions)
+        self._cpu: Any = (
+            SamplingProfiler(self._stages, interval)
+            if mode == MODE_SAMPLING
+            else DeterministicProfiler(self._stages)
+        )
+        self._started_wall = 0.0
+        self._started_cpu = 0.0
+
+    def start(self) -> "RunProfiler":
+        tracemalloc.start(self.trace_frames)
+        self._started_wall = time.perf_counter()
+        self._started_cpu = time.process_time()
+        self._cpu.start()
+        return self
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop profiling, write the reports and return the stage split."""
+        self._cpu.stop()
+        wall = time.perf_counter() - self._started_wall
+        cpu = time.process_time() - self._started_cpu
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot = snapshot.filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with (self.directory / "stacks.collapsed").open("w", encoding="utf-8") as f:
+            for stack, count in sorted(self._cpu.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        self._write_allocations(snapshot.statistics("traceback"), peak)
+
+        samples_total = sum(self._cpu.stage_samples.values()) or 1
+        report = {
+            "mode": self.mode,
+            "wall_seconds": round(wall, 6),
+            "cpu_seconds": round(cpu, 6),
+            "peak_traced_bytes": peak,
+            "stages": {
+                name: {
+                    "calls": int(entry["calls"]),
+                    "wall_seconds": round(entry["wall"], 6),
+                    "cpu_seconds": round(entry["cpu"], 6),
+                    "net_bytes": int(entry["bytes"]),
+                }
+                for name, entry in sorted(self.clock.totals.items())
+            },
+            "profile_share": {
+                name: round(count / samples_total, 4)
+                for name, count in self._cpu.stage_samples.most_common()
+            },
+        }
+        with (self.directory / "stages.json").open("w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    def _write_allocations(self, statistics: List[Any], peak: int) -> None:
+        total = sum(stat.size for stat in statistics)
+        lines = [
+            f"Traced memory: {total / 1024:.1f} KiB retained at the end of the run, "
+            f"{peak / 1024:.1f} KiB at peak",
+            "",
+        ]
+        for rank, stat in enumerate(statistics[: self.top_n], start=1):
+            lines.append(
+                f"#{rank}: {stat.size / 1024:.1f} KiB in {stat.count} blocks "
+                f"[{self._stages.for_traceback(stat.traceback, self.trace_frames)}]"
+            )
+            lines.extend(stat.traceback.format(limit=6, most_recent_first=True))
+            lines.append("")
+        (self.directory / "allocations.txt").write_text("\n".join(lines), encoding="utf-8")
+
+def format_stage_table(report: Mapping[str, Any]) -> str:
+    """Fixed-width per-stage wall/CPU table for the end-of-run log."""
+    rows = [("stage", "calls", "wall s", "cpu s", "profile", "net KiB")]
+    shares = report.get("profile_share", {})
+    for name in list(STAGES) + [OTHER]:
+        entry = report["stages"].get(name)
+        if entry is None and name not in shares:
+            continue
+        entry = entry or {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "net_bytes": 0}
+        rows.append(
+            (
+                name,
+                str(entry["calls"]),
+                f"{entry['wall_seconds']:.3f}",
+                f"{entry['cpu_seconds']:.3f}",
+                f"{shares.get(name, 0.0):.1%}",
+                f"{entry['net_bytes'] / 1024:.1f}",
+            )
+        )
+    rows.append(
+        ("run", "", f"{report['wall_seconds']:.3f}", f"{report['cpu_seconds']:.3f}", "", "")
+    )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join([row[0].ljust(widths[0])] + [c.rjust(w) for c, w in zip(row[1:], widths[1:])]).rstrip()
+        for row in rows
+    )
@@ -1,5 +1,9 @@
+import asyncio
 import threading
 import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Union
 
 class RateLimiter:
     """
@@ -22,4 +26,157 @@ class RateLimiter:
             elapsed = now - self._last_call
             if elapsed < self.interval:
                 time.sleep(self.interval - elapsed)
-            self._last_call = time.time()
\ No newline at end of file
+            self._last_call = time.time()
+
+class AsyncRateLimiter:
+    """
+    asyncio counterpart of :class:`RateLimiter`.
+
+    Each caller reserves the next free slot and then sleeps without holding
+    any lock, so many coroutines can queue up while the event loop keeps
+    servicing in-flight requests.
+    """
+
+    def __init__(self, calls_per_minute: int) -> None:
+        if calls_per_minute <= 0:
+            raise ValueError("calls_per_minute must be positive.")
+        self.interval = 60.0 / float(calls_per_minute)
+        self._next_slot = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+def parse_retry_after(value: Union[str, int, float, None], now: Optional[float] = None) -> Optional[float]:
+    """Convert a ``Retry-After`` header (seconds or HTTP date) to seconds."""
+    if value is None or value == "":
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(str(value)).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+@dataclass
+class _Bucket:
+    calls_per_minute: float
+    # Theoretical arrival time of the next request (GCRA form of a token
+    # bucket): the bucket is full when ``tat <= now``.
+    tat: float = 0.0
+    blocked_until: float = 0.0
+    successes: int = 0
+
+class TokenBucketRateLimiter:
+    """
+    Token-bucket rate limiter with burst capacity, per-host buckets and
+    AIMD adaptation.
+
+    Each host gets ``calls_per_minute`` with up to ``burst`` requests allowed
+    back to back. Callers reserve a slot under a short lock and sleep outside
+    it, so threads (or coroutines via :meth:`acquire`) never serialize on the
+    lock itself. :meth:`record_response` feeds server responses back: 429/503
+    multiply the host's rate by ``backoff_factor`` and honour ``Retry-After``;
+    every ``success_threshold`` consecutive successes add ``increase_step``
+    calls per minute, up to ``max_calls_per_minute``.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: int,
+        burst: int = 1,
+        adaptive: bool = True,
+        min_calls_per_minute: float = 1.0,
+        max_calls_per_minute: Optional[float] = None,
+        backoff_factor: float = 0.5,
+        increase_step: Optional[float] = None,
+        success_threshold: int = 20,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if calls_per_minute <= 0:
+            raise ValueError("calls_per_minute must be positive.")
+        if burst < 1:
+            raise ValueError("burst must be at least 1.")
+        self.calls_per_minute = float(calls_per_minute)
+        self.burst = burst
+        self.adaptive = adaptive
+        self.min_calls_per_minute = min(min_calls_per_minute, self.calls_per_minute)
+        self.max_calls_per_minute = float(max_calls_per_minute or calls_per_minute)
+        self.backoff_factor = backoff_factor
+        self.increase_step = increase_step or max(1.0, self.max_calls_per_minute * 0.1)
+        self.success_threshold = success_threshold
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, _Bucket] = {}
+
+    def _bucket(self, host: Optional[str]) -> _Bucket:
+        key = host or ""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _Bucket(calls_per_minute=self.calls_per_minute)
+            self._buckets[key] = bucket
+        return bucket
+
+    def _schedule(self, host: Optional[str], commit_if_late: bool) -> Optional[float]:
+        """Return the delay before a request may start, reserving its slot."""
+        with self._lock:
+            now = self._clock()
+            bucket = self._bucket(host)
+            interval = 60.0 / bucket.calls_per_minute
+            tolerance = (self.burst - 1) * interval
+            tat = max(bucket.tat, now)
+            allowed_at = max(tat - tolerance, bucket.blocked_until, now)
+            if allowed_at > now and not commit_if_late:
+                return None
+            bucket.tat = max(tat, allowed_at) + interval
+            return allowed_at - now
+
+    def wait(self, host: Optional[str] = None) -> None:
+        delay = self._schedule(host, commit_if_late=True) or 0.0
+        if delay > 0:
+            time.sleep(delay)
+
+    def try_acquire(self, host: Optional[str] = None) -> bool:
+        """Take a token only if one is available right now."""
+        return self._schedule(host, commit_if_late=False) is not None
+
+    async def acquire(self, host: Optional[str] = None) -> None:
+        delay = self._schedule(host, commit_if_late=True) or 0.0
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def current_rate(self, host: Optional[str] = None) -> float:
+        with self._lock:
+            return self._bucket(host).calls_per_minute
+
+    def record_response(
+        self,
+        status_code: int,
+        retry_after: Union[str, int, float, None] = None,
+        host: Optional[str] = None,
+    ) -> None:
+        if not self.adaptive:
+            return
+        delay = parse_retry_after(retry_after)
+        with self._lock:
+            bucket = self._bucket(host)
+            if status_code in (429, 503):
+                bucket.successes = 0
+                bucket.calls_per_minute = max(
+                    self.min_calls_per_minute, bucket.calls_per_minute * self.backoff_factor
+                )
+                if delay:
+                    bucket.blocked_until = max(bucket.blocked_until, self._clock() + delay)
+            elif 200 <= status_code < 400:
+                bucket.successes += 1
+                if bucket.successes >= self.success_threshold:
+                    bucket.successes = 0
+                    bucket.calls_per_minute = min(
+                        self.max_calls_per_minute, bucket.calls_per_minute + self.increase_step
+                    )
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    recorded_at REAL NOT NULL
+);
+"""
+
+# Response headers worth keeping; the rest is transport noise.
+RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+_RECORDED_HEADER_KEYS = frozenset(name.lower() for name in RECORDED_HEADERS)
+
+class ReplayResponse:
+    """The subset of ``requests.Response`` that ``RealtorClient`` reads."""
+
+    def __init__(self, url: str, status_code: int, body: bytes, headers: Dict[str, str]) -> None:
+        self.url = url
+        self.status_code = status_code
+        self.content = body
+        self.headers: CaseInsensitiveDict = CaseInsensitiveDict(headers)
+        self.encoding = "utf-8"
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+    def close(self) -> None:
+        pass
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code} for {self.url}", response=self)
+
+class ReplayStore:
+    """Recorded responses keyed by URL in a SQLite file, bodies zlib-compressed."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def put(
+        self, url: str, status: int, body: bytes, headers: Optional[Mapping[str, str]] = None
+    ) -> None:
+        # Servers disagree on header case; match names the way HTTP does.
+        kept = {k: v for k, v in (headers or {}).items() if k.lower() in _RECORDED_HEADER_KEYS}
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO recordings (url, status, headers, body, recorded_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (url, status, json.dumps(kept), zlib.compress(body), time.time()),
+                )
+
+    def put_many(self, rows: Iterable[Tuple[str, int, bytes]]) -> None:
+        """Bulk-load ``(url, status, body)`` rows, e.g. generated fixtures."""
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO recordings (url, status, headers, body, recorded_at) "
+                    "VALUES (?, ?, '{}', ?, ?)",
+                    ((url, status, zlib.compress(body), now) for url, status, body in rows),
+                )
+
+    def get(self, url: str) -> Optional[ReplayResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body FROM recordings WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, headers, body = row
+        return ReplayResponse(url, status, zlib.decompress(body), json.loads(headers))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM recordings").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class RecordingSession:
+    """
+    Wraps a real ``requests.Session`` and records every response it returns.
+
+    Error responses are recorded too, so a replay reproduces the crawl as it
+    happened; record again to refresh the fixtures.
+    """
+
+    def __init__(
+        self,
+        store: ReplayStore,
+        session: Optional[requests.Session] = None,
+        pool_size: int = 10,
+    ) -> None:
+        self.store = store
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+    def get(self, url: str, **kwargs: Any) -> Any:
+        response = self.session.get(url, **kwargs)
+        # 304s only make sense against the recorder's own response cache.
+        if response.status_code != 304:
+            self.store.put(url, response.status_code, response.content, response.headers)
+        return response
+
+class ReplaySession:
+    """
+    ``requests.Session`` stand-in serving recorded responses offline.
+
+    Each request sleeps ``latency`` seconds (plus up to ``jitter``) to
+    simulate the network, and fails with ``error_status`` (or a connection
+    error when ``error_status`` is ``None``) with probability
+    ``error_rate``. Jitter and failures are derived from a hash of
+    ``seed``, the URL and how many times it has been requested, so a given
+    configuration fails the same requests every run, whatever order worker
+    threads send them in. URLs that were never recorded answer 404, which
+    the client treats as the end of a zip's results.
+    """
+
+    def __init__(
+        self,
+        store: ReplayStore,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: Optional[int] = 503,
+        seed: int = 0,
+        sleep: Any = time.sleep,
+    ) -> None:
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.errors = 0
+        self.bytes_served = 0
+        self.seed = seed
+        self._attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._sleep = sleep
+
+    def _draw(self, url: str, attempt: int, purpose: str) -> float:
+        """A uniform value in [0, 1) fixed by the seed, URL and attempt."""
+        key = f"{self.seed}\0{url}\0{attempt}\0{purpose}".encode("utf-8")
+        digest = hashlib.blake2b(key, digest_size=8).digest()
+        return int.from_bytes(digest, "big") / 2**64
+
+    def get(self, url: str, **kwargs: Any) -> ReplayResponse:
+        with self._lock:
+            self.requests += 1
+            attempt = self._attempts[url] = self._attempts.get(url, 0) + 1
+        delay = self.latency
+        if self.jitter:
+            delay += self._draw(url, attempt, "jitter") * self.jitter
+        fail = self.error_rate > 0 and self._draw(url, attempt, "error") < self.error_rate
+        if fail:
+            with self._lock:
+                self.errors += 1
+        if delay > 0:
+            self._sleep(delay)
+        if fail:
+            if self.error_status is None:
+                raise requests.ConnectionError(f"Simulated connection error for {url}")
+            return ReplayResponse(url, self.error_status, b"", {"Retry-After": "0"})
+
+        response = self.store.get(url)
+        if response is None:
+            return ReplayResponse(url, 404, b"", {})
+        with self._lock:
+            self.bytes_served += len(response.content)
+        return response
@@ -0,0 +1,177 @@
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+# Statuses that simply mean "there is no such page": the end of pagination.
+END_OF_RESULTS_STATUS_CODES = frozenset({404, 410})
+REQUEST_BUDGET_EXHAUSTED = "Request budget exhausted"
+
+class FetchError(Exception):
+    """A page could not be fetched; ``retryable`` tells transient from fatal."""
+
+    def __init__(
+        self,
+        url: str,
+        message: str,
+        retryable: bool,
+        status_code: Optional[int] = None,
+        zip_code: Optional[str] = None,
+        page_number: Optional[int] = None,
+        attempts: int = 1,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        super().__init__(f"{message} ({url})")
+        self.url = url
+        self.message = message
+        self.retryable = retryable
+        self.status_code = status_code
+        self.zip_code = zip_code
+        self.page_number = page_number
+        self.attempts = attempts
+        self.retry_after = retry_after
+
+def is_retryable_status(status_code: int) -> bool:
+    return status_code in RETRYABLE_STATUS_CODES
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped at ``max_delay``."""
+
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    jitter: bool = True
+    rng: random.Random = field(default_factory=random.Random)
+
+    def delay_for(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number ``attempt`` (1-based)."""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = self.rng.uniform(0, delay)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+class RetryBudget:
+    """Caps the total number of retries a run may spend across all zips."""
+
+    def __init__(self, max_retries: Optional[int]) -> None:
+        self.max_retries = max_retries
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def try_consume(self) -> bool:
+        with self._lock:
+            if self.max_retries is not None and self.used >= self.max_retries:
+                return False
+            self.used += 1
+            return True
+
+class RequestBudget:
+    """Caps the total number of requests a run may make, retries included."""
+
+    def __init__(self, max_requests: Optional[int]) -> None:
+        self.max_requests = max_requests
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def try_consume(self) -> bool:
+        with self._lock:
+            if self.max_requests is not None and self.used >= self.max_requests:
+                return False
+            self.used += 1
+            return True
+
+class CircuitBreaker:
+    """
+    Pauses every caller when the recent error rate spikes.
+
+    Outcomes of the last ``window`` requests are tracked; once at least
+    ``min_requests`` were seen and the failure ratio reaches
+    ``error_rate_threshold`` the breaker opens and :meth:`before_request`
+    blocks all threads for ``cooldown`` seconds. The outcome window is reset
+    afterwards so the crawl resumes at full speed if the errors are gone.
+    """
+
+    def __init__(
+        self,
+        error_rate_threshold: float = 0.5,
+        window: int = 20,
+        min_requests: int = 10,
+        cooldown: float = 60.0,
+        logger: Optional[Any] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.error_rate_threshold = error_rate_threshold
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.logger = logger
+        self.trips = 0
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+        self._sleep = sleep
+        self._clock = clock
+
+    def before_request(self) -> None:
+        with self._lock:
+            remaining = self._open_until - self._clock()
+        if remaining > 0:
+            self._sleep(remaining)
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            self._outcomes.append(success)
+            if len(self._outcomes) < self.min_requests:
+                return
+            failures = self._outcomes.count(False)
+            if failures / len(self._outcomes) < self.error_rate_threshold:
+                return
+            self._open_until = self._clock() + self.cooldown
+            self._outcomes.clear()
+            self.trips += 1
+        if self.logger:
+            self.logger.warning(
+                "Error rate above %.0f%%, pausing crawler for %.0fs",
+                self.error_rate_threshold * 100,
+                self.cooldown,
+            )
+
+@dataclass
+class FailedUnit:
+    """A zip/page that could not be fetched, for the end-of-run summary."""
+
+    zip_code: str
+    page_number: Optional[int]
+    error: str
+    status_code: Optional[int]
+    retryable: bool
+    attempts: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "zip_code": self.zip_code,
+            "page_number": self.page_number,
+            "error": self.error,
+            "status_code": self.status_code,
+            "retryable": self.retryable,
+            "attempts": self.attempts,
+        }
+
+def summarize_failures(units: List[FailedUnit]) -> Dict[str, Any]:
+    """Structured report of the units that could not be fetched."""
+    by_status: Dict[str, int] = {}
+    for unit in units:
+        key = str(unit.status_code) if unit.status_code is not None else "network"
+        by_status[key] = by_status.get(key, 0) + 1
+    return {
+        "failed_units": len(units),
+        "failed_zip_codes": sorted({unit.zip_code for unit in units}),
+        "by_status": by_status,
+        "units": [unit.to_dict() for unit in units],
+    }
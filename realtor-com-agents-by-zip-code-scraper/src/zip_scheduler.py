@@ -0,0 +1,222 @@
+import heapq
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from agent_dedup import agent_identity
+from parsers.agent_normalizer import split_list_field
+
+# Agents per zip assumed until a zip has been crawled to the end.
+DEFAULT_EXPECTED_AGENTS = 20.0
+
+@dataclass
+class ZipAssignment:
+    """A zip handed out by :meth:`ZipScheduler.next_zip` and how far to crawl it."""
+
+    zip_code: str
+    max_records: Optional[int]
+    estimated_new: float
+    reserved_requests: int = 0
+    # Enforced by the caller even while the page size (and so
+    # ``max_records``) is still unknown.
+    max_pages: Optional[int] = None
+
+class ZipScheduler:
+    """
+    Orders zips at runtime by their estimated yield of agents not seen yet.
+
+    Every agent crawled so far lists the zips it serves ("Zip codes
+    serviced"), so a pending zip that many known agents serve will mostly
+    return duplicates. A zip's marginal yield is estimated as the mean agent
+    count of the zips crawled so far minus the known agents serving it, and
+    :meth:`next_zip` hands out the zip with the best estimate (input order
+    breaks ties, so before any data has arrived the order is unchanged).
+
+    A zip whose known agents already cover ``saturation`` of the expected
+    count is saturated; with ``saturated_pages`` set only that many pages of
+    it are fetched. With a ``request_budget`` and/or a ``deadline`` (seconds
+    from construction) zips are handed out until the requests that still
+    fit are spent, the last ones capped to what is left, so the zips with
+    the best yield are the ones crawled. Requests are counted as one per
+    page plus one per zip for the end of its results; the deadline is
+    converted to requests at the rate observed so far. Each handed-out zip
+    reserves its expected pages; until a page has shown the page size there
+    is no expectation, so a zip then reserves its whole cap and the next
+    zip waits for it to finish.
+    """
+
+    def __init__(
+        self,
+        saturation: float = 0.8,
+        saturated_pages: Optional[int] = None,
+        request_budget: Optional[int] = None,
+        deadline: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if saturated_pages is not None and saturated_pages < 1:
+            raise ValueError("saturated_pages must be at least 1.")
+        self.saturation = saturation
+        self.saturated_pages = saturated_pages
+        self.request_budget = request_budget
+        self.deadline = deadline
+        self._clock = clock
+        self._started = clock()
+        self._lock = threading.Lock()
+
+        self._order: Dict[str, int] = {}
+        self._pending: Set[str] = set()
+        # Min-heap of (known agents serving the zip, input position, zip):
+        # the fewer agents already seen, the more new ones the zip should
+        # yield. Coverage only grows, so stale entries are re-queued on pop.
+        self._heap: List[Tuple[int, int, str]] = []
+        self._coverage: Dict[str, int] = {}
+        self._seen: Set[str] = set()
+
+        self._complete_zips = 0
+        self._complete_agents = 0
+        self._page_size = 0
+        self._requests = 0
+        self._reserved = 0
+        self.stats: Dict[str, int] = {
+            "zips_crawled": 0,
+            "zips_capped": 0,
+            "zips_skipped": 0,
+            "requests": 0,
+            "agents": 0,
+            "new_agents": 0,
+        }
+
+    def add(self, zip_codes: Iterable[str]) -> None:
+        """Queue zips for crawling; duplicates and already queued zips are ignored."""
+        with self._lock:
+            for zip_code in zip_codes:
+                if zip_code in self._order:
+                    continue
+                self._order[zip_code] = len(self._order)
+                self._pending.add(zip_code)
+                heapq.heappush(self._heap, (0, self._order[zip_code], zip_code))
+
+    @property
+    def expected_agents(self) -> float:
+        if not self._complete_zips:
+            return DEFAULT_EXPECTED_AGENTS
+        return self._complete_agents / self._complete_zips
+
+    def _requests_left(self) -> Optional[float]:
+        limits: List[float] = []
+        if self.request_budget is not None:
+            limits.append(self.request_budget - self._requests - self._reserved)
+        if self.deadline is not None:
+            elapsed = self._clock() - self._started
+            if elapsed >= self.deadline:
+                return 0.0
+            if self._requests:
+                rate = self._requests / max(elapsed, 1e-9)
+                limits.append((self.deadline - elapsed) * rate - self._reserved)
+        return min(limits) if limits else None
+
+    def _pop_best(self) -> Optional[str]:
+        while self._heap:
+            covered, _, zip_code = heapq.heappop(self._heap)
+            if zip_code not in self._pending:
+                continue
+            current = self._coverage.get(zip_code, 0)
+            if current != covered:
+                heapq.heappush(self._heap, (current, self._order[zip_code], zip_code))
+                continue
+            self._pending.discard(zip_code)
+            return zip_code
+        return None
+
+    def next_zip(self) -> Optional[ZipAssignment]:
+        """
+        The pending zip with the best estimated yield, or ``None`` when done
+        (or, in budget mode, while zips in flight hold every request left).
+        """
+        with self._lock:
+            left = self._requests_left()
+            if left is not None and left < 2:
+                if self._reserved:
+                    # Zips in flight may hand back unused requests.
+                    return None
+                self.stats["zips_skipped"] += len(self._pending)
+                self._pending.clear()
+                self._heap.clear()
+                return None
+            zip_code = self._pop_best()
+            if zip_code is None:
+                return None
+
+            expected = self.expected_agents
+            covered = self._coverage.get(zip_code, 0)
+            max_pages: Optional[int] = None
+            if self.saturated_pages is not None and covered >= self.saturation * expected:
+                max_pages = self.saturated_pages
+                self.stats["zips_capped"] += 1
+            if left is not None:
+                # One of the requests left goes to the end of the results.
+                fits = int(left) - 1
+                if max_pages is None or fits < max_pages:
+                    max_pages = fits
+            if self._page_size:
+                pages = math.ceil(expected / self._page_size)
+                if max_pages is not None:
+                    pages = min(pages, max_pages)
+            else:
+                pages = max_pages if left is not None else 1
+            reserved = pages + 1
+            self._reserved += reserved
+            max_records = None
+            if max_pages is not None and self._page_size:
+                max_records = max_pages * self._page_size
+            return ZipAssignment(
+                zip_code=zip_code,
+                max_records=max_records,
+                estimated_new=max(0.0, expected - covered),
+                reserved_requests=reserved,
+                max_pages=max_pages,
+            )
+
+    def record_page(self, agents: Iterable[Any]) -> int:
+        """Learn from one crawled page; returns how many of its agents were new."""
+        new = 0
+        count = 0
+        with self._lock:
+            for agent in agents:
+                count += 1
+                key = agent_identity(agent)
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                new += 1
+                for zip_code in split_list_field(agent.get("Zip codes serviced")):
+                    self._coverage[zip_code] = self._coverage.get(zip_code, 0) + 1
+            self._requests += 1
+            self._page_size = max(self._page_size, count)
+            self.stats["requests"] += 1
+            self.stats["agents"] += count
+            self.stats["new_agents"] += new
+        return new
+
+    def finish_zip(self, assignment: ZipAssignment, agents: int) -> None:
+        """Close out a zip once all of its pages have been recorded."""
+        with self._lock:
+            self._reserved -= assignment.reserved_requests
+            self._requests += 1
+            self.stats["requests"] += 1
+            self.stats["zips_crawled"] += 1
+            if assignment.max_pages is None:
+                # Capped zips would drag the per-zip mean down.
+                self._complete_zips += 1
+                self._complete_agents += agents
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            summary: Dict[str, Any] = dict(self.stats)
+            summary["zips_pending"] = len(self._pending)
+            summary["new_agents_per_request"] = round(
+                self.stats["new_agents"] / max(1, self.stats["requests"]), 3
+            )
+            return summary
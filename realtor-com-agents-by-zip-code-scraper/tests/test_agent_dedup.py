@@ -0,0 +1,68 @@
+from typing import Any, Dict
+
+from src.agent_dedup import AgentDedupIndex, agent_identity
+
+PROFILE = "https://www.realtor.com/realestateagents/David-Solomon_Brentwood_CA_748820_292674308"
+
+def make_agent(**overrides: Any) -> Dict[str, Any]:
+    agent: Dict[str, Any] = {
+        "Agent name": "David Solomon",
+        "Website": PROFILE,
+        "Email": "",
+        "Listing count": 11,
+        "Sold count": 48,
+        "Office Phone": "(310) 270-0000",
+        "Mobile Phones": "(310) 279-0000",
+        "Areas serviced": "Brentwood, Bel Air,",
+        "Zip codes serviced": "90049, 90068",
+        "Office / Company name": "Brentwood",
+        "Company Website": None,
+        "Review count": 0,
+        "Agent Photo": None,
+    }
+    agent.update(overrides)
+    return agent
+
+def test_agent_identity_prefers_profile_id_then_name_office_phone() -> None:
+    assert agent_identity(make_agent()) == agent_identity(
+        make_agent(Website=PROFILE + "/?from=90210", **{"Agent name": "D. Solomon"})
+    )
+    no_url = make_agent(Website="")
+    assert agent_identity(no_url) == agent_identity(
+        make_agent(Website="", **{"Agent name": "  david   SOLOMON", "Office Phone": "310.270.0000"})
+    )
+    assert agent_identity(no_url) != agent_identity(make_agent(Website="", **{"Office Phone": "1"}))
+
+def test_dedup_index_merges_duplicates_in_first_seen_order() -> None:
+    index = AgentDedupIndex()
+    index.add(make_agent())
+    index.add(make_agent(Website="https://example.com/agents/other", **{"Agent name": "Other"}))
+    is_new = index.add(
+        make_agent(
+            Email="david@example.com",
+            **{
+                "Zip codes serviced": "90210, 90049",
+                "Areas serviced": "Bel Air, Malibu",
+                "Sold count": 50,
+                "Listing count": 3,
+            },
+        )
+    )
+
+    agents = list(index)
+    assert not is_new
+    assert [a["Agent name"] for a in agents] == ["David Solomon", "Other"]
+    merged = agents[0]
+    assert merged["Zip codes serviced"] == "90049, 90068, 90210"
+    assert merged["Areas serviced"] == "Brentwood, Bel Air, Malibu"
+    assert merged["Listing count"] == 11
+    assert merged["Sold count"] == 50
+    assert merged["Email"] == "david@example.com"
+    assert index.stats == {"seen": 3, "unique": 2, "duplicates": 1, "merged": 1}
+
+def test_dedup_index_keeps_identical_duplicates_verbatim() -> None:
+    index = AgentDedupIndex()
+    index.add_all([make_agent(), make_agent()])
+
+    assert list(index) == [make_agent()]
+    assert index.stats["merged"] == 0
@@ -0,0 +1,50 @@
+from src.agent_delta import ChangesetBuilder
+from src.agent_extractor import AgentExtractor
+from src.storage.snapshot_store import SnapshotStore
+
+from tests.test_agent_extractor import FakeLogger, PagedFakeRealtorClient
+
+def test_delta_crawl_replays_unchanged_zips_from_snapshot(tmp_path) -> None:
+    zip_codes = ["90049", "90210"]
+    first = AgentExtractor(
+        client=PagedFakeRealtorClient(),
+        logger=FakeLogger(),
+        snapshot=SnapshotStore(tmp_path / "snapshot.sqlite3"),
+    )
+    expected = first.extract_for_zip_codes(zip_codes)
+    assert first.delta_stats == {"unchanged": 0, "changed": 2}
+
+    client = PagedFakeRealtorClient()
+    second = AgentExtractor(
+        client=client,
+        logger=FakeLogger(),
+        snapshot=SnapshotStore(tmp_path / "snapshot.sqlite3"),
+    )
+    agents = second.extract_for_zip_codes(zip_codes)
+
+    assert agents == expected
+    # Only page 1 of each zip is fetched once its fingerprint matches.
+    assert client.page_calls == [("90049", 1), ("90210", 1)]
+    assert second.delta_stats == {"unchanged": 2, "changed": 0}
+    assert second.refreshed_zips == set(zip_codes)
+
+def test_changeset_reports_added_updated_and_removed_agents() -> None:
+    def agent(name: str, sold: int) -> dict:
+        return {"Agent name": name, "Website": f"https://example.com/{name}", "Sold count": sold}
+
+    previous = [
+        ("90049", agent("kept", 1)),
+        ("90049", agent("changed", 1)),
+        ("90049", agent("gone", 1)),
+        ("90402", agent("elsewhere", 1)),
+    ]
+    builder = ChangesetBuilder(previous)
+    list(builder.track([agent("kept", 1), agent("changed", 2), agent("new", 1), agent("new", 1)]))
+
+    changes = builder.build(refreshed_zips={"90049"})
+
+    assert changes["summary"] == {"added": 1, "updated": 1, "removed": 1}
+    assert changes["added"][0]["Agent name"] == "new"
+    assert changes["updated"][0]["changes"] == {"Sold count": {"old": 1, "new": 2}}
+    # "elsewhere" was not in a refreshed zip, so its absence proves nothing.
+    assert [a["Agent name"] for a in changes["removed"]] == ["gone"]
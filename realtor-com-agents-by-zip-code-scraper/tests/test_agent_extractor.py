@@ -1,6 +1,10 @@
+import random
+import threading
+import time
 from typing import Any, Dict, List
 
-from src.agent_extractor import AgentExtractor
+from src.agent_extractor import AgentExtractor, FetchError
+from src.storage.checkpoint_journal import CheckpointJournal
 
 class FakeLogger:
     def __init__(self) -> None:
@@ -12,12 +16,17 @@ class FakeLogger:
     def debug(self, msg: str, *args: Any, **kwargs: Any) -> None:
         self.messages.append(msg % args if args else msg)
 
+    def warning(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        self.messages.append(msg % args if args else msg)
+
 class FakeRealtorClient:
     def __init__(self) -> None:
         self.calls: List[str] = []
+        self._lock = threading.Lock()
 
     def search_agents_by_zip(self, zip_code: str, max_records=None) -> List[Dict[str, Any]]:
-        self.calls.append(zip_code)
+        with self._lock:
+            self.calls.append(zip_code)
         return [
             {
                 "name": f"Agent {zip_code}",
@@ -48,4 +57,101 @@ def test_agent_extractor_normalizes_and_limits_trial() -> None:
     assert len(agents) == 2
     assert {a["Zip codes serviced"] for a in agents} == {"90049, 99999", "90210, 99999"}
     assert "Agent 90049" in agents[0]["Agent name"]
-    assert client.calls[:2] == ["90049", "90210"]
\ No newline at end of file
+    assert client.calls[:2] == ["90049", "90210"]
+
+class SlowFakeRealtorClient(FakeRealtorClient):
+    """Completes zips in random order to exercise the worker pool."""
+
+    def search_agents_by_zip(self, zip_code: str, max_records=None) -> List[Dict[str, Any]]:
+        time.sleep(random.uniform(0, 0.02))
+        return super().search_agents_by_zip(zip_code, max_records) * 2
+
+def test_agent_extractor_workers_preserve_input_order() -> None:
+    zip_codes = [str(90000 + i) for i in range(20)]
+
+    sequential = AgentExtractor(client=SlowFakeRealtorClient(), logger=FakeLogger())
+    expected = sequential.extract_for_zip_codes(zip_codes)
+
+    client = SlowFakeRealtorClient()
+    concurrent = AgentExtractor(client=client, logger=FakeLogger(), workers=4)
+    agents = concurrent.extract_for_zip_codes(zip_codes)
+
+    assert agents == expected
+    assert sorted(client.calls) == zip_codes
+
+def test_agent_extractor_workers_respect_trial_limit_exactly() -> None:
+    zip_codes = [str(90000 + i) for i in range(20)]
+    client = SlowFakeRealtorClient()
+    extractor = AgentExtractor(client=client, logger=FakeLogger(), workers=4)
+
+    agents = extractor.extract_for_zip_codes(zip_codes, trial_limit=5)
+
+    assert len(agents) == 5
+    assert [a["Agent name"] for a in agents] == [
+        "Agent 90000", "Agent 90000", "Agent 90001", "Agent 90001", "Agent 90002",
+    ]
+    # Only a bounded window of zips is requested past the limit.
+    assert len(client.calls) < len(zip_codes)
+
+class PagedFakeRealtorClient(FakeRealtorClient):
+    """Two pages per zip; optionally fails on one zip to simulate a crash."""
+
+    def __init__(self, fail_on: str | None = None, error: Exception | None = None) -> None:
+        super().__init__()
+        self.fail_on = fail_on
+        self.error = error or RuntimeError("connection reset")
+        self.page_calls: List[tuple] = []
+
+    def iter_agent_pages(self, zip_code: str, max_records=None, start_page: int = 1):
+        for page in range(start_page, 3):
+            self.page_calls.append((zip_code, page))
+            if zip_code == self.fail_on and page == 2:
+                raise self.error
+            agent = self.search_agents_by_zip(zip_code)[0]
+            agent["name"] = f"Agent {zip_code} p{page}"
+            yield [agent]
+
+def test_agent_extractor_resumes_from_checkpoint(tmp_path) -> None:
+    zip_codes = ["90049", "90210", "90402"]
+    path = tmp_path / "agents.json.checkpoint.jsonl"
+
+    crashed = PagedFakeRealtorClient(fail_on="90210")
+    extractor = AgentExtractor(
+        client=crashed, logger=FakeLogger(), journal=CheckpointJournal(path)
+    )
+    try:
+        extractor.extract_for_zip_codes(zip_codes)
+    except RuntimeError:
+        pass
+
+    client = PagedFakeRealtorClient()
+    resumed = AgentExtractor(
+        client=client, logger=FakeLogger(), journal=CheckpointJournal(path, resume=True)
+    )
+    agents = resumed.extract_for_zip_codes(zip_codes)
+
+    assert [a["Agent name"] for a in agents] == [
+        f"Agent {z} p{p}" for z in zip_codes for p in (1, 2)
+    ]
+    assert client.page_calls == [("90210", 2), ("90402", 1), ("90402", 2)]
+
+def test_agent_extractor_records_failed_units_and_continues(tmp_path) -> None:
+    error = FetchError("https://example.com/agents/90210/pg-2", "HTTP 503", True, 503, attempts=4)
+    journal = CheckpointJournal(tmp_path / "agents.json.checkpoint.jsonl")
+    for workers in (1, 2):
+        client = PagedFakeRealtorClient(fail_on="90210", error=error)
+        extractor = AgentExtractor(
+            client=client, logger=FakeLogger(), workers=workers, journal=journal
+        )
+        agents = extractor.extract_for_zip_codes(["90049", "90210", "90402"])
+
+        assert [a["Agent name"] for a in agents] == [
+            "Agent 90049 p1", "Agent 90049 p2", "Agent 90210 p1", "Agent 90402 p1", "Agent 90402 p2",
+        ]
+        summary = extractor.failure_summary()
+        assert summary["failed_zip_codes"] == ["90210"]
+        assert summary["by_status"] == {"503": 1}
+        assert summary["units"][0]["page_number"] == 2
+        assert summary["units"][0]["attempts"] == 4
+        assert not journal.is_zip_complete("90210")
+        journal = CheckpointJournal(tmp_path / f"run{workers}.checkpoint.jsonl")
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from src.agent_extractor import AgentExtractor
+from src.async_realtor_client import AsyncRealtorClient
+from src.utils.rate_limiter import AsyncRateLimiter
+from src.utils.retry import RetryPolicy
+
+CARD = """
+<div class="agent-card">
+  <a class="agent-name" href="https://example.com/agents/{zip}/{n}">Agent {zip}-{n}</a>
+  <span class="listing-count">Listings: 5</span>
+  <span class="zip-codes">{zip}</span>
+</div>
+"""
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves two pages of agents per zip and an empty third page."""
+
+    requested: List[str] = []
+    # Path -> how many more times it answers HTTP 503.
+    failing: Dict[str, int] = {}
+
+    def do_GET(self) -> None:
+        StubHandler.requested.append(self.path)
+        if StubHandler.failing.get(self.path, 0) > 0:
+            StubHandler.failing[self.path] -= 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        parts = self.path.strip("/").split("/")
+        zip_code = parts[1]
+        page = int(parts[2][3:]) if len(parts) > 2 else 1
+        body = ""
+        if page <= 2:
+            body = "".join(CARD.format(zip=zip_code, n=f"{page}{i}") for i in range(3))
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+class DummyLogger:
+    def info(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def warning(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def debug(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        pass
+
+@pytest.fixture()
+def stub_server():
+    StubHandler.requested = []
+    StubHandler.failing = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/agents"
+    server.shutdown()
+    server.server_close()
+
+def test_async_client_paginates_against_stub_server(stub_server: str) -> None:
+    async def run() -> List[Any]:
+        async with AsyncRealtorClient(
+            base_url=stub_server,
+            rate_limiter=AsyncRateLimiter(calls_per_minute=60_000),
+            logger=DummyLogger(),
+        ) as client:
+            return await client.search_agents_by_zip("90049")
+
+    agents = asyncio.run(run())
+
+    assert len(agents) == 6
+    assert agents[0]["name"] == "Agent 90049-10"
+    assert StubHandler.requested == ["/agents/90049", "/agents/90049/pg-2", "/agents/90049/pg-3"]
+
+def test_async_extractor_keeps_input_order_and_trial_limit(stub_server: str) -> None:
+    zip_codes = ["90049", "90210", "90402", "90401"]
+
+    async def run(trial_limit: Any) -> List[Any]:
+        async with AsyncRealtorClient(base_url=stub_server, logger=DummyLogger()) as client:
+            extractor = AgentExtractor(client=client, logger=DummyLogger(), workers=4)
+            return await extractor.extract_for_zip_codes_async(
+                zip_codes, trial_limit=trial_limit
+            )
+
+    agents = asyncio.run(run(None))
+    assert [a["Zip codes serviced"] for a in agents] == [z for z in zip_codes for _ in range(6)]
+
+    limited = asyncio.run(run(8))
+    assert limited == agents[:8]
+
+def test_async_crawl_retries_transient_errors_and_records_failed_zips(stub_server: str) -> None:
+    # 90049 recovers after one 503; 90210 keeps failing on its second page.
+    StubHandler.failing = {"/agents/90049": 1, "/agents/90210/pg-2": 100}
+
+    async def run() -> Any:
+        async with AsyncRealtorClient(
+            base_url=stub_server,
+            logger=DummyLogger(),
+            retry_policy=RetryPolicy(max_attempts=3, base_delay=0.0, jitter=False),
+        ) as client:
+            extractor = AgentExtractor(client=client, logger=DummyLogger(), workers=2)
+            agents = await extractor.extract_for_zip_codes_async(["90049", "90210"])
+            return agents, extractor, client.retry_count
+
+    agents, extractor, retries = asyncio.run(run())
+
+    # The failed zip keeps its first page instead of passing for complete.
+    assert [a["Zip codes serviced"] for a in agents] == ["90049"] * 6 + ["90210"] * 3
+    assert retries == 3
+    [unit] = extractor.failures
+    assert (unit.zip_code, unit.page_number, unit.status_code) == ("90210", 2, 503)
+    assert unit.attempts == 3
+    assert unit.retryable
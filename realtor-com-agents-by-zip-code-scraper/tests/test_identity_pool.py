@@ -0,0 +1,158 @@
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+
+from src.identity_pool import (
+    Identity,
+    IdentityPool,
+    PooledRealtorClient,
+    load_identities,
+)
+from src.config import Settings
+from src.main import build_crawl_client
+from src.realtor_client import FetchError, RealtorClient
+from tests.test_agent_extractor import FakeLogger
+from tests.test_realtor_client import ScriptedSession
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+class IdentityClient:
+    """Two pages per zip; ``blocked`` identities get HTTP 403 from ``block_from`` on."""
+
+    def __init__(self, identity: Identity, blocked: bool = False, block_from: int = 1) -> None:
+        self.identity = identity
+        self.blocked = blocked
+        self.block_from = block_from
+        self.requests: List[tuple] = []
+
+    def iter_agent_pages(
+        self, zip_code: str, max_records: Optional[int] = None, start_page: int = 1
+    ) -> Iterator[List[Dict[str, Any]]]:
+        for page in range(start_page, 3):
+            self.requests.append((zip_code, page))
+            if self.blocked and page >= self.block_from:
+                raise FetchError("http://test", "HTTP 403", retryable=False, status_code=403)
+            yield [{"name": f"Agent {zip_code}-{page}"}]
+
+def make_pool(clients: Dict[str, IdentityClient], clock: Clock, **kwargs: Any) -> IdentityPool:
+    identities = [client.identity for client in clients.values()]
+    return IdentityPool(
+        identities,
+        lambda identity: clients[identity.name],
+        logger=FakeLogger(),
+        clock=clock,
+        sleep=clock.sleep,
+        **kwargs,
+    )
+
+def test_load_identities_from_yaml_and_text(tmp_path: Path) -> None:
+    yaml_path = tmp_path / "identities.yaml"
+    yaml_path.write_text(
+        "identities:\n"
+        "  - {name: a, user_agent: UA-1, cookie: c1, proxy: 'http://p1:8080'}\n"
+        "  - {user_agent: UA-2}\n",
+        encoding="utf-8",
+    )
+    text_path = tmp_path / "user_agents.txt"
+    text_path.write_text("# comment\nUA-1\n\nUA-2\n", encoding="utf-8")
+
+    assert load_identities(yaml_path) == [
+        Identity("a", "UA-1", "c1", "http://p1:8080"),
+        Identity("identity-2", "UA-2"),
+    ]
+    assert [i.user_agent for i in load_identities(text_path)] == ["UA-1", "UA-2"]
+    text_path.write_text("# nothing here\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_identities(text_path)
+
+    client = RealtorClient(base_url="https://example.com", proxy="http://p1:8080")
+    assert client.session.proxies == {"http": "http://p1:8080", "https": "http://p1:8080"}
+
+def test_blocked_identity_hands_off_and_is_quarantined() -> None:
+    clock = Clock()
+    clients = {
+        "bad": IdentityClient(Identity("bad"), blocked=True, block_from=2),
+        "good": IdentityClient(Identity("good")),
+    }
+    pool = make_pool(clients, clock, block_threshold=2, quarantine_seconds=60)
+    pooled = PooledRealtorClient(pool)
+
+    # "bad" gets the first zip (tie on load and health, then first in order),
+    # is blocked on page 2 and "good" continues from there.
+    assert pooled.search_agents_by_zip("90001") == [
+        {"name": "Agent 90001-1"},
+        {"name": "Agent 90001-2"},
+    ]
+    assert clients["good"].requests == [("90001", 2)]
+
+    # "good" is now the healthier identity, so it gets the next zips.
+    pooled.search_agents_by_zip("90002")
+    assert clients["good"].requests[-2:] == [("90002", 1), ("90002", 2)]
+
+    # A second block in a row quarantines "bad"; with no identity left to
+    # hand off to the error surfaces.
+    pool.states[1].quarantined_until = clock.now + 1000
+    with pytest.raises(FetchError):
+        pooled.search_agents_by_zip("90003")
+    summary = pool.summary()
+    assert summary["bad"]["quarantines"] == 1
+    assert summary["bad"]["quarantined"]
+
+def test_empty_results_quarantine_and_pool_waits_for_release() -> None:
+    clock = Clock()
+
+    class EmptyClient(IdentityClient):
+        def iter_agent_pages(self, zip_code: str, max_records=None, start_page: int = 1):
+            self.requests.append((zip_code, start_page))
+            return iter(())
+
+    clients = {"only": EmptyClient(Identity("only"))}
+    pool = make_pool(clients, clock, empty_threshold=2, quarantine_seconds=30)
+    pooled = PooledRealtorClient(pool)
+
+    for zip_code in ("90001", "90002"):
+        assert pooled.search_agents_by_zip(zip_code) == []
+    assert pool.summary()["only"]["quarantined"]
+
+    # The only identity is resting: the next zip waits for it.
+    pooled.search_agents_by_zip("90003")
+    assert clock.slept == [30]
+    # A repeat quarantine lasts twice as long.
+    pooled.search_agents_by_zip("90004")
+    assert pool.states[0].quarantined_until == clock.now + 60
+
+def test_pooled_identities_share_one_retry_budget(tmp_path: Path) -> None:
+    identities = tmp_path / "user_agents.txt"
+    identities.write_text("UA-1\nUA-2\n", encoding="utf-8")
+    settings = Settings(
+        identities_path=identities,
+        rate_limit_rpm=100000,
+        rate_limit_burst=100,
+        retry_max_attempts=3,
+        retry_base_delay=0.0,
+        retry_budget=1,
+    )
+    pooled = build_crawl_client(settings, None, None)
+    first, second = pooled.clients
+    assert first.retry_budget is second.retry_budget
+
+    # The first identity spends the run's only retry; the second has none left.
+    for client in (first, second):
+        client.session = ScriptedSession([500, 500, 500])
+    with pytest.raises(FetchError) as spent:
+        first.search_agents_by_zip("90049")
+    with pytest.raises(FetchError) as exhausted:
+        second.search_agents_by_zip("90210")
+    assert spent.value.attempts == 2
+    assert exhausted.value.attempts == 1
@@ -1,5 +1,19 @@
-from src.parsers.html_parser import parse_agents_html
+import json
+from pathlib import Path
+
+import pytest
+
+from src.parsers.html_parser import (
+    STRATEGY_DOM,
+    STRATEGY_EMBEDDED_JSON,
+    SUPPORTED_BACKENDS,
+    parse_agents_html,
+    parse_agents_page,
+)
 from src.parsers.agent_normalizer import AgentNormalizer
+from src.parsers.agent_record import AgentRecord
+
+PARITY_DIR = Path(__file__).parent / "fixtures" / "parser_parity"
 
 SAMPLE_HTML = """
 <div class="agent-card">
@@ -57,4 +71,189 @@ def test_agent_normalizer_produces_expected_schema() -> None:
     assert normalized["Office / Company name"] == "Brentwood"
     assert normalized["Company Website"] == "https://company.example.com"
     assert normalized["Review count"] == 0
-    assert normalized["Agent Photo"] == "https://example.com/photo.jpg"
\ No newline at end of file
+    assert normalized["Agent Photo"] == "https://example.com/photo.jpg"
+
+def test_agent_record_matches_dict_schema() -> None:
+    raw = parse_agents_html(SAMPLE_HTML, zip_code="90049")[0]
+    normalizer = AgentNormalizer()
+    record = normalizer.normalize_record(raw)
+    expected = normalizer.normalize(raw)
+
+    assert record == expected
+    assert list(record) == AgentNormalizer.FIELD_ORDER
+    assert record.to_dict() == expected
+    assert AgentRecord.from_dict(expected) == record
+    other = normalizer.normalize_record(raw)
+    assert other["Office / Company name"] is record["Office / Company name"]
+    with pytest.raises(KeyError):
+        record["name"]
+
+def test_normalize_batch_matches_per_record_normalization() -> None:
+    base = parse_agents_html(SAMPLE_HTML, zip_code="90049")[0]
+    variants = [
+        {},
+        {"zip_codes_serviced_raw": "  "},
+        {"zip_codes_serviced_raw": ","},
+        {"zip_codes_serviced_raw": "90210; 90049 ,", "zip_code_context": None},
+        {"zip_codes_serviced_raw": None, "zip_code_context": None},
+        {"mobile_phones_raw": "a;b, ,c", "areas_serviced_raw": "  Los   Angeles "},
+        {"listing_count": "7", "review_count": None, "company_website": None},
+        {"office_name": None, "office_phone": ""},
+        # Non-text values are carried over instead of being interned.
+        {"office_phone": 3105551234, "company_website": {"href": "x"}},
+    ]
+    raws = [{**base, **variants[i % len(variants)], "name": f"Agent {i}"} for i in range(100)]
+    normalizer = AgentNormalizer()
+
+    expected = [normalizer.normalize_record(raw) for raw in raws]
+    batch = normalizer.normalize_batch(raws)
+
+    assert batch == expected
+    assert [record.to_dict() for record in batch] == [r.to_dict() for r in expected]
+    assert batch[0]["Office / Company name"] is expected[0]["Office / Company name"]
+    assert batch[8]["Office Phone"] == 3105551234
+    assert normalizer.normalize_batch(raws[:3]) == expected[:3]
+    assert normalizer.normalize_batch([]) == []
+
+@pytest.mark.parametrize("backend", SUPPORTED_BACKENDS)
+@pytest.mark.parametrize(
+    "html_path", sorted(PARITY_DIR.glob("*.html")), ids=lambda p: p.stem
+)
+def test_html_parser_matches_parity_corpus(html_path: Path, backend: str) -> None:
+    """Expected outputs were recorded from the original select_one parser."""
+    if backend == "lxml":
+        pytest.importorskip("lxml")
+    expected = json.loads(html_path.with_suffix(".json").read_text(encoding="utf-8"))
+    html = html_path.read_text(encoding="utf-8")
+
+    assert parse_agents_html(html, zip_code="90049", backend=backend) == expected
+
+def test_html_parser_rejects_unknown_backend() -> None:
+    with pytest.raises(ValueError):
+        parse_agents_html(SAMPLE_HTML, backend="html5lib")
+
+NEXT_DATA = {
+    "props": {
+        "pageProps": {
+            "pageData": {
+                "matching_rows": 1,
+                "agents": [
+                    {
+                        "full_name": "Jane Doe",
+                        "web_url": "https://example.com/agents/90049/1",
+                        "email": "Jane@example.com",
+                        "for_sale_price": {"count": 11},
+                        "recently_sold": {"count": 48},
+                        "phones": [
+                            {"number": "(310) 270-xxxx", "type": "Office"},
+                            {"number": "(310) 279-xxxx", "type": "Mobile"},
+                            {"number": "(310) 633-xxxx", "type": "Mobile"},
+                        ],
+                        "served_areas": [{"name": "Los Angeles"}, {"name": "Malibu"}],
+                        "zips": ["90049", "90210"],
+                        "office": {"name": "Brentwood", "website": "https://company.example.com"},
+                        "review_count": 0,
+                        "photo": {"href": "https://example.com/photo.jpg"},
+                    }
+                ],
+            }
+        }
+    }
+}
+
+def test_parser_prefers_embedded_json_payload() -> None:
+    # The DOM card is deliberately different so the test proves the DOM
+    # heuristics were skipped.
+    html = (
+        "<html><body>" + SAMPLE_HTML.replace("Jane Doe", "DOM Agent")
+        + '<script id="__NEXT_DATA__" type="application/json">'
+        + json.dumps(NEXT_DATA)
+        + "</script></body></html>"
+    )
+
+    result = parse_agents_page(html, zip_code="90049")
+
+    assert result.strategy == STRATEGY_EMBEDDED_JSON
+    assert result.agents == [
+        {
+            "name": "Jane Doe",
+            "profile_url": "https://example.com/agents/90049/1",
+            "email": "Jane@example.com",
+            "listing_count": 11,
+            "sold_count": 48,
+            "office_phone": "(310) 270-xxxx",
+            "mobile_phones_raw": "(310) 279-xxxx, (310) 633-xxxx",
+            "areas_serviced_raw": "Los Angeles, Malibu",
+            "zip_codes_serviced_raw": "90049, 90210",
+            "office_name": "Brentwood",
+            "company_website": "https://company.example.com",
+            "review_count": 0,
+            "photo_url": "https://example.com/photo.jpg",
+            "zip_code_context": "90049",
+        }
+    ]
+    assert result.total_count == 1
+    normalized = AgentNormalizer().normalize(result.agents[0])
+    assert normalized["Mobile Phones"] == "(310) 279-xxxx, (310) 633-xxxx"
+
+def test_parser_falls_back_to_dom_without_usable_payload() -> None:
+    html = SAMPLE_HTML + '<script id="__NEXT_DATA__">{"props": {}}</script>'
+
+    result = parse_agents_page(html, zip_code="90049")
+
+    assert result.strategy == STRATEGY_DOM
+    assert result.agents[0]["name"] == "Jane Doe"
+
+def test_parser_reports_advertised_result_count() -> None:
+    dom = parse_agents_page("<h2>1,245 agents found</h2>" + SAMPLE_HTML)
+    assert (dom.total_count, dom.page_size) == (1245, None)
+
+    assert parse_agents_page(SAMPLE_HTML).total_count is None
+
+    payload = {"pageData": {"matching_rows": 45, "limit": 20, "agents": []}}
+    html = '<script id="__NEXT_DATA__">' + json.dumps(payload) + "</script>"
+    embedded = parse_agents_page(html)
+    assert (embedded.total_count, embedded.page_size) == (45, 20)
+
+def test_parser_accepts_utf8_bytes() -> None:
+    dom = "<h2>1,245 agents found</h2>" + SAMPLE_HTML.replace("Jane Doe", "Zoë Doe")
+    embedded = (
+        '<script id="__NEXT_DATA__" type="application/json">' + json.dumps(NEXT_DATA) + "</script>"
+    )
+    for html in (dom, embedded):
+        expected = parse_agents_page(html, zip_code="90049")
+        assert parse_agents_page(html.encode("utf-8"), zip_code="90049") == expected
+    assert parse_agents_page(dom.encode("utf-8")).agents[0]["name"] == "Zoë Doe"
+
+def test_embedded_payload_with_odd_field_types_still_normalizes() -> None:
+    payload = {
+        "matching_rows": 1,
+        "agents": [
+            {
+                "full_name": "A",
+                "office_phone": 3105551234,
+                "office": {"name": {"text": "Brentwood"}, "website": ["x"]},
+                "photo": {"href": ""},
+            }
+        ],
+    }
+    html = '<script id="__NEXT_DATA__">' + json.dumps(payload) + "</script>"
+
+    result = parse_agents_page(html, zip_code="90049")
+
+    agent = result.agents[0]
+    assert agent["office_phone"] == "3105551234"
+    assert agent["office_name"] is None
+    assert agent["company_website"] is None
+    assert agent["photo_url"] is None
+    record = AgentNormalizer().normalize_record(agent)
+    assert record["Office Phone"] == "3105551234"
+
+def test_unrelated_empty_agent_list_does_not_hide_dom_results() -> None:
+    payload = {"props": {"pageProps": {"team": {"agents": []}}}}
+    html = SAMPLE_HTML + '<script id="__NEXT_DATA__">' + json.dumps(payload) + "</script>"
+
+    result = parse_agents_page(html, zip_code="90049")
+
+    assert result.strategy == STRATEGY_DOM
+    assert result.agents[0]["name"] == "Jane Doe"
@@ -0,0 +1,71 @@
+import asyncio
+from typing import List
+
+from src.utils.rate_limiter import TokenBucketRateLimiter, parse_retry_after
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_token_bucket_allows_burst_then_paces() -> None:
+    clock = FakeClock()
+    limiter = TokenBucketRateLimiter(calls_per_minute=60, burst=3, clock=clock)
+
+    assert [limiter.try_acquire() for _ in range(4)] == [True, True, True, False]
+    clock.now += 1.0
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+def test_token_bucket_keeps_separate_buckets_per_host() -> None:
+    clock = FakeClock()
+    limiter = TokenBucketRateLimiter(calls_per_minute=60, clock=clock)
+
+    assert limiter.try_acquire("a.example.com")
+    assert not limiter.try_acquire("a.example.com")
+    assert limiter.try_acquire("b.example.com")
+
+def test_token_bucket_backs_off_and_honours_retry_after() -> None:
+    clock = FakeClock()
+    limiter = TokenBucketRateLimiter(calls_per_minute=60, burst=5, clock=clock)
+
+    limiter.record_response(429, retry_after="30", host="h")
+
+    assert limiter.current_rate("h") == 30
+    assert not limiter.try_acquire("h")
+    clock.now += 30
+    assert limiter.try_acquire("h")
+
+def test_token_bucket_ramps_up_after_sustained_success() -> None:
+    limiter = TokenBucketRateLimiter(
+        calls_per_minute=60, success_threshold=2, increase_step=10, clock=FakeClock()
+    )
+    limiter.record_response(503)
+    limiter.record_response(503)
+    assert limiter.current_rate() == 15
+
+    rates: List[float] = []
+    for _ in range(10):
+        limiter.record_response(200)
+        rates.append(limiter.current_rate())
+
+    assert rates[1] == 25
+    assert rates[-1] == 60
+
+def test_token_bucket_async_acquire_does_not_block_within_burst() -> None:
+    limiter = TokenBucketRateLimiter(calls_per_minute=1, burst=3)
+
+    async def run() -> None:
+        await asyncio.wait_for(
+            asyncio.gather(*(limiter.acquire() for _ in range(3))), timeout=1
+        )
+
+    asyncio.run(run())
+    assert not limiter.try_acquire()
+
+def test_parse_retry_after_accepts_http_dates() -> None:
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470.0) == 10
+    assert parse_retry_after("soon") is None
@@ -1,12 +1,28 @@
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List
 
-from src.realtor_client import RealtorClient
+import pytest
+import requests
+
+from src.realtor_client import FetchError, RealtorClient
+from src.storage.response_cache import ResponseCache
 from src.parsers.html_parser import parse_agents_html
+from src.utils.retry import (
+    REQUEST_BUDGET_EXHAUSTED,
+    CircuitBreaker,
+    RequestBudget,
+    RetryBudget,
+    RetryPolicy,
+)
+from src.utils.metrics import NULL_METRICS, Metrics, describe_crawl_metrics
+from src.utils.profiler import RunProfiler, format_stage_table
+from src.utils.replay_session import RecordingSession, ReplaySession, ReplayStore
 
 class DummyResponse:
-    def __init__(self, text: str, status_code: int = 200) -> None:
+    def __init__(self, text: str, status_code: int = 200, headers: Dict[str, str] | None = None) -> None:
         self.text = text
         self.status_code = status_code
+        self.headers = headers or {}
 
     def raise_for_status(self) -> None:
         if not (200 <= self.status_code < 300):
@@ -83,4 +99,459 @@ def test_realtor_client_uses_session_and_parses_agents() -> None:
     raw = agents[0]
     parsed = parse_agents_html(SAMPLE_HTML, zip_code="90049")[0]
     assert raw["name"] == parsed["name"]
-    assert raw["profile_url"] == parsed["profile_url"]
\ No newline at end of file
+    assert raw["profile_url"] == parsed["profile_url"]
+
+class PagedSession:
+    """Serves ``pages`` pages of SAMPLE_HTML per zip, then an empty page."""
+
+    def __init__(self, pages: int) -> None:
+        self.pages = pages
+        self.urls: list[str] = []
+
+    def get(self, url: str, headers: Dict[str, Any], cookies: Dict[str, Any], params, timeout: int) -> DummyResponse:
+        self.urls.append(url)
+        page = int(url.rsplit("/pg-", 1)[1]) if "/pg-" in url else 1
+        return DummyResponse(SAMPLE_HTML if page <= self.pages else "<html></html>")
+
+class CountedSession(PagedSession):
+    """Like PagedSession, but every page advertises the total agent count."""
+
+    def get(self, url: str, headers: Dict[str, Any], cookies: Dict[str, Any], params, timeout: int) -> DummyResponse:
+        response = super().get(url, headers, cookies, params, timeout)
+        response.text = f"<h2>{self.pages} agents found</h2>" + response.text
+        return response
+
+class SlowRateLimiter(DummyRateLimiter):
+    def wait(self) -> None:
+        super().wait()
+        time.sleep(0.05)
+
+def test_pipelined_client_matches_sequential_results() -> None:
+    results = []
+    for pipelined in (False, True):
+        session = PagedSession(pages=3)
+        client = RealtorClient(
+            base_url="https://example.com/agents",
+            session=session,
+            logger=DummyLogger(),
+            pipelined=pipelined,
+        )
+        results.append((client.search_agents_by_zip("90049"), session.urls))
+
+    assert results[0] == results[1]
+    assert results[0][1][-1] == "https://example.com/agents/90049/pg-4"
+
+def test_pipelined_client_drops_prefetch_when_pagination_stops() -> None:
+    session = PagedSession(pages=3)
+    client = RealtorClient(
+        base_url="https://example.com/agents",
+        session=session,
+        rate_limiter=SlowRateLimiter(),
+        logger=DummyLogger(),
+        pipelined=True,
+    )
+
+    agents = client.search_agents_by_zip("90049", max_records=1)
+    time.sleep(0.1)
+
+    assert len(agents) == 1
+    assert session.urls == ["https://example.com/agents/90049"]
+
+def test_advertised_total_skips_trailing_empty_page() -> None:
+    session = CountedSession(pages=3)
+    client = RealtorClient(
+        base_url="https://example.com/agents", session=session, logger=DummyLogger()
+    )
+
+    agents = client.search_agents_by_zip("90049")
+
+    assert len(agents) == 3
+    assert session.urls[-1] == "https://example.com/agents/90049/pg-3"
+
+def test_pipelined_client_does_not_prefetch_past_a_one_page_zip() -> None:
+    session = CountedSession(pages=1)
+    client = RealtorClient(
+        base_url="https://example.com/agents",
+        session=session,
+        logger=DummyLogger(),
+        pipelined=True,
+    )
+
+    assert len(client.search_agents_by_zip("90049")) == 1
+    time.sleep(0.1)
+
+    assert session.urls == ["https://example.com/agents/90049"]
+
+def test_page_fanout_fetches_planned_pages_in_order() -> None:
+    sequential = RealtorClient(
+        base_url="https://example.com/agents", session=CountedSession(pages=6), logger=DummyLogger()
+    ).search_agents_by_zip("90049")
+
+    session = CountedSession(pages=6)
+    client = RealtorClient(
+        base_url="https://example.com/agents",
+        session=session,
+        rate_limiter=SlowRateLimiter(),
+        logger=DummyLogger(),
+        page_fanout=3,
+    )
+    agents = client.search_agents_by_zip("90049")
+
+    assert agents == sequential
+    assert sorted(session.urls) == sorted(
+        ["https://example.com/agents/90049"]
+        + [f"https://example.com/agents/90049/pg-{p}" for p in range(2, 7)]
+    )
+
+class ETagSession:
+    """Answers 304 when the client presents the current ETag."""
+
+    def __init__(self) -> None:
+        self.sent_headers: list[Dict[str, Any]] = []
+
+    def get(self, url: str, headers: Dict[str, Any], cookies: Dict[str, Any], params, timeout: int) -> DummyResponse:
+        self.sent_headers.append(dict(headers))
+        if headers.get("If-None-Match") == '"v1"':
+            return DummyResponse("", status_code=304)
+        return DummyResponse(SAMPLE_HTML, headers={"ETag": '"v1"'})
+
+def test_response_cache_bypasses_network_and_rate_limiter(tmp_path) -> None:
+    cache = ResponseCache(tmp_path / "cache.sqlite3", ttl_seconds=3600)
+    session = ETagSession()
+    rate_limiter = DummyRateLimiter()
+    client = RealtorClient(
+        base_url="https://example.com/agents",
+        session=session,
+        rate_limiter=rate_limiter,
+        logger=DummyLogger(),
+        response_cache=cache,
+    )
+
+    first = client.search_agents_by_zip("90049", max_records=1)
+    second = client.search_agents_by_zip("90049", max_records=1)
+
+    assert first == second
+    assert len(session.sent_headers) == 1
+    assert rate_limiter.calls == 1
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+def test_response_cache_revalidates_stale_entries(tmp_path) -> None:
+    cache = ResponseCache(tmp_path / "cache.sqlite3", ttl_seconds=0)
+    session = ETagSession()
+    client = RealtorClient(
+        base_url="https://example.com/agents",
+        session=session,
+        logger=DummyLogger(),
+        response_cache=cache,
+    )
+
+    client.search_agents_by_zip("90049", max_records=1)
+    agents = client.search_agents_by_zip("90049", max_records=1)
+
+    assert agents[0]["name"] == "Test Agent"
+    assert session.sent_headers[1]["If-None-Match"] == '"v1"'
+    assert cache.stats["revalidated"] == 1
+
+class ScriptedSession:
+    """Plays back a list of status codes / exceptions, then serves SAMPLE_HTML."""
+
+    def __init__(self, script: List[Any]) -> None:
+        self.script = list(script)
+        self.urls: list[str] = []
+
+    def get(self, url: str, headers: Dict[str, Any], cookies: Dict[str, Any], params, timeout: int) -> DummyResponse:
+        self.urls.append(url)
+        step = self.script.pop(0) if self.script else 200
+        if isinstance(step, Exception):
+            raise step
+        if step == 200 and "/pg-" not in url:
+            return DummyResponse(SAMPLE_HTML)
+        return DummyResponse("", status_code=step, headers={"Retry-After": "0"})
+
+def make_retrying_client(session: Any, **kwargs: Any) -> RealtorClient:
+    return RealtorClient(
+        base_url="https://example.com/agents",
+        session=session,
+        logger=DummyLogger(),
+        retry_policy=RetryPolicy(max_attempts=3, base_delay=0.0),
+        **kwargs,
+    )
+
+def test_transient_errors_are_retried_before_parsing() -> None:
+    session = ScriptedSession([requests.Timeout("read timed out"), 503])
+    client = make_retrying_client(session)
+
+    agents = client.search_agents_by_zip("90049", max_records=1)
+
+    assert len(agents) == 1
+    assert len(session.urls) == 3
+    assert client.retry_count == 2
+
+def test_not_found_ends_pagination_without_retrying() -> None:
+    session = ScriptedSession([200, 404])
+    client = make_retrying_client(session)
+
+    agents = client.search_agents_by_zip("90049")
+
+    assert len(agents) == 1
+    assert session.urls[-1] == "https://example.com/agents/90049/pg-2"
+    assert client.retry_count == 0
+
+def test_fatal_and_exhausted_errors_raise_fetch_error() -> None:
+    client = make_retrying_client(ScriptedSession([403]))
+    with pytest.raises(FetchError) as fatal:
+        client.search_agents_by_zip("90049")
+    assert fatal.value.status_code == 403
+    assert fatal.value.attempts == 1
+    assert not fatal.value.retryable
+
+    client = make_retrying_client(ScriptedSession([502, 502, 502, 502]))
+    with pytest.raises(FetchError) as exhausted:
+        client.search_agents_by_zip("90210")
+    assert exhausted.value.attempts == 3
+    assert exhausted.value.zip_code == "90210"
+    assert exhausted.value.page_number == 1
+
+def test_retry_budget_is_shared_across_requests() -> None:
+    session = ScriptedSession([500, 500, 500])
+    client = make_retrying_client(session, retry_budget=RetryBudget(1))
+
+    with pytest.raises(FetchError) as exc:
+        client.search_agents_by_zip("90049")
+
+    assert exc.value.attempts == 2
+    assert client.retry_count == 1
+
+def test_request_budget_counts_retries_and_stops_before_sending() -> None:
+    session = ScriptedSession([500, 500, 500])
+    client = make_retrying_client(session, request_budget=RequestBudget(2))
+
+    with pytest.raises(FetchError) as exc:
+        client.search_agents_by_zip("90049")
+
+    assert exc.value.message == REQUEST_BUDGET_EXHAUSTED
+    assert len(session.urls) == 2
+
+def test_circuit_breaker_pauses_after_error_spike() -> None:
+    now = [0.0]
+    sleeps: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    breaker = CircuitBreaker(
+        error_rate_threshold=0.5, window=4, min_requests=4, cooldown=30,
+        sleep=sleep, clock=lambda: now[0],
+    )
+    for _ in range(3):
+        breaker.record(False)
+    breaker.before_request()
+    assert sleeps == []
+
+    breaker.record(True)
+    breaker.before_request()
+    assert breaker.trips == 1
+    assert sleeps == [30]
+
+class RecordedBodySession(PagedSession):
+    """PagedSession whose responses carry ``content`` like requests' do."""
+
+    def get(self, url: str, **kwargs: Any) -> DummyResponse:
+        response = super().get(url, **kwargs)
+        response.content = response.text.encode("utf-8")
+        return response
+
+def test_replayed_crawl_matches_recorded_crawl(tmp_path) -> None:
+    store = ReplayStore(tmp_path / "recording.sqlite3")
+    recorder = RecordingSession(store, session=RecordedBodySession(pages=2))
+    recorded = RealtorClient(
+        base_url="https://example.com/agents", session=recorder, logger=DummyLogger()
+    ).search_agents_by_zip("90049")
+    assert len(store) == 3
+
+    replay = ReplaySession(store, latency=0.01)
+    started = time.perf_counter()
+    replayed = RealtorClient(
+        base_url="https://example.com/agents", session=replay, logger=DummyLogger()
+    ).search_agents_by_zip("90049")
+
+    assert replayed == recorded
+    assert replay.requests == 3
+    assert time.perf_counter() - started >= 0.03
+    assert ReplaySession(store).get("https://example.com/agents/10001").status_code == 404
+
+def test_replay_store_keeps_headers_whatever_their_case(tmp_path) -> None:
+    store = ReplayStore(tmp_path / "recording.sqlite3")
+    store.put(
+        "https://example.com/agents/90049",
+        429,
+        b"",
+        {"etag": '"v1"', "retry-after": "5", "x-request-id": "abc"},
+    )
+
+    response = store.get("https://example.com/agents/90049")
+
+    assert response.headers["ETag"] == '"v1"'
+    assert response.headers.get("Retry-After") == "5"
+    assert "X-Request-Id" not in response.headers
+
+def test_replay_error_injection_is_deterministic_and_retried(tmp_path) -> None:
+    store = ReplayStore(tmp_path / "recording.sqlite3")
+    store.put_many(
+        (f"https://example.com/agents/90049/pg-{page}", 200, SAMPLE_HTML.encode("utf-8"))
+        for page in range(2, 4)
+    )
+    store.put("https://example.com/agents/90049", 200, SAMPLE_HTML.encode("utf-8"))
+
+    outcomes = []
+    for _ in range(2):
+        replay = ReplaySession(store, error_rate=0.5, seed=7)
+        client = RealtorClient(
+            base_url="https://example.com/agents",
+            session=replay,
+            logger=DummyLogger(),
+            retry_policy=RetryPolicy(max_attempts=10, base_delay=0.0, jitter=False),
+        )
+        outcomes.append((len(client.search_agents_by_zip("90049")), replay.errors))
+
+    assert outcomes[0] == outcomes[1]
+    assert outcomes[0][0] == 3
+    assert outcomes[0][1] > 0
+
+def test_replay_error_injection_does_not_depend_on_request_order(tmp_path) -> None:
+    store = ReplayStore(tmp_path / "recording.sqlite3")
+    urls = [f"https://example.com/agents/{90000 + n}" for n in range(20)]
+    store.put_many((url, 200, SAMPLE_HTML.encode("utf-8")) for url in urls)
+
+    outcomes = []
+    for order in (urls, urls[::-1]):
+        # As if worker threads interleaved differently: same requests, other order.
+        replay = ReplaySession(store, error_rate=0.5, seed=7)
+        statuses = {}
+        for attempt in range(3):
+            for url in order:
+                statuses[url, attempt] = replay.get(url).status_code
+        outcomes.append(statuses)
+
+    assert outcomes[0] == outcomes[1]
+    assert {503, 200} == set(outcomes[0].values())
+
+def test_metrics_record_requests_retries_and_stage_timings(tmp_path) -> None:
+    store = ReplayStore(tmp_path / "recording.sqlite3")
+    store.put("https://example.com/agents/90049", 200, SAMPLE_HTML.encode("utf-8"))
+    replay = ReplaySession(store, error_rate=0.5, seed=7)
+    metrics = Metrics()
+    describe_crawl_metrics(metrics)
+    client = RealtorClient(
+        base_url="https://example.com/agents",
+        session=replay,
+        logger=DummyLogger(),
+        retry_policy=RetryPolicy(max_attempts=10, base_delay=0.0, jitter=False),
+        metrics=metrics,
+    )
+
+    client.search_agents_by_zip("90049")
+
+    # Page 1 succeeds, page 2 was never recorded and ends the zip.
+    assert replay.errors > 0
+    assert metrics.counter_value("requests_total", status=200) == 1
+    assert metrics.counter_value("requests_total", status=404) == 1
+    assert metrics.counter_value("requests_total", status=503) == replay.errors
+    assert metrics.counter_value("retries_total") == replay.errors
+    assert metrics.counter_value("response_bytes_total") == replay.bytes_served
+
+    snapshot = metrics.snapshot()
+    assert snapshot["histograms"]["request_seconds"]["count"] == replay.requests
+    assert snapshot["histograms"]["parse_seconds"]["count"] == 1
+
+    text = metrics.to_prometheus()
+    assert "# TYPE realtor_scraper_requests_total counter" in text
+    assert 'realtor_scraper_requests_total{status="200"} 1' in text
+    assert 'realtor_scraper_request_seconds_bucket{le="+Inf"} %d' % replay.requests in text
+    assert "parse_seconds" in metrics.summary_table()
+
+    assert NULL_METRICS.counter_value("requests_total") == 0
+
+def test_profiler_attributes_replayed_crawl_to_stages(tmp_path) -> None:
+    store = ReplayStore(tmp_path / "recording.sqlite3")
+    store.put_many(
+        (f"https://example.com/agents/90049/pg-{page}", 200, SAMPLE_HTML.encode("utf-8"))
+        for page in range(2, 4)
+    )
+    store.put("https://example.com/agents/90049", 200, SAMPLE_HTML.encode("utf-8"))
+
+    for mode in ("sampling", "deterministic"):
+        metrics = Metrics()
+        client = RealtorClient(
+            base_url="https://example.com/agents",
+            session=ReplaySession(store, latency=0.01),
+            rate_limiter=DummyRateLimiter(),
+            logger=DummyLogger(),
+            metrics=metrics,
+        )
+        profiler = RunProfiler(
+            tmp_path / mode,
+            stage_functions={
+                "fetch": [RealtorClient._request_page],
+                "parse": [RealtorClient._parse],
+            },
+            mode=mode,
+            interval=0.001,
+        )
+        metrics.stage_clock = profiler.clock
+        profiler.start()
+        assert len(client.search_agents_by_zip("90049")) == 3
+        report = profiler.stop()
+
+        stages = report["stages"]
+        # Three pages plus the unrecorded page 4 that ends the zip (not parsed).
+        assert stages["fetch"]["calls"] == 4
+        assert stages["parse"]["calls"] == 3
+        assert stages["rate_limit_wait"]["calls"] == 4
+        assert stages["fetch"]["wall_seconds"] >= 0.04
+        assert report["profile_share"].get("fetch", 0) > 0
+        assert "parse" in format_stage_table(report)
+
+        stacks = (tmp_path / mode / "stacks.collapsed").read_text(encoding="utf-8")
+        line = stacks.splitlines()[0]
+        assert line.startswith("MainThread;")
+        assert line.rsplit(" ", 1)[1].isdigit()
+        # Parsing three small pages may fall between samples; the replay
+        # latency of the fetches cannot.
+        assert ("_parse" if mode == "deterministic" else "_request_page") in stacks
+        assert (tmp_path / mode / "allocations.txt").read_text(encoding="utf-8").startswith(
+            "Traced memory:"
+        )
+
+def test_streamed_client_stops_after_results_and_parses_bytes(tmp_path) -> None:
+    tail = "<footer>" + "<script>analytics()</script>" * 500 + "</footer>"
+    store = ReplayStore(tmp_path / "recording.sqlite3")
+    for page in (1, 2):
+        url = "https://example.com/agents/90049" + (f"/pg-{page}" if page > 1 else "")
+        html = "<html><body><main>" + SAMPLE_HTML + "</main>" + tail + "</body></html>"
+        store.put(url, 200, html.encode("utf-8"), {"Content-Type": "text/html; charset=utf-8"})
+
+    def crawl(streamed: bool) -> Any:
+        metrics = Metrics()
+        client = RealtorClient(
+            base_url="https://example.com/agents",
+            session=ReplaySession(store),
+            logger=DummyLogger(),
+            metrics=metrics,
+            streamed=streamed,
+            stream_chunk_size=256,
+        )
+        return client.search_agents_by_zip("90049"), metrics
+
+    full, full_metrics = crawl(streamed=False)
+    streamed, streamed_metrics = crawl(streamed=True)
+
+    assert streamed == full
+    assert len(streamed) == 2
+    assert streamed_metrics.counter_value("truncated_pages_total") == 2
+    assert (
+        streamed_metrics.counter_value("response_bytes_total")
+        < full_metrics.counter_value("response_bytes_total") / 4
+    )
@@ -0,0 +1,147 @@
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from src.agent_extractor import AgentExtractor, FetchError
+from src.sharded_crawl import ShardedCrawl, run_shard_worker
+from src.storage.work_queue import SharedRequestBudget, WorkQueue
+from tests.test_agent_extractor import FakeLogger, FakeRealtorClient
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class BudgetedFakeClient(FakeRealtorClient):
+    """Spends one request per zip from the shared budget, like RealtorClient."""
+
+    def __init__(self, budget: Any) -> None:
+        super().__init__()
+        self.budget = budget
+
+    def search_agents_by_zip(self, zip_code: str, max_records=None) -> List[Dict[str, Any]]:
+        if not self.budget.try_consume():
+            raise FetchError("http://test", "Request budget exhausted", retryable=False)
+        return super().search_agents_by_zip(zip_code, max_records)
+
+def make_client(budget: Any) -> BudgetedFakeClient:
+    return BudgetedFakeClient(budget)
+
+class BrokenZipClient(FakeRealtorClient):
+    """Fails on zip 90003 with an error the extractor does not handle."""
+
+    def search_agents_by_zip(self, zip_code: str, max_records=None) -> List[Dict[str, Any]]:
+        if zip_code == "90003":
+            raise RuntimeError("unexpected payload")
+        return super().search_agents_by_zip(zip_code, max_records)
+
+def test_work_queue_leases_expire_and_results_keep_input_order(tmp_path: Path) -> None:
+    clock = Clock()
+    queue = WorkQueue(tmp_path / "queue.sqlite3", lease_seconds=10, clock=clock)
+    assert queue.enqueue(["3", "1", "2"]) == 3
+
+    assert queue.claim("a") == "3"
+    assert queue.claim("b") == "1"
+    # "a" stops renewing its lease; the zip goes to the next claimant.
+    clock.now += 11
+    queue.renew("b")
+    assert queue.claim("b") == "3"
+    assert not queue.complete("3", "a", "shard-a", 0, 1)
+    assert queue.complete("3", "b", "shard-b", 0, 1)
+    assert queue.complete("1", "b", "shard-b", 10, 1, failed=True)
+
+    assert queue.release_worker("b") == 0
+    assert queue.claim("c") == "2"
+    assert queue.release_worker("c") == 1
+    assert queue.counts() == {"pending": 1, "leased": 0, "done": 1, "failed": 1}
+    assert [r[:2] for r in queue.iter_results()] == [("3", "done"), ("1", "failed")]
+
+    # Re-enqueueing keeps finished zips and retries failed ones.
+    assert queue.enqueue(["3", "1", "2"]) == 2
+
+def test_shared_request_budget_never_exceeds_the_limit(tmp_path: Path) -> None:
+    queue = WorkQueue(tmp_path / "queue.sqlite3")
+    queue.set_request_limit(25)
+    budgets = [SharedRequestBudget(queue, block=10) for _ in range(2)]
+
+    granted = sum(budget.try_consume() for budget in budgets for _ in range(20))
+
+    assert granted == 25
+    assert queue.requests_used() == 25
+    assert budgets[1].exhausted
+    assert not budgets[0].try_consume()
+
+def test_shard_workers_merge_in_input_order(tmp_path: Path) -> None:
+    zip_codes = [str(90000 + i) for i in range(12)]
+    queue_path = tmp_path / "queue.sqlite3"
+    crawl = ShardedCrawl(
+        queue_path, tmp_path / "shards", make_client, processes=2, poll_interval=0.05
+    )
+    crawl.queue.enqueue(zip_codes)
+    for worker in ("w1", "w2"):
+        shard = tmp_path / "shards" / f"{worker}.jsonl"
+        run_shard_worker(worker, queue_path, shard, make_client, threads=3)
+
+    extractor = AgentExtractor(client=FakeRealtorClient(), logger=FakeLogger())
+    expected = extractor.extract_for_zip_codes(zip_codes)
+    assert list(crawl.iter_agents()) == expected
+    assert crawl.failure_summary()["failed_units"] == 0
+
+    crawl.close(remove=True)
+    assert not queue_path.exists()
+    assert not (tmp_path / "shards").exists()
+
+def test_shard_worker_error_releases_zip_and_stops_sibling_loops(tmp_path: Path) -> None:
+    queue_path = tmp_path / "queue.sqlite3"
+    queue = WorkQueue(queue_path)
+    queue.enqueue([str(90000 + i) for i in range(8)])
+
+    with pytest.raises(RuntimeError):
+        run_shard_worker(
+            "w1",
+            queue_path,
+            tmp_path / "w1.jsonl",
+            lambda budget: BrokenZipClient(),
+            threads=3,
+            poll_interval=0.05,
+        )
+
+    # The zip is back in the queue for another worker instead of staying
+    # leased, and the sibling loops stopped instead of waiting on it.
+    counts = queue.counts()
+    assert counts["leased"] == 0
+    assert counts["pending"] >= 1
+    assert queue.claim("w2") is not None
+    queue.close()
+
+def test_sharded_crawl_spawns_processes_and_stops_at_request_budget(tmp_path: Path) -> None:
+    zip_codes = [str(90000 + i) for i in range(6)]
+    crawl = ShardedCrawl(
+        tmp_path / "queue.sqlite3",
+        tmp_path / "shards",
+        make_client,
+        processes=2,
+        request_budget=4,
+        poll_interval=0.05,
+        logger=FakeLogger(),
+    )
+
+    counts = crawl.run(zip_codes)
+
+    assert counts["done"] == 4
+    assert counts["pending"] == 2
+    # Which zips fit depends on which process drew the budget first (the
+    # other hands its claimed zip back), but the merge keeps input order.
+    names = [agent["Agent name"] for agent in crawl.iter_agents()]
+    assert len(names) == 4
+    assert names == sorted(names)
+    assert set(names) <= {f"Agent {z}" for z in zip_codes}
+
+    # A rerun against the same queue with a larger budget finishes the crawl.
+    crawl.request_budget = 10
+    assert crawl.run(zip_codes)["done"] == 6
+    assert len(list(crawl.iter_agents())) == 6
+    crawl.close()
@@ -0,0 +1,233 @@
+import csv
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import pytest
+
+from src.parsers.agent_normalizer import AgentNormalizer
+from src.parsers.html_parser import ParseResult
+from src.storage.checkpoint_journal import CheckpointJournal
+from src.storage.csv_exporter import export_agents_to_csv
+from src.storage.json_exporter import export_agents_to_json, export_agents_to_jsonl
+from src.storage.parquet_exporter import export_agents_to_parquet
+from src.storage.parse_cache import ParseCache
+from src.storage.response_cache import ResponseCache
+from src.storage.sqlite_exporter import export_agents_to_sqlite
+from src.utils.page_stream import ResultsEndScanner
+
+def make_agents(count: int) -> Iterator[Dict[str, Any]]:
+    normalizer = AgentNormalizer()
+    for i in range(count):
+        yield normalizer.normalize(
+            {
+                "name": f"Agent {i} é",
+                "profile_url": f"https://example.com/agents/{i}",
+                "listing_count": i,
+                "mobile_phones_raw": "111-111-1111; 222-222-2222",
+                "areas_serviced_raw": "Area A,\n  Area B",
+                "zip_code_context": "90049",
+            }
+        )
+
+def test_json_exporter_streams_same_bytes_as_json_dump(tmp_path: Path) -> None:
+    agents = list(make_agents(3))
+    output = tmp_path / "agents.json"
+
+    written = export_agents_to_json(iter(agents), output)
+
+    assert written == 3
+    assert output.read_text(encoding="utf-8") == json.dumps(
+        agents, ensure_ascii=False, indent=2
+    )
+
+def test_exporters_write_agent_records_like_dicts(tmp_path: Path) -> None:
+    normalizer = AgentNormalizer()
+    raw = {"name": "Agent é", "office_name": "Office", "zip_code_context": "90049"}
+    for exporter in (export_agents_to_json, export_agents_to_jsonl, export_agents_to_csv):
+        exporter(iter([normalizer.normalize(raw)]), tmp_path / "dicts")
+        exporter(iter([normalizer.normalize_record(raw)]), tmp_path / "records")
+        assert (tmp_path / "records").read_bytes() == (tmp_path / "dicts").read_bytes()
+
+def test_json_exporter_writes_empty_array(tmp_path: Path) -> None:
+    output = tmp_path / "agents.json"
+    assert export_agents_to_json(iter([]), output) == 0
+    assert json.loads(output.read_text(encoding="utf-8")) == []
+
+def test_jsonl_exporter_writes_one_record_per_line(tmp_path: Path) -> None:
+    output = tmp_path / "agents.jsonl"
+
+    written = export_agents_to_jsonl(make_agents(2), output)
+
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert written == 2
+    assert [json.loads(line)["Agent name"] for line in lines] == ["Agent 0 é", "Agent 1 é"]
+
+def test_csv_exporter_uses_fixed_field_order(tmp_path: Path) -> None:
+    output = tmp_path / "agents.csv"
+
+    written = export_agents_to_csv(make_agents(2), output)
+
+    with output.open(newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert written == 2
+    assert rows[0] == AgentNormalizer.FIELD_ORDER
+    assert rows[2][0] == "Agent 1 é"
+    assert rows[2][3] == "1"
+
+def test_parquet_exporter_writes_typed_row_groups(tmp_path: Path) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    output = tmp_path / "agents.parquet"
+
+    written = export_agents_to_parquet(make_agents(5), output, row_group_size=2)
+
+    parquet = pq.ParquetFile(output)
+    assert written == 5
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.schema_arrow.names == AgentNormalizer.FIELD_ORDER
+    rows = parquet.read().to_pylist()
+    assert rows[4]["Listing count"] == 4
+    assert rows[0]["Mobile Phones"] == ["111-111-1111", "222-222-2222"]
+    assert rows[0]["Zip codes serviced"] == ["90049"]
+    assert rows[0]["Agent name"] == "Agent 0 é"
+
+def test_sqlite_exporter_upserts_agents_and_zip_links(tmp_path: Path) -> None:
+    output = tmp_path / "agents.sqlite"
+    agents = list(make_agents(3))
+    assert export_agents_to_sqlite(iter(agents), output, batch_size=2) == 3
+
+    agents[1]["Listing count"] = 99
+    agents[1]["Zip codes serviced"] = "90210, 90402"
+    export_agents_to_sqlite(iter(agents[:2]), output)
+
+    conn = sqlite3.connect(str(output))
+    assert conn.execute("SELECT COUNT(*) FROM agents").fetchone() == (3,)
+    assert conn.execute(
+        "SELECT listing_count FROM agents WHERE name = 'Agent 1 é'"
+    ).fetchone() == (99,)
+    by_zip = conn.execute(
+        "SELECT a.name FROM agent_zips z JOIN agents a ON a.id = z.agent_id "
+        "WHERE z.zip = ? ORDER BY a.name",
+        ("90049",),
+    ).fetchall()
+    assert by_zip == [("Agent 0 é",), ("Agent 2 é",)]
+    assert conn.execute("SELECT COUNT(*) FROM agent_zips WHERE zip = '90402'").fetchone() == (1,)
+    conn.close()
+
+def test_checkpoint_journal_recovers_from_torn_last_record(tmp_path: Path) -> None:
+    path = tmp_path / "run.checkpoint.jsonl"
+    journal = CheckpointJournal(path)
+    journal.record_page("90049", 1, [{"Agent name": "A"}])
+    journal.record_page("90049", 2, [{"Agent name": "B"}])
+    journal.record_zip_complete("90049")
+    journal.record_page("90210", 1, [{"Agent name": "C"}])
+    journal.close()
+    intact_size = path.stat().st_size
+    with path.open("ab") as f:
+        f.write(b'{"zip": "90210", "page": 2, "agents": [{"Agent na')
+
+    resumed = CheckpointJournal(path, resume=True)
+
+    assert path.stat().st_size == intact_size
+    assert resumed.is_zip_complete("90049")
+    assert list(resumed.iter_pages("90049")) == [[{"Agent name": "A"}], [{"Agent name": "B"}]]
+    assert not resumed.is_zip_complete("90210")
+    assert resumed.next_page("90210") == 2
+    resumed.record_page("90210", 2, [{"Agent name": "D"}])
+    assert list(resumed.iter_pages("90210")) == [[{"Agent name": "C"}], [{"Agent name": "D"}]]
+    resumed.close()
+
+def test_checkpoint_journal_starts_fresh_without_resume(tmp_path: Path) -> None:
+    path = tmp_path / "run.checkpoint.jsonl"
+    CheckpointJournal(path).record_zip_complete("90049")
+
+    journal = CheckpointJournal(path)
+
+    assert not journal.is_zip_complete("90049")
+    assert path.read_bytes() == b""
+    journal.close(remove=True)
+    assert not path.exists()
+
+def test_parse_cache_size_limit_holds_across_processes_sharing_the_file(tmp_path: Path) -> None:
+    path = tmp_path / "parses.sqlite3"
+    # Two workers, each of which only sees its own writes in memory.
+    caches = [ParseCache(path, max_bytes=4096, version="v") for _ in range(2)]
+    for i in range(40):
+        agents = [{"name": f"Agent {i}-{n}", "profile_url": f"https://x/{i}/{n}"} for n in range(20)]
+        result = ParseResult(agents=agents, strategy="dom", total_count=None, page_size=None)
+        caches[i % 2].store(str(i).encode(), result, 0.01)
+
+    with sqlite3.connect(str(path)) as conn:
+        stored = conn.execute("SELECT SUM(size) FROM parses").fetchone()[0]
+    assert 0 < stored <= 4096
+    for cache in caches:
+        cache.close()
+
+def test_response_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_bytes=600)
+    for i in range(5):
+        # Distinct digests keep the bodies from compressing away.
+        body = "".join(hashlib.sha256(f"{i}-{n}".encode()).hexdigest() for n in range(8))
+        cache.store(f"https://example.com/{i}", body)
+
+    assert cache.stats["evicted"] > 0
+    assert cache.lookup("https://example.com/4") is not None
+    assert cache.lookup("https://example.com/0") is None
+    cache.close()
+
+def test_parse_cache_serves_results_from_memory_then_disk(tmp_path: Path) -> None:
+    path = tmp_path / "parses.sqlite3"
+    result = ParseResult(
+        agents=[{"name": "Test Agent", "profile_url": "https://x/1"}],
+        strategy="dom",
+        total_count=1,
+        page_size=20,
+    )
+    key = ParseCache.key(b"<html>page</html>", "90049", None)
+
+    cache = ParseCache(path, version="v1")
+    assert cache.lookup(key) is None
+    cache.store(key, result, 0.25)
+    cached = cache.lookup(key)
+    assert vars(cached) == vars(result)
+    # Callers get a copy they may mutate freely.
+    cached.agents.clear()
+    assert vars(cache.lookup(key)) == vars(result)
+    assert cache.stats["hits"] == 2 and cache.stats["misses"] == 1
+    cache.close()
+
+    # A new run reads the parse back from disk.
+    cache = ParseCache(path, version="v1")
+    assert vars(cache.lookup(key)) == vars(result)
+    assert cache.stats["disk_hits"] == 1
+    assert cache.stats["seconds_saved"] == pytest.approx(0.25)
+    cache.close()
+
+    # A different parser version drops the stored entries.
+    cache = ParseCache(path, version="v2")
+    assert cache.stats["invalidated"] == 1
+    assert cache.lookup(key) is None
+    cache.close()
+
+def test_results_end_scanner_cuts_after_results_across_chunks() -> None:
+    def cut_at(page: bytes, chunk_size: int = 7) -> object:
+        scanner = ResultsEndScanner()
+        buffer = bytearray()
+        for start in range(0, len(page), chunk_size):
+            buffer += page[start : start + chunk_size]
+            cut = scanner.feed(buffer)
+            if cut is not None:
+                return bytes(buffer[:cut])
+        return None
+
+    dom = b"<main><div class='agent-card'>A</div></main><footer>tail</footer>"
+    assert cut_at(dom) == b"<main><div class='agent-card'>A</div></main>"
+    # A Next.js app keeps reading past </main> up to the end of its payload.
+    next_app = (
+        b'<div id="__next"><main>cards</main></div>'
+        b'<script id="__NEXT_DATA__">{"a": 1}</script><script>tail</script>'
+    )
+    assert cut_at(next_app).endswith(b'{"a": 1}</script>')
+    assert cut_at(b"<div class='agent-card'>A</div>") is None
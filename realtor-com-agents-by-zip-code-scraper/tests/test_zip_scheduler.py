@@ -0,0 +1,113 @@
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.agent_extractor import AgentExtractor
+from src.zip_scheduler import ZipScheduler
+from tests.test_agent_extractor import FakeLogger
+
+# Agents per zip: the 9000x zips overlap heavily, 91000 is its own market.
+NEIGHBORHOODS = {
+    "90001": [("a1", "90001, 90002, 90003"), ("a2", "90001, 90002"), ("a3", "90001, 90002")],
+    "90002": [("a1", "90001, 90002, 90003"), ("a2", "90001, 90002"), ("a3", "90001, 90002")],
+    "90003": [("a1", "90001, 90002, 90003"), ("b1", "90003"), ("b2", "90003")],
+    "91000": [("c1", "91000"), ("c2", "91000"), ("c3", "91000")],
+}
+
+class PagedClient:
+    """One agent per page, so pagination caps are visible in ``requests``."""
+
+    def __init__(self) -> None:
+        self.requests: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def iter_agent_pages(
+        self, zip_code: str, max_records: Optional[int] = None, start_page: int = 1
+    ) -> Iterator[List[Dict[str, Any]]]:
+        agents = NEIGHBORHOODS[zip_code]
+        for page, (agent_id, zips) in enumerate(agents, start=1):
+            if page < start_page:
+                continue
+            if max_records is not None and page > max_records:
+                return
+            with self._lock:
+                self.requests.append((zip_code, page))
+            yield [
+                {
+                    "name": f"Agent {agent_id}",
+                    "profile_url": f"https://www.realtor.com/realestateagents/{agent_id}",
+                    "zip_codes_serviced_raw": zips,
+                    "zip_code_context": zip_code,
+                }
+            ]
+
+def test_scheduler_crawls_uncovered_zips_first_and_caps_saturated_ones() -> None:
+    client = PagedClient()
+    scheduler = ZipScheduler(saturated_pages=1)
+    extractor = AgentExtractor(client=client, logger=FakeLogger(), scheduler=scheduler)
+
+    agents = extractor.extract_for_zip_codes(["90001", "90002", "90003", "91000"])
+
+    # After 90001 every agent of 90002 is known and 90003 is a third covered,
+    # so the untouched 91000 goes next; 90002 is saturated and gets one page.
+    zips_in_order = list(dict.fromkeys(zip_code for zip_code, _ in client.requests))
+    assert zips_in_order == ["90001", "91000", "90003", "90002"]
+    assert [page for zip_code, page in client.requests if zip_code == "90002"] == [1]
+    assert len({agent["Website"] for agent in agents}) == 8
+    summary = scheduler.summary()
+    assert summary["zips_capped"] == 1
+    assert summary["new_agents"] == 8
+
+def test_scheduler_request_budget_picks_best_zips_and_stops() -> None:
+    client = PagedClient()
+    # 90001 costs 3 pages + 1 end-of-results request; 5 requests are left
+    # for one more zip, which should be the one with new agents.
+    scheduler = ZipScheduler(request_budget=8)
+    extractor = AgentExtractor(client=client, logger=FakeLogger(), scheduler=scheduler)
+
+    agents = extractor.extract_for_zip_codes(["90001", "90002", "90003", "91000"])
+
+    assert list(dict.fromkeys(z for z, _ in client.requests)) == ["90001", "91000"]
+    assert len(agents) == 6
+    summary = scheduler.summary()
+    assert summary["zips_crawled"] == 2
+    assert summary["zips_skipped"] == 2
+    assert summary["requests"] <= 8
+
+def test_scheduler_with_workers_returns_every_zip() -> None:
+    client = PagedClient()
+    extractor = AgentExtractor(
+        client=client, logger=FakeLogger(), workers=2, scheduler=ZipScheduler()
+    )
+
+    agents = extractor.extract_for_zip_codes(["90001", "90002", "90003", "91000"])
+
+    assert len(agents) == 12
+    assert sorted(set(z for z, _ in client.requests)) == sorted(NEIGHBORHOODS)
+
+def test_scheduler_budget_caps_pages_before_page_size_is_known() -> None:
+    # 90001 has three pages but only two fit, before any page has been seen.
+    client = PagedClient()
+    scheduler = ZipScheduler(request_budget=3)
+    extractor = AgentExtractor(client=client, logger=FakeLogger(), scheduler=scheduler)
+
+    agents = extractor.extract_for_zip_codes(["90001", "91000"])
+
+    assert client.requests == [("90001", 1), ("90001", 2)]
+    assert len(agents) == 2
+    summary = scheduler.summary()
+    assert summary["requests"] <= 3
+    assert summary["zips_skipped"] == 1
+
+def test_scheduler_budget_holds_with_zips_in_flight() -> None:
+    client = PagedClient()
+    scheduler = ZipScheduler(request_budget=5)
+    extractor = AgentExtractor(
+        client=client, logger=FakeLogger(), workers=2, scheduler=scheduler
+    )
+
+    extractor.extract_for_zip_codes(["90001", "90002", "90003", "91000"])
+
+    # The first zip reserves the whole budget until its pages show the page
+    # size, so the second worker cannot push the crawl past it.
+    assert len(client.requests) <= 4
+    assert scheduler.summary()["requests"] <= 5